@@ -1,10 +1,13 @@
 # app.py
 
 import socket
+import multiprocessing
 from flask import Flask
 from flask_login import login_required
 from routes import bp as main_bp
 from auth import bp_auth, login_manager
+from metrics import bp_metrics
+from jobs import job_queue
 import os
 
 def create_app():
@@ -25,11 +28,17 @@ def create_app():
 
     app.register_blueprint(main_bp)
     app.register_blueprint(bp_auth)
+    app.register_blueprint(bp_metrics)
     login_manager.init_app(app)
     return app
 
 if __name__ == '__main__':
+    # Necessário para o pool de processos (CHECKINHO_WORKERS) no executável empacotado
+    multiprocessing.freeze_support()
     # Obtém o IP local da máquina
     host_ip = socket.gethostbyname(socket.gethostname())
+    # Retoma os jobs interrompidos; com o reloader do modo debug, só no processo que atende as requisições
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        job_queue.resume_interrupted()
     # Cria e roda a aplicação Flask
     create_app().run(host=host_ip, debug=True, port=80)
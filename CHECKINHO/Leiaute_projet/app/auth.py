@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import LoginManager, login_user, login_required, logout_user, UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+import os
 import sqlite3
 from db import get_db_connection
 
@@ -8,12 +9,19 @@ bp_auth = Blueprint('auth', __name__)
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
 
+# Usuários administradores (nomes separados por vírgula), ex.: CHECKINHO_ADMINS=ana,joao
+ADMIN_USERS = {name.strip() for name in os.environ.get('CHECKINHO_ADMINS', '').split(',') if name.strip()}
+
 class User(UserMixin):
     def __init__(self, id_, username, password_hash):
         self.id = id_
         self.username = username
         self.password_hash = password_hash
 
+    @property
+    def is_admin(self):
+        return self.username in ADMIN_USERS
+
     @staticmethod
     def get(user_id):
         conn = get_db_connection()
@@ -0,0 +1,95 @@
+# checkpoints.py
+
+import json
+import logging
+from db import get_db_connection
+
+
+class JobCheckpoint:
+    """
+    Progresso persistente de um job (tabelas 'jobs' e 'job_checkpoints' do app.db):
+    - o plano do job (tarefas de collect_verification_tasks e dados do resumo), gravado antes
+      da primeira verificação, pois verify_documents move os arquivos da área de trabalho e a
+      pasta não pode ser classificada de novo ao retomar;
+    - o resultado de cada subpasta (relatório, status, erro, tempos e acertos/falhas do cache),
+      gravado assim que ela termina.
+    Ao retomar um job interrompido, run_batch reaproveita o plano e os resultados já gravados
+    e verifica só as subpastas restantes, montando o mesmo relatório de uma execução contínua.
+    'originals_dir' guarda os arquivos do plano (ver pipeline.snapshot_task_files).
+    """
+
+    def __init__(self, job_id, originals_dir):
+        self.job_id = job_id
+        self.originals_dir = originals_dir
+
+    def load_plan(self):
+        """
+        Plano gravado por save_plan, ou None se o job ainda não foi iniciado.
+        """
+        conn = get_db_connection()
+        try:
+            row = conn.execute('SELECT plan FROM jobs WHERE id = ?', (self.job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None or row['plan'] is None:
+            return None
+        return json.loads(row['plan'])
+
+    def save_plan(self, collected):
+        conn = get_db_connection()
+        try:
+            conn.execute('UPDATE jobs SET plan = ? WHERE id = ?',
+                         (json.dumps(collected, ensure_ascii=False), self.job_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def load(self):
+        """
+        Resultados já gravados: {índice da tarefa: {'outcome', 'cache_stats', 'timings'}}.
+        """
+        conn = get_db_connection()
+        try:
+            rows = conn.execute('SELECT * FROM job_checkpoints WHERE job_id = ?', (self.job_id,)).fetchall()
+        finally:
+            conn.close()
+        return {
+            row['task_index']: {
+                'outcome': (row['report'], row['status'], row['error']),
+                'cache_stats': (row['cache_hits'], row['cache_misses']),
+                'timings': json.loads(row['timings']),
+            }
+            for row in rows
+        }
+
+    def save(self, index, task, outcome, cache_stats, timings):
+        """
+        Grava o resultado de uma subpasta (chamado assim que a verificação termina).
+        """
+        report, status, error_message = outcome
+        conn = get_db_connection()
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO job_checkpoints (job_id, task_index, subfolder_name, report, status, error, '
+                'timings, cache_hits, cache_misses) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (self.job_id, index, task['subfolder_name'], report, status, error_message,
+                 json.dumps(timings, ensure_ascii=False), cache_stats[0], cache_stats[1])
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def clear(self):
+        """
+        Apaga os resultados parciais (o relatório final já foi salvo em 'results').
+        """
+        try:
+            conn = get_db_connection()
+            try:
+                conn.execute('DELETE FROM job_checkpoints WHERE job_id = ?', (self.job_id,))
+                conn.execute('UPDATE jobs SET plan = NULL WHERE id = ?', (self.job_id,))
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logging.error(f"Erro ao apagar os pontos de controle do job {self.job_id}: {e}")
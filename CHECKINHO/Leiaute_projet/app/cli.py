@@ -0,0 +1,226 @@
+# cli.py
+#
+# Verificação em lote pela linha de comando, sem o navegador: a pasta local é classificada
+# como no envio pelo site (pastas de PI e pastas "campanha", ver collect_verification_tasks)
+# e cada subpasta é verificada por verify_documents (run_batch).
+#
+# Os PDFs são vinculados (hard link) ou copiados para uma área de trabalho (Workspace), pois
+# verify_documents move os arquivos para as pastas OK/Non-conformity: a pasta de origem não é alterada.
+# O cache persistente de extração é o do app.db da pasta atual, como no site.
+#
+# Código de saída: 0 se todas as subpastas estiverem OK; senão, a quantidade de subpastas
+# NC ou com erro (limitada a 125); 126 se a pasta não puder ser verificada.
+#
+# Uso:
+#   python app/cli.py PASTA [--workers 4] [--campos "OS N°,DATAS"] [--destino PASTA]
+#                           [--json resumo.json] [--csv resumo.csv] [--relatorio relatorio.html] [--verbose]
+
+import os
+import sys
+import csv
+import json
+import time
+import uuid
+import shutil
+import logging
+import argparse
+import multiprocessing
+
+from pipeline import VERIFICATION_WORKERS, run_batch
+from services import CHECK_FIELDS, allowed_file
+from timing import STAGE_LABELS, StageTimer
+from workspace import BATCH_WORKSPACES_DIR, Workspace
+
+# Maior código de saída usado para a contagem de NC (126 e acima têm significado especial no shell)
+MAX_EXIT_CODE = 125
+
+
+class ConsoleProgress:
+    """
+    Progresso do lote no terminal (stderr), no mesmo formato de Job.start_tasks/task_done.
+    Guarda o status de cada subpasta para o resumo.
+    """
+
+    def __init__(self, stream=sys.stderr):
+        self.stream = stream
+        self.names = []
+        self.statuses = []
+        self.start = time.perf_counter()
+
+    def start_tasks(self, subfolder_names):
+        self.names = list(subfolder_names)
+        self.statuses = ['pendente'] * len(self.names)
+        self.start = time.perf_counter()
+        print(f"{len(self.names)} subpastas a verificar.", file=self.stream, flush=True)
+
+    def task_done(self, index, status):
+        self.statuses[index] = status
+        done = sum(1 for status in self.statuses if status != 'pendente')
+        width = len(str(len(self.names)))
+        elapsed = time.perf_counter() - self.start
+        print(f"[{done:>{width}}/{len(self.names)}] {status:<4} {self.names[index]} ({elapsed:.1f} s)",
+              file=self.stream, flush=True)
+
+
+def stage_files(source_dir, workspace):
+    """
+    Reproduz na área de trabalho a pasta 'source_dir' (com o próprio nome, como no envio pelo site),
+    apenas com os PDFs (ver Workspace.add_file). Retorna a quantidade de arquivos e o total de bytes.
+    """
+    base_dir = os.path.dirname(os.path.abspath(source_dir))
+    total_files = 0
+    total_bytes = 0
+    for root, dirs, files in os.walk(source_dir):
+        for file_name in files:
+            if not allowed_file(file_name):
+                continue
+            source_path = os.path.join(root, file_name)
+            total_bytes += workspace.add_file(source_path, os.path.relpath(source_path, base_dir))
+            total_files += 1
+    return total_files, total_bytes
+
+
+def build_summary(source_dir, summary, progress, seconds):
+    """
+    Resumo do lote em dicionário simples (gravado em JSON), com o status de cada subpasta.
+    """
+    errors = dict(summary['errors'])
+    subfolders = []
+    for name, status, (_, timings) in zip(progress.names, progress.statuses, summary['subfolder_timings']):
+        subfolders.append({
+            'subfolder': name,
+            'status': status,
+            'seconds': timings.get('subfolder'),
+            'error': errors.get(name) if status == 'erro' else None,
+        })
+    return {
+        'source': os.path.abspath(source_dir),
+        'root_folder': summary['root_folder_name'],
+        'subfolders_sent': summary['total_subfolders_sent'],
+        'subfolders_processed': summary['total_subfolders_processed'],
+        'ok': len(summary['ok_processes']),
+        'nc': len(summary['nc_processes']),
+        'errors': len(summary['errors']),
+        'ignored_subfolders': summary['ignored_subfolders'],
+        'cache_hits': summary['cache_hits'],
+        'cache_misses': summary['cache_misses'],
+        'seconds': round(seconds, 4),
+        'timings': summary['timings']['totals'],
+        'subfolders': subfolders,
+    }
+
+
+def write_csv(csv_path, result):
+    """
+    Uma linha por subpasta (separador ';', como o Excel em português espera).
+    """
+    with open(csv_path, 'w', encoding='utf-8-sig', newline='') as file:
+        writer = csv.writer(file, delimiter=';')
+        writer.writerow(['subpasta', 'status', 'segundos', 'erro'])
+        for item in result['subfolders']:
+            writer.writerow([item['subfolder'], item['status'], item['seconds'], item['error'] or ''])
+
+
+def write_html_report(report_path, full_html_report):
+    """
+    Grava o relatório completo com o mesmo modelo (report.html) exibido no site.
+    """
+    from flask import render_template
+    from app import create_app
+
+    with create_app().test_request_context():
+        html = render_template('report.html', report_content=full_html_report)
+    with open(report_path, 'w', encoding='utf-8') as file:
+        file.write(html)
+
+
+def print_summary(result, stream=sys.stderr):
+    print(f"\nPasta raiz: {result['root_folder']}", file=stream)
+    print(f"Subpastas enviadas: {result['subfolders_sent']} | processadas: {result['subfolders_processed']} | "
+          f"OK: {result['ok']} | NC: {result['nc']} | erros: {result['errors']}", file=stream)
+    if result['ignored_subfolders']:
+        print(f"Ignoradas: {', '.join(result['ignored_subfolders'])}", file=stream)
+    for name, seconds in result['timings'].items():
+        print(f"  {STAGE_LABELS.get(name, name)}: {seconds:.2f} s", file=stream)
+    print(f"Tempo total: {result['seconds']:.1f} s", file=stream)
+
+
+def _selected_fields(value):
+    """
+    Converte --campos (nomes separados por vírgula) na lista de campos; None verifica todos.
+    """
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in CHECK_FIELDS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"campos desconhecidos: {', '.join(unknown)} (disponíveis: {', '.join(CHECK_FIELDS)})"
+        )
+    return fields
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verifica uma pasta local (PIs e campanhas) sem o site.")
+    parser.add_argument('pasta', help="Pasta a verificar (a mesma que seria enviada pelo site).")
+    parser.add_argument('--workers', type=int, default=VERIFICATION_WORKERS,
+                        help="Processos usados para verificar as subpastas (padrão: CHECKINHO_WORKERS).")
+    parser.add_argument('--campos', type=_selected_fields, default=None,
+                        help="Campos a verificar, separados por vírgula (padrão: todos).")
+    parser.add_argument('--destino', default=os.environ.get('OUTPUT_PATH', os.getcwd()),
+                        help="Pasta para onde a pasta Relatorios é movida (padrão: OUTPUT_PATH ou a pasta atual).")
+    parser.add_argument('--json', dest='json_path', help="Grava o resumo em JSON neste arquivo.")
+    parser.add_argument('--csv', dest='csv_path', help="Grava o status de cada subpasta em CSV neste arquivo.")
+    parser.add_argument('--relatorio', dest='report_path', help="Grava o relatório HTML completo neste arquivo.")
+    parser.add_argument('--verbose', action='store_true', help="Exibe o log detalhado da verificação.")
+    args = parser.parse_args(argv)
+
+    # services configura o log em INFO ao ser importado
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    source_dir = os.path.abspath(args.pasta)
+    if not os.path.isdir(source_dir):
+        print(f"Pasta não encontrada: {source_dir}", file=sys.stderr)
+        return MAX_EXIT_CODE + 1
+
+    workspace = Workspace(uuid.uuid4().hex, base_dir=BATCH_WORKSPACES_DIR).create()
+    timer = StageTimer()
+    progress = ConsoleProgress()
+    start = time.perf_counter()
+    try:
+        with timer.stage('upload'):
+            total_files, total_bytes = stage_files(source_dir, workspace)
+        if not total_files:
+            print(f"Nenhum PDF encontrado em {source_dir}", file=sys.stderr)
+            return MAX_EXIT_CODE + 1
+        print(f"{total_files} PDFs ({total_bytes / 1024 / 1024:.1f} MB) em {source_dir}", file=sys.stderr)
+
+        full_html_report, summary = run_batch(
+            workspace.input_dir,
+            args.campos,
+            args.workers,
+            progress=progress,
+            relatorios_folder=workspace.relatorios_dir,
+            destination_path=args.destino,
+            timer=timer,
+        )
+    finally:
+        shutil.rmtree(workspace.root, ignore_errors=True)
+
+    result = build_summary(source_dir, summary, progress, time.perf_counter() - start)
+    print_summary(result)
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as file:
+            json.dump(result, file, ensure_ascii=False, indent=2)
+    if args.csv_path:
+        write_csv(args.csv_path, result)
+    if args.report_path:
+        write_html_report(args.report_path, full_html_report)
+
+    return min(result['nc'] + result['errors'], MAX_EXIT_CODE)
+
+
+if __name__ == '__main__':
+    # Necessário para o pool de processos (--workers) no executável empacotado
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,7 +1,9 @@
 
 import os
+import time
 import sqlite3
 from werkzeug.security import generate_password_hash, check_password_hash
+from metrics import DB_QUERY_SECONDS
 
 DB_PATH = os.environ.get('DB_PATH', 'app.db')
 
@@ -29,12 +31,86 @@ c.execute('''CREATE TABLE IF NOT EXISTS results (
     FOREIGN KEY(user_id) REFERENCES users(id)
 )''')
 
+# Colunas adicionadas à tabela 'results' depois da sua criação
+result_columns = [row[1] for row in c.execute('PRAGMA table_info(results)')]
+if 'timings' not in result_columns:
+    # Tempos por etapa do job (JSON, ver timing.StageTimer)
+    c.execute('ALTER TABLE results ADD COLUMN timings TEXT')
+
+c.execute('''CREATE TABLE IF NOT EXISTS extraction_cache (
+    sha256 TEXT NOT NULL,
+    extractor TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (sha256, extractor)
+)''')
+
+c.execute('''CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_access
+    ON extraction_cache (last_access)''')
+
+# Jobs enviados pelo site, para retomar os interrompidos (ver jobs.JobQueue.resume_interrupted)
+c.execute('''CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    selected_fields TEXT NOT NULL,
+    destination_path TEXT,
+    profile INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    plan TEXT,
+    result_id INTEGER,
+    created_at REAL NOT NULL,
+    FOREIGN KEY(user_id) REFERENCES users(id)
+)''')
+
+# Resultado de cada subpasta de um job, gravado assim que ela termina (ver checkpoints.JobCheckpoint)
+c.execute('''CREATE TABLE IF NOT EXISTS job_checkpoints (
+    job_id TEXT NOT NULL,
+    task_index INTEGER NOT NULL,
+    subfolder_name TEXT NOT NULL,
+    report TEXT,
+    status TEXT,
+    error TEXT,
+    timings TEXT NOT NULL,
+    cache_hits INTEGER NOT NULL,
+    cache_misses INTEGER NOT NULL,
+    PRIMARY KEY (job_id, task_index)
+)''')
+
+# Manifesto do modo de vigilância (watch.py): uma linha por subpasta verificada da pasta de entrada
+c.execute('''CREATE TABLE IF NOT EXISTS watch_manifest (
+    inbox TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    subfolder_name TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    files TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    report TEXT,
+    verified_at REAL NOT NULL,
+    PRIMARY KEY (inbox, folder)
+)''')
+
 conn.commit()
 conn.close()
 
 
+class TimedConnection(sqlite3.Connection):
+    """
+    Conexão que registra o tempo de cada consulta (métrica checkinho_db_query_seconds).
+    """
+
+    def execute(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().execute(*args, **kwargs)
+        finally:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - start)
+
+
 def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, factory=TimedConnection)
     conn.row_factory = sqlite3.Row
     return conn
 
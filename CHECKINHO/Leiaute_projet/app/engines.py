@@ -0,0 +1,153 @@
+# engines.py
+
+import os
+from io import StringIO
+import pdfplumber
+import PyPDF2
+import pdfminer
+import pymupdf
+from PyPDF2 import PdfReader
+from pdfminer.high_level import extract_text_to_fp
+
+
+class TextEngine:
+    """
+    Interface dos motores de extração de texto.
+    Cada motor devolve o texto de cada página do PDF; a junção das páginas
+    é feita por extract_text, usando o separador próprio do motor.
+    iter_pages extrai as páginas sob demanda, a partir da página 'start' (quem consome
+    pode parar antes do fim); motores sem extração página a página extraem o documento
+    inteiro de uma vez.
+    """
+    name = ''
+    version = ''
+    page_separator = '\n'
+
+    @property
+    def key(self):
+        """
+        Identificação nome/versão do motor (usada como chave de cache).
+        """
+        return f"{self.name}-{self.version}"
+
+    def extract_pages(self, pdf_path):
+        raise NotImplementedError
+
+    def iter_pages(self, pdf_path, start=0):
+        yield from self.extract_pages(pdf_path)[start:]
+
+    def extract_text(self, pdf_path):
+        return self.page_separator.join(self.extract_pages(pdf_path))
+
+
+class PdfPlumberEngine(TextEngine):
+    name = 'pdfplumber'
+    version = pdfplumber.__version__
+
+    def extract_pages(self, pdf_path):
+        with pdfplumber.open(pdf_path) as pdf:
+            return [page.extract_text() or "" for page in pdf.pages]
+
+    def iter_pages(self, pdf_path, start=0):
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages[start:]:
+                yield page.extract_text() or ""
+
+
+class PyPDF2Engine(TextEngine):
+    name = 'pypdf2'
+    version = PyPDF2.__version__
+
+    def extract_pages(self, pdf_path):
+        with open(pdf_path, "rb") as file:
+            reader = PdfReader(file)
+            return [page.extract_text() or "" for page in reader.pages]
+
+    def iter_pages(self, pdf_path, start=0):
+        with open(pdf_path, "rb") as file:
+            reader = PdfReader(file)
+            for index in range(start, len(reader.pages)):
+                yield reader.pages[index].extract_text() or ""
+
+
+class PdfMinerEngine(TextEngine):
+    """
+    PDFMiner sem análise de layout (laparams=None); as páginas vêm separadas por '\\f'.
+    """
+    name = 'pdfminer'
+    version = pdfminer.__version__
+    page_separator = '\f'
+
+    def extract_pages(self, pdf_path):
+        output_string = StringIO()
+        with open(pdf_path, 'rb') as arquivo_pdf:
+            extract_text_to_fp(arquivo_pdf, output_string, laparams=None)
+        text = output_string.getvalue()
+        output_string.close()
+        return text.split(self.page_separator)
+
+
+class PyMuPDFEngine(TextEngine):
+    name = 'pymupdf'
+    version = pymupdf.VersionBind
+
+    def extract_pages(self, pdf_path):
+        with pymupdf.open(pdf_path) as pdf:
+            return [page.get_text() for page in pdf]
+
+    def iter_pages(self, pdf_path, start=0):
+        with pymupdf.open(pdf_path) as pdf:
+            for index in range(start, pdf.page_count):
+                yield pdf[index].get_text()
+
+
+ENGINES = {
+    engine.name: engine
+    for engine in (PdfPlumberEngine(), PyPDF2Engine(), PdfMinerEngine(), PyMuPDFEngine())
+}
+
+# Motor padrão por tipo de documento. Pode ser trocado por variável de ambiente,
+# ex.: CHECKINHO_ENGINE_AP=pymupdf
+DOCUMENT_ENGINES = {
+    'OS': os.environ.get('CHECKINHO_ENGINE_OS', 'pdfplumber'),
+    'AP': os.environ.get('CHECKINHO_ENGINE_AP', 'pypdf2'),
+    'AT': os.environ.get('CHECKINHO_ENGINE_AT', 'pdfplumber'),
+    'SICAF': os.environ.get('CHECKINHO_ENGINE_SICAF', 'pdfplumber'),
+    'SICAF2': os.environ.get('CHECKINHO_ENGINE_SICAF2', 'pdfminer'),
+}
+
+# Modo de extração (CHECKINHO_EXTRACTION_MODE):
+# - 'fixed': cada tipo de documento usa o seu motor padrão (DOCUMENT_ENGINES).
+# - 'adaptive': tenta primeiro os motores rápidos (CHECKINHO_FAST_ENGINES) e só recorre ao
+#   motor padrão e ao pdfplumber quando os campos extraídos não passam na validação.
+EXTRACTION_MODE = os.environ.get('CHECKINHO_EXTRACTION_MODE', 'fixed')
+FAST_ENGINES = os.environ.get('CHECKINHO_FAST_ENGINES', 'pymupdf,pypdf2').split(',')
+FALLBACK_ENGINE = 'pdfplumber'
+
+
+def get_engine(name):
+    """
+    Retorna o motor pelo nome (pdfplumber, pypdf2, pdfminer ou pymupdf).
+    """
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Motor de extração desconhecido: {name}")
+
+
+def engine_for(document_type):
+    """
+    Retorna o motor configurado para o tipo de documento (OS, AP, AT, SICAF ou SICAF2).
+    """
+    return get_engine(DOCUMENT_ENGINES[document_type])
+
+
+def engine_chain(document_type):
+    """
+    Motores a tentar, em ordem, para o tipo de documento: no modo 'fixed', só o motor
+    padrão; no modo 'adaptive', os motores rápidos, o motor padrão e o pdfplumber.
+    """
+    names = [DOCUMENT_ENGINES[document_type]]
+    if EXTRACTION_MODE == 'adaptive':
+        names = FAST_ENGINES + names + [FALLBACK_ENGINE]
+    return [get_engine(name) for name in dict.fromkeys(name.strip() for name in names)]
@@ -0,0 +1,103 @@
+# extraction_cache.py
+
+import os
+import json
+import time
+import logging
+import threading
+from db import get_db_connection
+
+# Tamanho máximo (em MB) ocupado pelos textos/campos armazenados no cache
+EXTRACTION_CACHE_MAX_MB = int(os.environ.get('EXTRACTION_CACHE_MAX_MB', '256'))
+
+
+class ExtractionCache:
+    """
+    Cache persistente (tabela 'extraction_cache' do app.db) dos textos extraídos
+    e dos campos de cada PDF, endereçado pelo SHA-256 do arquivo e pelo nome/versão
+    do extrator. Um mesmo SICAF ou OS reenviado não passa novamente pelo
+    pdfplumber/pdfminer. O espaço ocupado é limitado e os itens menos usados
+    recentemente são descartados primeiro (LRU).
+    """
+
+    def __init__(self, max_bytes=EXTRACTION_CACHE_MAX_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, sha256, extractor):
+        """
+        Retorna o valor armazenado para (sha256, extractor) ou None se não existir.
+        """
+        try:
+            conn = get_db_connection()
+            try:
+                row = conn.execute(
+                    'SELECT payload FROM extraction_cache WHERE sha256 = ? AND extractor = ?',
+                    (sha256, extractor)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        'UPDATE extraction_cache SET last_access = ? WHERE sha256 = ? AND extractor = ?',
+                        (time.time(), sha256, extractor)
+                    )
+                    conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logging.error(f"Erro ao consultar o cache de extração: {e}")
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row['payload'])
+
+    def put(self, sha256, extractor, value):
+        """
+        Armazena o valor (serializado em JSON) e aplica o limite de tamanho do cache.
+        """
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        try:
+            conn = get_db_connection()
+            try:
+                conn.execute(
+                    'INSERT OR REPLACE INTO extraction_cache (sha256, extractor, payload, size, last_access) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (sha256, extractor, payload, size, time.time())
+                )
+                self._evict(conn)
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logging.error(f"Erro ao gravar no cache de extração: {e}")
+
+    def _evict(self, conn):
+        """
+        Remove os itens acessados há mais tempo até o cache voltar ao limite de tamanho.
+        """
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM extraction_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            'SELECT sha256, extractor, size FROM extraction_cache ORDER BY last_access ASC'
+        ).fetchall()
+        for row in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute(
+                'DELETE FROM extraction_cache WHERE sha256 = ? AND extractor = ?',
+                (row['sha256'], row['extractor'])
+            )
+            total -= row['size']
+        logging.info(f"Cache de extração reduzido para {total} bytes.")
+
+
+extraction_cache = ExtractionCache()
@@ -0,0 +1,290 @@
+# jobs.py
+
+import os
+import json
+import time
+import uuid
+import queue
+import logging
+import threading
+from checkpoints import JobCheckpoint
+from db import get_db_connection
+from metrics import JOBS, Gauge
+from pipeline import run_batch
+from timing import StageTimer
+from workspace import Workspace, workspace_janitor
+
+# Número de threads que processam os envios da fila em segundo plano
+JOB_WORKERS = int(os.environ.get('CHECKINHO_JOB_WORKERS', '1'))
+
+# Vezes que um job pode ser iniciado (ou retomado após uma interrupção) antes de ser marcado como falho
+JOB_MAX_ATTEMPTS = int(os.environ.get('CHECKINHO_JOB_MAX_ATTEMPTS', '3'))
+
+
+class Job:
+    """
+    Um envio de pastas aguardando ou em verificação, com sua própria área de trabalho.
+    Guarda o progresso por subpasta, os tempos por etapa e, ao final, o id do resultado
+    salvo no banco. Com 'profile', cada subpasta é verificada sob o cProfile.
+    O job e o resultado de cada subpasta são gravados no app.db durante a verificação
+    (ver checkpoints.JobCheckpoint); 'job_id' é usado ao retomar um job interrompido.
+    """
+
+    def __init__(self, user_id, selected_fields, destination_path, profile=False, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.user_id = user_id
+        self.workspace = Workspace(self.id)
+        self.selected_fields = selected_fields
+        self.destination_path = destination_path
+        self.profile = profile
+        self.status = 'queued'
+        self.attempts = 0
+        self.created_at = time.time()
+        self.subfolders = []
+        self.result_id = None
+        self.error_message = None
+        self.timer = StageTimer()
+        self.checkpoint = JobCheckpoint(self.id, self.workspace.originals_dir)
+        self._lock = threading.Lock()
+
+    def save(self):
+        """
+        Grava o estado do job na tabela 'jobs' (o plano e os resultados parciais ficam em JobCheckpoint).
+        """
+        conn = get_db_connection()
+        try:
+            conn.execute(
+                'INSERT INTO jobs (id, user_id, selected_fields, destination_path, profile, status, attempts, '
+                'result_id, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET status = excluded.status, attempts = excluded.attempts, '
+                'result_id = excluded.result_id',
+                (self.id, self.user_id, json.dumps(self.selected_fields, ensure_ascii=False), self.destination_path,
+                 int(self.profile), self.status, self.attempts, self.result_id, self.created_at)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def start_tasks(self, subfolder_names):
+        with self._lock:
+            self.subfolders = [{'name': name, 'status': 'pendente'} for name in subfolder_names]
+
+    def task_done(self, index, status):
+        with self._lock:
+            self.subfolders[index]['status'] = status
+        workspace_janitor.touch(self.id)
+
+    def to_dict(self, queue_position=None):
+        with self._lock:
+            subfolders = [dict(subfolder) for subfolder in self.subfolders]
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'queue_position': queue_position,
+            'total': len(subfolders),
+            'done': sum(1 for subfolder in subfolders if subfolder['status'] != 'pendente'),
+            'subfolders': subfolders,
+            'result_id': self.result_id,
+            'error_message': self.error_message,
+        }
+
+
+class JobQueue:
+    """
+    Fila de envios processados por threads em segundo plano, que executam o
+    mesmo pipeline de verify_documents usado antes diretamente na requisição.
+    Os jobs concluídos ou falhos ficam em memória até a sua área de trabalho expirar
+    (ver WorkspaceJanitor.on_expire); depois disso, o status vem da tabela 'jobs' (ver load_status).
+    """
+
+    def __init__(self, workers=JOB_WORKERS):
+        self.workers = workers
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._waiting = []
+        self._lock = threading.Lock()
+        self._threads = []
+        workspace_janitor.on_expire(self.forget)
+
+    def submit(self, job):
+        """
+        Enfileira o job e inicia as threads de processamento na primeira chamada.
+        """
+        job.save()
+        workspace_janitor.register(job.workspace)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._waiting.append(job.id)
+            if not self._threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._work, name=f"checkinho-job-{i + 1}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+        self._queue.put(job)
+        logging.info(f"Job {job.id} enfileirado.")
+        return job
+
+    def resume_interrupted(self):
+        """
+        Reenfileira os jobs que não terminaram (ex.: servidor reiniciado no meio da verificação);
+        cada um continua do último ponto de controle, sem verificar de novo as subpastas concluídas.
+        Jobs sem área de trabalho ou já iniciados JOB_MAX_ATTEMPTS vezes (ex.: um PDF que derruba
+        o processo) são marcados como falhos. Retorna a quantidade de jobs retomados.
+        """
+        conn = get_db_connection()
+        try:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        finally:
+            conn.close()
+
+        resumed = 0
+        for row in rows:
+            job = Job(row['user_id'], json.loads(row['selected_fields']), row['destination_path'],
+                      bool(row['profile']), job_id=row['id'])
+            job.attempts = row['attempts']
+            job.created_at = row['created_at']
+            if not os.path.isdir(job.workspace.input_dir):
+                job.error_message = "Área de trabalho do job não encontrada."
+            elif job.attempts >= JOB_MAX_ATTEMPTS:
+                job.error_message = f"Job interrompido {job.attempts} vezes."
+            else:
+                logging.info(f"Retomando o job {job.id} (tentativa {job.attempts + 1}).")
+                self.submit(job)
+                resumed += 1
+                continue
+
+            logging.warning(f"Job {job.id} não será retomado: {job.error_message}")
+            job.status = 'failed'
+            job.save()
+        return resumed
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def forget(self, job_id):
+        """
+        Remove da memória um job concluído ou falho (chamado quando a sua área de trabalho expira).
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status in ('done', 'failed'):
+                del self._jobs[job_id]
+
+    def load_status(self, job_id):
+        """
+        Status gravado na tabela 'jobs' de um job que não está em memória (ex.: já expirado ou
+        concluído antes de o servidor reiniciar), no formato de Job.to_dict; None se não existir.
+        """
+        conn = get_db_connection()
+        try:
+            row = conn.execute('SELECT id, user_id, status, result_id FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return {
+            'job_id': row['id'],
+            'user_id': row['user_id'],
+            'status': row['status'],
+            'queue_position': None,
+            'total': 0,
+            'done': 0,
+            'subfolders': [],
+            'result_id': row['result_id'],
+            'error_message': 'Os detalhes do erro não estão mais disponíveis.' if row['status'] == 'failed' else None,
+        }
+
+    def queue_position(self, job):
+        """
+        Posição do job na fila (1 = próximo a ser processado) ou None se já saiu da fila.
+        """
+        with self._lock:
+            if job.id in self._waiting:
+                return self._waiting.index(job.id) + 1
+        return None
+
+    def depth(self):
+        """
+        Quantidade de jobs aguardando na fila.
+        """
+        with self._lock:
+            return len(self._waiting)
+
+    def running(self):
+        """
+        Quantidade de jobs em verificação.
+        """
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status == 'running')
+
+    def status(self, job):
+        return job.to_dict(self.queue_position(job))
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                self._waiting.remove(job.id)
+            try:
+                self._run(job)
+            except Exception as e:
+                logging.exception(f"Erro ao processar o job {job.id}: {e}")
+                job.error_message = str(e)
+                job.status = 'failed'
+                try:
+                    job.save()
+                except Exception as save_error:
+                    logging.error(f"Erro ao gravar o estado do job {job.id}: {save_error}")
+            finally:
+                JOBS.inc(status=job.status)
+                self._queue.task_done()
+
+    def _run(self, job):
+        job.status = 'running'
+        job.attempts += 1
+        job.save()
+        try:
+            self._verify(job)
+        finally:
+            # A área de trabalho é apagada pelo faxineiro após o TTL
+            workspace_janitor.release(job.id)
+
+    def _verify(self, job):
+        # A pasta de relatórios é movida para o destino ao final de run_batch
+        full_html_report, summary = run_batch(
+            job.workspace.input_dir,
+            job.selected_fields,
+            progress=job,
+            relatorios_folder=job.workspace.relatorios_dir,
+            destination_path=job.destination_path,
+            timer=job.timer,
+            profile=job.profile,
+            checkpoint=job.checkpoint
+        )
+        timings = {
+            'totals': summary['timings']['totals'],
+            'counts': summary['timings']['counts'],
+            'subfolders': summary['subfolder_timings'],
+        }
+
+        conn = get_db_connection()
+        cursor = conn.execute(
+            'INSERT INTO results (user_id, subfolder_name, report, timings) VALUES (?, ?, ?, ?)',
+            (job.user_id, summary['root_folder_name'], full_html_report, json.dumps(timings, ensure_ascii=False))
+        )
+        # Na mesma transação do resultado, para que um job concluído nunca seja retomado
+        conn.execute("UPDATE jobs SET status = 'done', result_id = ? WHERE id = ?", (cursor.lastrowid, job.id))
+        conn.commit()
+        conn.close()
+        job.checkpoint.clear()
+        job.result_id = cursor.lastrowid
+        job.status = 'done'
+        logging.info(f"Job {job.id} concluído.")
+
+
+job_queue = JobQueue()
+Gauge('checkinho_queue_depth', 'Jobs aguardando na fila.', job_queue.depth)
+Gauge('checkinho_jobs_running', 'Jobs em verificação.', job_queue.running)
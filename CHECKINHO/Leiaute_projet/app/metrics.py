@@ -0,0 +1,190 @@
+# metrics.py
+
+import os
+import threading
+from flask import Blueprint, Response
+from workspace import workspace_janitor
+
+bp_metrics = Blueprint('metrics', __name__)
+
+# Limites (em segundos) dos buckets dos histogramas de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Métricas registradas, na ordem de exposição
+_registry = []
+
+
+def _format_labels(label_names, label_values, extra=()):
+    """
+    Rótulos no formato de texto do Prometheus, ex.: {document_type="AP",le="0.5"}.
+    """
+    pairs = list(zip(label_names, label_values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = [
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    ]
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Counter:
+    """
+    Contador (só aumenta), opcionalmente separado por rótulos, ex.: SUBFOLDERS.inc(3, result='ok').
+    """
+    kind = 'counter'
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        if not values and not self.label_names:
+            values = {(): 0}
+        return [(self.name + _format_labels(self.label_names, key), value) for key, value in sorted(values.items())]
+
+
+class Histogram:
+    """
+    Histograma de durações em segundos (buckets cumulativos, soma e contagem),
+    opcionalmente separado por rótulos.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            bucket_counts, count, total = self._values.get(key, ([0] * len(self.buckets), 0, 0.0))
+            bucket_counts = [
+                bucket_count + (value <= bucket) for bucket_count, bucket in zip(bucket_counts, self.buckets)
+            ]
+            self._values[key] = (bucket_counts, count + 1, total + value)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        lines = []
+        for key, (bucket_counts, count, total) in sorted(values.items()):
+            for bucket, bucket_count in zip(self.buckets, bucket_counts):
+                lines.append((f'{self.name}_bucket' + _format_labels(self.label_names, key, [('le', bucket)]),
+                              bucket_count))
+            lines.append((f'{self.name}_bucket' + _format_labels(self.label_names, key, [('le', '+Inf')]), count))
+            lines.append((f'{self.name}_sum' + _format_labels(self.label_names, key), total))
+            lines.append((f'{self.name}_count' + _format_labels(self.label_names, key), count))
+        return lines
+
+
+class Gauge:
+    """
+    Valor instantâneo lido no momento da coleta por 'function' (ex.: tamanho da fila).
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, function):
+        self.name = name
+        self.help_text = help_text
+        self.function = function
+        _registry.append(self)
+
+    def samples(self):
+        return [(self.name, self.function())]
+
+
+def _reset_locks_after_fork():
+    """
+    Recria os locks das métricas no processo filho (pool de verificação): o fork copia os locks
+    no estado em que estavam, e um lock preso por outra thread do servidor naquele instante
+    (ex.: uma consulta ao app.db sendo medida) travaria o filho na primeira métrica registrada.
+    """
+    for metric in _registry:
+        if hasattr(metric, '_lock'):
+            metric._lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_locks_after_fork)
+
+
+# Envios e subpastas
+UPLOADS = Counter('checkinho_uploads_total', 'Envios de pastas recebidos.')
+UPLOAD_BYTES = Counter('checkinho_upload_bytes_total', 'Bytes dos arquivos enviados.')
+SUBFOLDERS = Counter('checkinho_subfolders_total',
+                     'Subpastas por resultado (sent, processed, ignored, ok, nc, error).', ['result'])
+
+# Extração e cache
+EXTRACTION_SECONDS = Histogram('checkinho_extraction_seconds',
+                               'Tempo de extração (texto e campos) de cada documento, por tipo.',
+                               ['document_type'])
+STAGE_SECONDS = Counter('checkinho_stage_seconds_total', 'Tempo total gasto em cada etapa do processamento.',
+                        ['stage'])
+CACHE_REQUESTS = Counter('checkinho_extraction_cache_requests_total',
+                         'Consultas ao cache persistente de extração, por resultado (hit, miss).', ['result'])
+
+# Jobs e banco
+JOBS = Counter('checkinho_jobs_total', 'Jobs finalizados, por status (done, failed).', ['status'])
+DB_QUERY_SECONDS = Histogram('checkinho_db_query_seconds', 'Tempo de execução das consultas ao app.db.')
+
+# Áreas de trabalho dos jobs (ver workspace.WorkspaceJanitor)
+Gauge('checkinho_workspaces_active', 'Áreas de trabalho de jobs em andamento.',
+      lambda: workspace_janitor.count('active'))
+Gauge('checkinho_workspaces_done', 'Áreas de trabalho de jobs concluídos, aguardando o TTL.',
+      lambda: workspace_janitor.count('done'))
+Gauge('checkinho_workspaces_disk_bytes', 'Bytes ocupados pelas áreas de trabalho.', workspace_janitor.disk_usage)
+Gauge('checkinho_workspaces_reclaimed_bytes', 'Bytes liberados pelo faxineiro desde o início do servidor.',
+      lambda: workspace_janitor.reclaimed_bytes)
+Gauge('checkinho_workspaces_reclaimed', 'Áreas de trabalho apagadas pelo faxineiro desde o início do servidor.',
+      lambda: workspace_janitor.reclaimed_workspaces)
+
+
+def record_timings(snapshot):
+    """
+    Registra os tempos de um job (ver timing.StageTimer.snapshot): o total de cada etapa e
+    a duração de cada documento ('doc:<tipo>') no histograma de extração.
+    """
+    for name, seconds in snapshot['totals'].items():
+        STAGE_SECONDS.inc(seconds, stage=name)
+    for name, samples in snapshot['samples'].items():
+        if name.startswith('doc:'):
+            for seconds in samples:
+                EXTRACTION_SECONDS.observe(seconds, document_type=name[len('doc:'):])
+
+
+def exposition():
+    """
+    Todas as métricas no formato de texto do Prometheus (versão 0.0.4).
+    """
+    lines = []
+    for metric in _registry:
+        lines.append(f'# HELP {metric.name} {metric.help_text}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for sample_name, value in metric.samples():
+            if isinstance(value, float):
+                value = round(value, 6)
+            lines.append(f'{sample_name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+@bp_metrics.route('/metrics')
+def metrics():
+    # Sem login, para que um coletor local possa ler as métricas
+    return Response(exposition(), mimetype='text/plain; version=0.0.4; charset=utf-8')
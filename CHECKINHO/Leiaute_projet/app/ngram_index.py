@@ -0,0 +1,47 @@
+# ngram_index.py
+
+# Tamanho dos n-gramas indexados
+NGRAM_SIZE = 3
+
+
+class NgramIndex:
+    """
+    Índice invertido de n-gramas sobre um conjunto de textos (ex.: um texto por AT).
+    Responde "quais textos contêm este trecho" sem percorrer todos os textos: os
+    candidatos são os textos que têm todos os n-gramas do trecho, e cada candidato
+    é confirmado com uma busca simples (o resultado é o mesmo de 'trecho in texto').
+    """
+
+    def __init__(self, texts, n=NGRAM_SIZE):
+        self.n = n
+        self.texts = dict(texts)
+        self._postings = {}
+        self._results = {}
+        for key, text in self.texts.items():
+            for gram in {text[i:i + n] for i in range(len(text) - n + 1)}:
+                self._postings.setdefault(gram, set()).add(key)
+
+    def __contains__(self, key):
+        return key in self.texts
+
+    def containing(self, needle):
+        """
+        Conjunto das chaves cujos textos contêm 'needle'.
+        """
+        if needle in self._results:
+            return self._results[needle]
+
+        if len(needle) < self.n:
+            candidates = self.texts.keys()
+        else:
+            grams = {needle[i:i + self.n] for i in range(len(needle) - self.n + 1)}
+            postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                if not candidates:
+                    break
+                candidates &= posting
+
+        result = frozenset(key for key in candidates if needle in self.texts[key])
+        self._results[needle] = result
+        return result
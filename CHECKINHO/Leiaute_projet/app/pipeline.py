@@ -0,0 +1,523 @@
+# pipeline.py
+
+import os
+import shutil
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from html import escape
+from extraction_cache import extraction_cache
+from metrics import CACHE_REQUESTS, SUBFOLDERS, Gauge, record_timings
+from services import CampaignContext, DocumentCache, ExtractionPlan, verify_documents, move_relatorios_folder
+from timing import STAGE_LABELS, StageTimer, log_timings, run_profiled
+from workspace import link_or_copy
+
+# Número de processos usados para verificar as subpastas em paralelo (1 = sequencial)
+VERIFICATION_WORKERS = int(os.environ.get('CHECKINHO_WORKERS', '1'))
+
+Gauge('checkinho_verification_workers', 'Processos usados para verificar as subpastas (CHECKINHO_WORKERS).',
+      lambda: VERIFICATION_WORKERS)
+
+# Cache de extração de cada processo do pool (criado pelo initializer)
+_worker_doc_cache = None
+
+# CampaignContexts do job, recebidos uma única vez por processo do pool (ver _init_worker)
+_worker_campaigns = []
+
+
+def collect_verification_tasks(temp_pdf_dir, file_filter=None, include_root=False):
+    """
+    Percorre a pasta enviada e monta a lista de subpastas a verificar, na ordem do os.walk:
+    - Pastas "campanha": OS e ATs na própria pasta, AP e SICAF em cada subpasta.
+    - Demais pastas: OS, AP, ATs e SICAF na própria pasta.
+    Com 'file_filter' (ex.: services.allowed_file), só os arquivos aceitos por ele são considerados.
+    Cada tarefa guarda em 'folder' o caminho da subpasta verificada.
+    Com 'include_root', a própria 'temp_pdf_dir' também é classificada, como a pasta raiz enviada
+    pelo site (ex.: a pasta de entrada do watch.py, que pode ser ela mesma uma pasta "campanha").
+    Retorna um dicionário com as tarefas e os dados do resumo (enviadas, ignoradas, pasta raiz).
+    """
+    def accepted(file_name):
+        return file_filter is None or file_filter(file_name)
+
+    tasks = []
+    campanha_dirs = []
+    total_subfolders_sent = 0
+    ignored_subfolders = []
+    root_folder_name = ""
+
+    immediate_subdirs = [
+        d for d in os.listdir(temp_pdf_dir)
+        if os.path.isdir(os.path.join(temp_pdf_dir, d))
+    ]
+    if immediate_subdirs:
+        root_folder_name = immediate_subdirs[0]
+
+    # Percorre subpastas
+    for root, dirs, files in os.walk(temp_pdf_dir):
+        if root == temp_pdf_dir and not include_root:
+            continue
+
+        # Se for uma pasta chamada "campanha"
+        if 'campanha' in os.path.basename(root).lower():
+            campanha_dir = root
+            campanha_dirs.append(campanha_dir)
+
+            at_files = []
+            os_file = None
+
+            for file_name in os.listdir(campanha_dir):
+                file_path = os.path.join(campanha_dir, file_name)
+                if os.path.isfile(file_path) and accepted(file_name):
+                    if 'AT' in file_name.upper():
+                        at_files.append(file_path)
+                    elif 'OS' in file_name.upper():
+                        os_file = file_path
+
+            subdirs = [
+                d for d in os.listdir(campanha_dir)
+                if os.path.isdir(os.path.join(campanha_dir, d))
+            ]
+            total_subfolders_sent += len(subdirs)
+
+            for subdir in subdirs:
+                subdir_path = os.path.join(campanha_dir, subdir)
+                sicaf_file = None
+                ap_file = None
+
+                for file_name in os.listdir(subdir_path):
+                    if not accepted(file_name):
+                        continue
+                    if 'SICAF' in file_name.upper():
+                        sicaf_file = os.path.join(subdir_path, file_name)
+                    elif 'AP' in file_name.upper():
+                        ap_file = os.path.join(subdir_path, file_name)
+
+                tasks.append({
+                    'subfolder_name': subdir,
+                    'file_paths': {
+                        'OS': os_file,
+                        'AT': at_files,
+                        'SICAF': sicaf_file,
+                        'AP': ap_file
+                    },
+                    'campanha': True,
+                    'folder': subdir_path,
+                })
+
+            continue  # Próximo "root"
+
+        # Se não for pasta "campanha" nem subpasta dela
+        elif ((root != temp_pdf_dir or include_root) and
+              not any(root.startswith(campanha_dir + os.sep) for campanha_dir in campanha_dirs)):
+
+            file_paths = {'AT': []}
+            for file_name in files:
+                if not accepted(file_name):
+                    continue
+                if 'OS' in file_name.upper():
+                    file_paths['OS'] = os.path.join(root, file_name)
+                elif 'AP' in file_name.upper():
+                    file_paths['AP'] = os.path.join(root, file_name)
+                elif 'SICAF' in file_name.upper():
+                    file_paths['SICAF'] = os.path.join(root, file_name)
+                elif 'AT' in file_name.upper():
+                    file_paths['AT'].append(os.path.join(root, file_name))
+
+            subfolder_name = os.path.basename(root)
+            total_subfolders_sent += 1
+
+            if 'AP' not in file_paths or not file_paths['AP']:
+                ignored_subfolders.append(subfolder_name)
+                continue
+
+            tasks.append({
+                'subfolder_name': subfolder_name,
+                'file_paths': file_paths,
+                'campanha': False,
+                'folder': root,
+            })
+
+    return {
+        'tasks': tasks,
+        'total_subfolders_sent': total_subfolders_sent,
+        'ignored_subfolders': ignored_subfolders,
+        'root_folder_name': root_folder_name,
+    }
+
+
+def task_files(task):
+    """
+    Arquivos (tipo, caminho) usados na verificação de uma tarefa de collect_verification_tasks.
+    """
+    file_paths = task['file_paths']
+    files = [(document_type, file_paths.get(document_type)) for document_type in ('OS', 'AP', 'SICAF')]
+    files += [('AT', at_file) for at_file in file_paths.get('AT', [])]
+    return [(document_type, path) for document_type, path in files if path]
+
+
+def snapshot_task_files(tasks, temp_pdf_dir, originals_dir):
+    """
+    Guarda em 'originals_dir' (hard links, ver link_or_copy) os arquivos de todas as tarefas,
+    antes da primeira verificação: verify_documents move os arquivos para as pastas
+    OK/Non-conformity, e um job retomado precisa deles para as subpastas restantes.
+    """
+    for task in tasks:
+        for document_type, path in task_files(task):
+            target_path = os.path.join(originals_dir, os.path.relpath(path, temp_pdf_dir))
+            if not os.path.exists(target_path):
+                link_or_copy(path, target_path)
+
+
+def restore_task_files(tasks, temp_pdf_dir, originals_dir, relatorios_folder):
+    """
+    Antes de retomar as tarefas: recoloca os arquivos que já tinham sido movidos (ex.: subpasta
+    interrompida no meio, ou OS/ATs de campanha movidos por outra subpasta NC) e descarta as
+    pastas de relatório que essas subpastas deixaram incompletas.
+    """
+    for task in tasks:
+        for document_type, path in task_files(task):
+            original_path = os.path.join(originals_dir, os.path.relpath(path, temp_pdf_dir))
+            if not os.path.exists(path) and os.path.exists(original_path):
+                link_or_copy(original_path, path)
+        if relatorios_folder:
+            for status_folder in ('OK', 'Non-conformity'):
+                shutil.rmtree(os.path.join(relatorios_folder, status_folder, task['subfolder_name']),
+                              ignore_errors=True)
+
+
+def _init_worker(campaigns=()):
+    """
+    Inicializa o cache de extração de cada processo do pool e guarda os CampaignContexts do job,
+    que as tarefas referenciam pela posição em 'campaigns' (ver _task_for_worker).
+    """
+    global _worker_doc_cache, _worker_campaigns
+    _worker_doc_cache = DocumentCache(store=extraction_cache)
+    _worker_campaigns = list(campaigns)
+
+
+def _task_for_worker(task, campaign_indexes):
+    """
+    Cópia da tarefa enviada ao pool sem o CampaignContext (que pode ser grande e é o mesmo para
+    todas as subpastas da campanha): só a sua posição na lista recebida por _init_worker.
+    """
+    worker_task = {key: value for key, value in task.items() if key != 'campaign'}
+    campaign = task.get('campaign')
+    worker_task['campaign_index'] = None if campaign is None else campaign_indexes[id(campaign)]
+    return worker_task
+
+
+def _profile_html(subfolder_name, stats_path, top_functions):
+    """
+    Bloco HTML com as funções de maior tempo acumulado de uma subpasta perfilada.
+    """
+    return f"""
+        <div class="profile">
+            <h3>Perfil de {escape(subfolder_name)}</h3>
+            <p>Estatísticas completas: <strong>{escape(os.path.basename(stats_path))}</strong></p>
+            <pre>{escape(top_functions)}</pre>
+        </div>
+        """
+
+
+def _verify_task(task, index, temp_pdf_dir, selected_fields, doc_cache, relatorios_folder, profile_dir=None):
+    """
+    Executa verify_documents para uma tarefa, medindo os tempos por etapa (e o tempo total
+    da subpasta, na etapa 'subfolder').
+    Com 'profile_dir', a verificação roda sob o cProfile: as estatísticas são gravadas
+    nessa pasta e as funções de maior tempo acumulado são adicionadas ao relatório da subpasta.
+    Retorna o resultado de verify_documents e os tempos (StageTimer.snapshot).
+    """
+    arguments = (task['file_paths'], task['subfolder_name'], temp_pdf_dir, selected_fields)
+    options = {'doc_cache': doc_cache, 'relatorios_folder': relatorios_folder, 'campaign': task.get('campaign')}
+    timer = StageTimer()
+    with timer.activate(), timer.stage('subfolder'):
+        if profile_dir is None:
+            outcome = verify_documents(*arguments, **options)
+        else:
+            os.makedirs(profile_dir, exist_ok=True)
+            stats_path = os.path.join(profile_dir, f"perfil_{index + 1:03d}_{task['subfolder_name']}.prof")
+            (result, status, error_message), top_functions = run_profiled(
+                stats_path, verify_documents, *arguments, **options
+            )
+            if result:
+                result += _profile_html(task['subfolder_name'], stats_path, top_functions)
+            outcome = result, status, error_message
+            logging.info(f"Perfil de '{task['subfolder_name']}' gravado em {stats_path}")
+    return outcome, timer.snapshot()
+
+
+def _verify_task_in_worker(task, index, temp_pdf_dir, selected_fields, relatorios_folder, profile_dir):
+    """
+    Executa _verify_task num processo do pool. Retorna também os acertos/falhas
+    do cache persistente desta tarefa, para o resumo do job.
+    """
+    campaign_index = task.pop('campaign_index', None)
+    if campaign_index is not None:
+        task['campaign'] = _worker_campaigns[campaign_index]
+    hits, misses = _worker_doc_cache.persistent_hits, _worker_doc_cache.persistent_misses
+    outcome, timings = _verify_task(task, index, temp_pdf_dir, selected_fields, _worker_doc_cache,
+                                    relatorios_folder, profile_dir)
+    cache_stats = (_worker_doc_cache.persistent_hits - hits, _worker_doc_cache.persistent_misses - misses)
+    return outcome, cache_stats, timings
+
+
+def _outcome_status(outcome):
+    """
+    Status de uma subpasta verificada ('OK', 'NC' ou 'erro'), usado no progresso do job.
+    """
+    result, status, error_message = outcome
+    return 'erro' if error_message else status
+
+
+def run_verification_tasks(tasks, temp_pdf_dir, selected_fields, doc_cache, workers=VERIFICATION_WORKERS,
+                           progress=None, relatorios_folder=None, profile=False, checkpoint=None, restored=None):
+    """
+    Executa verify_documents para cada tarefa e retorna os resultados na mesma ordem das tarefas.
+    Com workers > 1 as subpastas são verificadas em paralelo num pool de processos; os
+    acertos/falhas do cache de cada processo são somados em 'doc_cache'.
+    Os tempos por etapa de cada subpasta ficam em task['timings'] (ver StageTimer.snapshot).
+    Com 'profile', cada subpasta é perfilada e as estatísticas ficam junto dos relatórios.
+    Se 'progress' for informado, progress.task_done(índice, status) é chamado a cada subpasta concluída.
+    Com 'checkpoint' (ver checkpoints.JobCheckpoint), o resultado de cada subpasta é gravado assim que
+    ela termina; as tarefas em 'restored' (índice -> resultado gravado) não são verificadas de novo.
+    """
+    restored = restored or {}
+    results = {}
+    for index, saved in restored.items():
+        hits, misses = saved['cache_stats']
+        doc_cache.persistent_hits += hits
+        doc_cache.persistent_misses += misses
+        results[index] = tuple(saved['outcome']), saved['timings']
+        if progress is not None:
+            progress.task_done(index, _outcome_status(results[index][0]))
+
+    def finish(index, outcome, cache_stats, timings):
+        results[index] = outcome, timings
+        log_timings(f"subpasta {tasks[index]['subfolder_name']}", timings)
+        if checkpoint is not None:
+            checkpoint.save(index, tasks[index], outcome, cache_stats, timings)
+        if progress is not None:
+            progress.task_done(index, _outcome_status(outcome))
+
+    pending = [index for index in range(len(tasks)) if index not in restored]
+    profile_dir = (relatorios_folder or temp_pdf_dir) if profile else None
+    if workers <= 1 or len(pending) <= 1:
+        for index in pending:
+            hits, misses = doc_cache.persistent_hits, doc_cache.persistent_misses
+            outcome, timings = _verify_task(tasks[index], index, temp_pdf_dir, selected_fields, doc_cache,
+                                            relatorios_folder, profile_dir)
+            cache_stats = (doc_cache.persistent_hits - hits, doc_cache.persistent_misses - misses)
+            finish(index, outcome, cache_stats, timings)
+    else:
+        logging.info(f"Verificando {len(pending)} subpastas com {workers} processos.")
+        # Cada CampaignContext é enviado uma vez por processo (initializer), e não a cada tarefa
+        campaigns = []
+        campaign_indexes = {}
+        for index in pending:
+            campaign = tasks[index].get('campaign')
+            if campaign is not None and id(campaign) not in campaign_indexes:
+                campaign_indexes[id(campaign)] = len(campaigns)
+                campaigns.append(campaign)
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)), initializer=_init_worker,
+                                 initargs=(campaigns,)) as executor:
+            futures = {
+                executor.submit(_verify_task_in_worker, _task_for_worker(tasks[index], campaign_indexes), index,
+                                temp_pdf_dir, selected_fields, relatorios_folder, profile_dir): index
+                for index in pending
+            }
+            for future in as_completed(futures):
+                outcome, (hits, misses), timings = future.result()
+                doc_cache.persistent_hits += hits
+                doc_cache.persistent_misses += misses
+                finish(futures[future], outcome, (hits, misses), timings)
+
+    # Mescla na ordem das tarefas, independente da ordem de conclusão
+    outcomes = []
+    for index, task in enumerate(tasks):
+        outcome, task['timings'] = results[index]
+        outcomes.append(outcome)
+    return outcomes
+
+
+def prepare_campaigns(tasks, doc_cache, selected_fields=None):
+    """
+    Cria um CampaignContext por pasta "campanha" (mesma OS e mesmos ATs) e o associa
+    às tarefas dessa pasta, de modo que a OS e os ATs referenciados nos APs sejam
+    extraídos uma única vez, antes da distribuição das subpastas entre os processos.
+    Apenas os documentos necessários para 'selected_fields' são extraídos (ver ExtractionPlan).
+    """
+    plan = ExtractionPlan(selected_fields)
+    campaign_tasks = {}
+    for task in tasks:
+        if task['campanha']:
+            file_paths = task['file_paths']
+            campaign_tasks.setdefault((file_paths['OS'], tuple(file_paths['AT'])), []).append(task)
+
+    campaigns = []
+    for (os_file, at_files), grouped_tasks in campaign_tasks.items():
+        # Os APs da campanha indicam quais ATs precisam ser extraídos
+        ap_files = [task['file_paths']['AP'] for task in grouped_tasks if task['file_paths']['AP']]
+        campaign = CampaignContext(os_file, at_files).prepare(doc_cache, ap_files, plan)
+        for task in grouped_tasks:
+            task['campaign'] = campaign
+        campaigns.append(campaign)
+    return campaigns
+
+
+def _timings_html(timings):
+    """
+    Lista HTML com o tempo total (e o número de ocorrências) de cada etapa.
+    """
+    totals, counts = timings['totals'], timings['counts']
+    names = [name for name in STAGE_LABELS if name in totals]
+    names += sorted(name for name in totals if name not in STAGE_LABELS)
+    html = "<p>Tempo por etapa:</p><ul class='timings'>"
+    for name in names:
+        label = STAGE_LABELS.get(name, name)
+        html += f"<li>{escape(label)}: <strong>{totals[name]:.2f} s</strong> ({counts.get(name, 0)}x)</li>"
+    html += "</ul>"
+    return html
+
+
+def build_summary_report(summary):
+    """
+    Gera o bloco HTML "Resumo do Processamento" a partir dos totais do job.
+    """
+    ignored_subfolders = summary['ignored_subfolders']
+    summary_report = f"""
+        <div class="summary">
+            <h2>Resumo do Processamento</h2>
+            <p>Total de subpastas enviadas: <strong>{summary['total_subfolders_sent']}</strong></p>
+            <p>Total de subpastas processadas: <strong>{summary['total_subfolders_processed']}</strong></p>
+            <p>Total de subpastas ignoradas (sem AP válido): <strong>{len(ignored_subfolders)}</strong></p>
+            <p>Cache de extração: <strong>{summary['cache_hits']}</strong> acertos /
+               <strong>{summary['cache_misses']}</strong> falhas</p>
+        """
+
+    if ignored_subfolders:
+        summary_report += "<p>Subpastas Ignoradas:</p><ul>"
+        for ignored in ignored_subfolders:
+            summary_report += f"<li>{escape(ignored)}</li>"
+        summary_report += "</ul>"
+
+    if summary.get('timings') and summary['timings']['totals']:
+        summary_report += _timings_html(summary['timings'])
+
+    if summary['root_folder_name']:
+        summary_report += f"<p>Pasta Raiz: <strong>{escape(summary['root_folder_name'])}</strong></p>"
+
+    if summary['ok_processes']:
+        summary_report += "<p>Processos OK:</p><ul>"
+        for process in summary['ok_processes']:
+            summary_report += f"<li class='ok'><span class='icon'></span>{escape(process)}</li>"
+        summary_report += "</ul>"
+
+    if summary['nc_processes']:
+        summary_report += "<p>Processos NC:</p><ul>"
+        for process in summary['nc_processes']:
+            summary_report += f"<li class='nc'><span class='icon'></span>{escape(process)}</li>"
+        summary_report += "</ul>"
+
+    summary_report += "</div>"
+    return summary_report
+
+
+def _record_metrics(summary, total_errors):
+    """
+    Soma os totais do job às métricas expostas em /metrics.
+    """
+    SUBFOLDERS.inc(summary['total_subfolders_sent'], result='sent')
+    SUBFOLDERS.inc(summary['total_subfolders_processed'], result='processed')
+    SUBFOLDERS.inc(len(summary['ignored_subfolders']), result='ignored')
+    SUBFOLDERS.inc(len(summary['ok_processes']), result='ok')
+    SUBFOLDERS.inc(len(summary['nc_processes']), result='nc')
+    SUBFOLDERS.inc(total_errors, result='error')
+    CACHE_REQUESTS.inc(summary['cache_hits'], result='hit')
+    CACHE_REQUESTS.inc(summary['cache_misses'], result='miss')
+    record_timings(summary['timings'])
+
+
+def run_batch(temp_pdf_dir, selected_fields, workers=VERIFICATION_WORKERS, progress=None, relatorios_folder=None,
+              destination_path=None, timer=None, profile=False, checkpoint=None):
+    """
+    Verifica todas as subpastas enviadas e monta o relatório HTML completo (subpastas + resumo).
+    Retorna o relatório e o dicionário de resumo (processos OK/NC, erros, ignorados, pasta raiz, tempos etc.).
+    'progress' (opcional) recebe start_tasks(nomes das subpastas) e task_done(índice, status).
+    'relatorios_folder' é a pasta onde as subpastas OK/Non-conformity do job são montadas; com
+    'destination_path', ela é movida para lá (move_relatorios_folder) antes de montar o resumo.
+    'timer' (StageTimer, opcional) acumula os tempos por etapa do job (ex.: já com o upload).
+    Com 'profile', cada verify_documents roda sob o cProfile (ver run_verification_tasks).
+    Com 'checkpoint' (ver checkpoints.JobCheckpoint), o plano e o resultado de cada subpasta são
+    gravados durante o job; ao retomar um job interrompido, só as subpastas restantes são verificadas.
+    """
+    if timer is None:
+        timer = StageTimer()
+    collected = checkpoint.load_plan() if checkpoint is not None else None
+    restored = {}
+    if collected is None:
+        collected = collect_verification_tasks(temp_pdf_dir)
+        if checkpoint is not None:
+            snapshot_task_files(collected['tasks'], temp_pdf_dir, checkpoint.originals_dir)
+            checkpoint.save_plan(collected)
+    else:
+        restored = checkpoint.load()
+        logging.info(f"Retomando: {len(restored)} de {len(collected['tasks'])} subpastas já verificadas.")
+        restore_task_files([task for index, task in enumerate(collected['tasks']) if index not in restored],
+                           temp_pdf_dir, checkpoint.originals_dir, relatorios_folder)
+    tasks = collected['tasks']
+    if progress is not None:
+        progress.start_tasks([task['subfolder_name'] for task in tasks])
+
+    # Cache de textos extraídos compartilhado por todas as subpastas deste envio
+    doc_cache = DocumentCache(store=extraction_cache)
+    with timer.activate():
+        prepare_campaigns([task for index, task in enumerate(tasks) if index not in restored], doc_cache,
+                          selected_fields)
+    outcomes = run_verification_tasks(tasks, temp_pdf_dir, selected_fields, doc_cache, workers, progress,
+                                      relatorios_folder, profile, checkpoint, restored)
+    for task in tasks:
+        timer.merge(task['timings'])
+
+    if destination_path is not None:
+        with timer.stage('relatorios'):
+            move_relatorios_folder(destination_path, relatorios_folder)
+
+    full_html_report = ""
+    total_subfolders_processed = 0
+    errors = []
+    ok_processes = []
+    nc_processes = []
+
+    for task, (result, status, error_message) in zip(tasks, outcomes):
+        subfolder_name = task['subfolder_name']
+        if error_message:
+            errors.append([subfolder_name, error_message])
+            if task['campanha']:
+                logging.warning(f"Erro em '{subfolder_name}': {error_message}")
+            else:
+                full_html_report += f"<h2>Erro no conjunto {escape(subfolder_name)}</h2><p>{escape(error_message)}</p>"
+            continue
+
+        full_html_report += result
+        total_subfolders_processed += 1
+        if status == 'OK':
+            ok_processes.append(subfolder_name)
+        elif status == 'NC':
+            nc_processes.append(subfolder_name)
+
+    summary = {
+        'total_subfolders_sent': collected['total_subfolders_sent'],
+        'total_subfolders_processed': total_subfolders_processed,
+        'ignored_subfolders': collected['ignored_subfolders'],
+        'root_folder_name': collected['root_folder_name'],
+        'ok_processes': ok_processes,
+        'nc_processes': nc_processes,
+        'errors': errors,
+        'cache_hits': doc_cache.persistent_hits,
+        'cache_misses': doc_cache.persistent_misses,
+        'timings': timer.snapshot(),
+        'subfolder_timings': [[task['subfolder_name'], task['timings']['totals']] for task in tasks],
+    }
+    log_timings('job', summary['timings'])
+    _record_metrics(summary, len(errors))
+    full_html_report += build_summary_report(summary)
+    return full_html_report, summary
@@ -3,25 +3,27 @@
 import os
 import sys
 import re
+import bisect
+import functools
 import logging
 import unicodedata
 import shutil
-import ast
 import threading
-import time
-import tempfile
+import hashlib
 from datetime import datetime
-import pdfplumber
-from PyPDF2 import PdfReader
-from pdfminer.high_level import extract_text_to_fp
-from io import StringIO
 from html import escape
+from engines import get_engine, engine_for, engine_chain
+from ngram_index import NgramIndex
+from timing import stage
 
 # Ajuste o nível de logging conforme necessário
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
 ALLOWED_EXTENSIONS = {'pdf'}
 
+# Incrementar sempre que a lógica de extract_fields mudar (invalida os campos em cache)
+FIELDS_VERSION = 1
+
 def obter_caminho_recurso(relativo):
     """
     Função para obter o caminho correto no ambiente empacotado ou em ambiente de desenvolvimento.
@@ -40,18 +42,213 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def extract_text_with_pdfminer_layout(pdf_path):
+def file_sha256(path):
+    """
+    SHA-256 (hexadecimal) do conteúdo do arquivo, lido em blocos de 1 MB.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DocumentCache:
+    """
+    Cache por job dos textos extraídos de cada PDF.
+    Cada arquivo é lido uma única vez por extrator e as visões derivadas
+    (texto ajustado, texto sem espaços, aspas normalizadas etc.) são calculadas
+    uma única vez e reutilizadas por todas as verificações do job.
+
+    Se 'store' for informado (ver extraction_cache.ExtractionCache), as visões marcadas
+    com 'persist_as' também são buscadas/gravadas nele pelo SHA-256 do arquivo,
+    evitando reprocessar PDFs já vistos em envios anteriores.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self.persistent_hits = 0
+        self.persistent_misses = 0
+        self._entries = {}
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def sha256(self, pdf_path):
+        """
+        SHA-256 do conteúdo do arquivo (calculado uma vez por caminho).
+        """
+        path = os.path.abspath(pdf_path)
+        if path not in self._hashes:
+            self._hashes[path] = file_sha256(path)
+        return self._hashes[path]
+
+    def get(self, pdf_path, view, builder, persist_as=None):
+        """
+        Retorna a visão 'view' do PDF, calculando-a com 'builder' apenas na primeira vez.
+        Exceções do builder não são armazenadas, para que o chamador possa tratá-las.
+        """
+        key = (os.path.abspath(pdf_path), view)
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+
+        value = None
+        persist = persist_as is not None and self.store is not None
+        if persist:
+            sha256 = self.sha256(pdf_path)
+            value = self.store.get(sha256, persist_as)
+            with self._lock:
+                if value is None:
+                    self.persistent_misses += 1
+                else:
+                    self.persistent_hits += 1
+
+        if value is None:
+            value = builder()
+            if persist:
+                self.store.put(sha256, persist_as, value)
+
+        with self._lock:
+            return self._entries.setdefault(key, value)
+
+    def peek(self, pdf_path, view):
+        """
+        Visão já calculada do PDF, ou None (não calcula nem consulta o cache persistente).
+        """
+        with self._lock:
+            return self._entries.get((os.path.abspath(pdf_path), view))
+
+    def export(self, pdf_paths):
+        """
+        Copia as visões já calculadas dos PDFs informados (para semear outro cache).
+        """
+        paths = {os.path.abspath(pdf_path) for pdf_path in pdf_paths}
+        with self._lock:
+            return {key: value for key, value in self._entries.items() if key[0] in paths}
+
+    def seed(self, entries):
+        """
+        Adiciona visões calculadas em outro cache, sem sobrescrever as já existentes.
+        """
+        with self._lock:
+            for key, value in entries.items():
+                self._entries.setdefault(key, value)
+
+
+def _cached(doc_cache, pdf_path, view, builder, persist_as=None):
+    """
+    Aplica o cache do job quando fornecido; sem cache, apenas executa o builder.
+    """
+    if doc_cache is None:
+        return builder()
+    return doc_cache.get(pdf_path, view, builder, persist_as)
+
+
+def _engine_pages(pdf_path, engine, doc_cache=None):
+    """
+    Lista com o texto de cada página do PDF extraído pelo motor informado.
+    """
+    def build():
+        with stage('extraction'):
+            return engine.extract_pages(pdf_path)
+
+    return _cached(doc_cache, pdf_path, f'{engine.name}_pages', build, f"{engine.key}/pages")
+
+
+def _engine_text(pdf_path, engine, doc_cache=None):
+    """
+    Texto bruto do PDF (páginas unidas pelo separador do motor).
+    """
+    return _cached(doc_cache, pdf_path, f'{engine.name}_text',
+                   lambda: engine.page_separator.join(_engine_pages(pdf_path, engine, doc_cache)))
+
+
+# Variações de aspas normalizadas para '"' (uma regex pré-compilada: nos textos com acentos,
+# str.translate com tabela de dicionário é cerca de 10x mais lento)
+_QUOTES = re.compile(r'[“”″\'‘’]')
+
+_WHITESPACE_RUN = re.compile(r'\s+')
+
+
+def normalize_quotes(text):
+    return _QUOTES.sub('"', text)
+
+
+def remove_whitespace(text):
+    """
+    Remove todos os espaços em branco (equivale a re.sub(r'\s+', '', text)).
+    """
+    return ''.join(text.split())
+
+
+class Document:
+    """
+    Texto de um documento e suas visões canônicas, calculadas apenas quando usadas
+    pela primeira vez e reaproveitadas por todas as checagens:
+    - quotes_normalized: aspas normalizadas para '"'.
+    - whitespace_collapsed: aspas normalizadas e sequências de espaços reduzidas a um espaço.
+    - no_spaces_upper / no_spaces_lower: sem nenhum espaço em branco, em maiúsculas / minúsculas.
+    - ascii_folded: sem acentos (NFKD, apenas caracteres ASCII).
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self._views = {}
+
+    def _view(self, name, builder):
+        if name not in self._views:
+            self._views[name] = builder()
+        return self._views[name]
+
+    @property
+    def quotes_normalized(self):
+        return self._view('quotes_normalized', lambda: normalize_quotes(self.text))
+
+    @property
+    def whitespace_collapsed(self):
+        return self._view('whitespace_collapsed', lambda: _WHITESPACE_RUN.sub(' ', self.quotes_normalized))
+
+    @property
+    def no_spaces_upper(self):
+        return self._view('no_spaces_upper', lambda: remove_whitespace(self.text).upper())
+
+    @property
+    def no_spaces_lower(self):
+        return self._view('no_spaces_lower', lambda: remove_whitespace(self.text.lower()))
+
+    @property
+    def ascii_folded(self):
+        return self._view('ascii_folded', lambda: unicodedata.normalize('NFKD', self.text)
+                          .encode('ASCII', 'ignore').decode('ASCII'))
+
+
+def _engine_document(pdf_path, engine, doc_cache=None):
+    """
+    Document com o texto bruto do PDF (páginas unidas pelo separador do motor).
+    """
+    return _cached(doc_cache, pdf_path, f'{engine.name}_document',
+                   lambda: Document(_engine_text(pdf_path, engine, doc_cache)))
+
+
+def _adjust_format_text(text):
+    """
+    Ajustes comuns aos extratores:
+    - Adiciona espaço após 'Formato:' se não houver.
+    - Remove linhas em branco.
+    """
+    text = re.sub(r'(Formato:)(\S)', r'\1 \2', text)
+    return "\n".join([line for line in text.splitlines() if line.strip()])
+
+
+def extract_text_with_pdfminer_layout(pdf_path, doc_cache=None, engine=None):
     """
-    Função que extrai o texto de um PDF utilizando PDFMiner,
+    Função que extrai o texto de um PDF utilizando PDFMiner (ou o motor informado),
     mantendo (tanto quanto possível) o layout original. (SICAF2)
     """
-    try:
-        output_string = StringIO()
-        with open(pdf_path, 'rb') as arquivo_pdf:
-            extract_text_to_fp(arquivo_pdf, output_string, laparams=None)
+    engine = engine or get_engine('pdfminer')
 
-        texto_extraido = output_string.getvalue()
-        output_string.close()
+    def build():
+        texto_extraido = _engine_text(pdf_path, engine, doc_cache)
 
         # Remove todos os espaços
         texto_extraido = texto_extraido.replace(" ", "")
@@ -59,46 +256,239 @@ def extract_text_with_pdfminer_layout(pdf_path):
         texto_extraido = "\n".join([line for line in texto_extraido.splitlines() if line.strip()])
 
         return texto_extraido
+
+    try:
+        return _cached(doc_cache, pdf_path, f'{engine.name}_layout', build)
     except Exception as e:
         logging.error(f"Erro ao extrair texto com PDFMiner mantendo layout do PDF {pdf_path}: {e}")
         return ""
 
 
-def extract_text_with_format_adjustment(pdf_path):
+def extract_text_with_format_adjustment(pdf_path, doc_cache=None, engine=None):
     """
-    Extrai o texto de um PDF usando pdfplumber e faz ajustes:
+    Extrai o texto de um PDF usando pdfplumber (ou o motor informado) e faz ajustes:
     - Adiciona espaço após 'Formato:' se não houver.
     - Remove linhas em branco.
     """
+    engine = engine or get_engine('pdfplumber')
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = "\n".join([page.extract_text() for page in pdf.pages])
-
-        text = re.sub(r'(Formato:)(\S)', r'\1 \2', text)
-        text = "\n".join([line for line in text.splitlines() if line.strip()])
-        return text
+        return _cached(doc_cache, pdf_path, f'{engine.name}_adjusted',
+                       lambda: _adjust_format_text(_engine_text(pdf_path, engine, doc_cache)))
     except Exception as e:
         logging.error(f"Erro ao extrair texto do PDF {pdf_path}: {e}")
         return ""
 
 
-def extract_text_with_format_adjustment_py(pdf_path):
+# Cabeçalho dos tipos de documento cujos campos ficam nas primeiras páginas:
+# marcadores do tipo (algum deve estar presente) e, para cada campo de extract_fields,
+# os rótulos aceitos e quantas linhas abaixo do rótulo fica o valor
+HEADER_FIELDS = {
+    'OS1': (('E-mail de Leiaute',), [
+        (['OS Nº', 'OS N°'], 0),
+        (['DATA DE INICIO:', 'DATA DE INÍCIO'], 1),
+        (['TITULO DA OS:', 'TÍTULO DA OS'], 1),
+        (['ORGAO', 'ÓRGÃO'], 1),
+        (['Nº DO PROCESSO DE SELEÇÃO INTERNA:'], 1),
+    ]),
+    'SICAF1': (('Relatório', 'RELATORIO'), [
+        (['Razao Social:', 'Razão Social:'], 0),
+        (['CNPJ: ', 'CNPJ:'], 0),
+        (['Municipio: ', 'Munícipio:'], 0),
+    ]),
+}
+
+
+def _header_resolved(text, header_type):
+    """
+    Indica se 'text' (primeiras páginas) já tem o marcador do tipo e todos os campos do
+    cabeçalho, com as linhas de valor abaixo de cada rótulo.
+    """
+    markers, fields = HEADER_FIELDS[header_type]
+    if not any(marker in text for marker in markers):
+        return False
+    index = LineIndex(text, [label for labels, below in fields for label in labels])
+    for labels, below in fields:
+        found = [index.occurrences(label)[0][0] for label in labels if index.occurrences(label)]
+        # O primeiro rótulo da lista que aparece é o usado por extract_field_value
+        if not found or found[0] + below >= len(index.lines):
+            return False
+    return True
+
+
+def _first_page(pdf_path, engine, doc_cache=None):
+    """
+    Texto da primeira página do PDF (sem extrair as demais).
+    """
+    def build():
+        page_iterator = engine.iter_pages(pdf_path)
+        try:
+            with stage('extraction'):
+                return next(page_iterator, "")
+        finally:
+            page_iterator.close()
+
+    return _cached(doc_cache, pdf_path, f'{engine.name}_first_page', build)
+
+
+def sniff_sicaf_type(pdf_path, doc_cache=None, engine=None):
+    """
+    Tipo do SICAF (SICAF1 ou SICAF2) pela primeira página do PDF, sem extrair o documento
+    inteiro; se o documento inteiro já foi extraído, usa o texto completo.
+    """
+    engine = engine or engine_for('SICAF')
+
+    def build():
+        if doc_cache is not None:
+            pages = doc_cache.peek(pdf_path, f'{engine.name}_pages')
+            if pages is not None:
+                return determine_sicaf_type(engine.page_separator.join(pages))
+        return determine_sicaf_type(_first_page(pdf_path, engine, doc_cache))
+
+    return _cached(doc_cache, pdf_path, f'{engine.name}_sicaf_type', build, f"{engine.key}/sicaf-type")
+
+
+def extract_header_text(pdf_path, header_type, doc_cache=None, engine=None):
+    """
+    Texto ajustado (como extract_text_with_format_adjustment) apenas das primeiras páginas
+    do PDF: as páginas são extraídas uma a uma e a leitura para assim que o cabeçalho
+    'header_type' (ver HEADER_FIELDS) estiver completo. Se o cabeçalho não for encontrado
+    (ex.: outro tipo de documento), retorna o texto do documento inteiro.
+    """
+    engine = engine or get_engine('pdfplumber')
+
+    def build():
+        # Documento inteiro já extraído: não há o que economizar
+        if doc_cache is not None:
+            pages = doc_cache.peek(pdf_path, f'{engine.name}_pages')
+            if pages is not None:
+                return _adjust_format_text(engine.page_separator.join(pages))
+
+        # Primeira página já lida (ex.: por sniff_sicaf_type)
+        pages = []
+        first_page = doc_cache.peek(pdf_path, f'{engine.name}_first_page') if doc_cache is not None else None
+        if first_page is not None:
+            pages.append(first_page)
+            text = _adjust_format_text(first_page)
+            if _header_resolved(text, header_type):
+                return text
+
+        page_iterator = engine.iter_pages(pdf_path, start=len(pages))
+        try:
+            with stage('extraction'):
+                for page in page_iterator:
+                    pages.append(page)
+                    text = _adjust_format_text(engine.page_separator.join(pages))
+                    if _header_resolved(text, header_type):
+                        return text
+        finally:
+            page_iterator.close()
+
+        # Cabeçalho incompleto: todas as páginas foram lidas e ficam no cache do job
+        if doc_cache is not None:
+            doc_cache.seed({(os.path.abspath(pdf_path), f'{engine.name}_pages'): pages})
+        return text if pages else ""
+
+    return _cached(doc_cache, pdf_path, f'{engine.name}_head_{header_type}', build,
+                   f"{engine.key}/head/{header_type}")
+
+
+def extract_text_with_format_adjustment_py(pdf_path, doc_cache=None, engine=None):
     """
     Extrai o texto de um PDF usando PyPDF2 (PdfReader) e faz ajustes:
     - Adiciona espaço após 'Formato:' se não houver.
     - Remove linhas em branco.
     """
-    try:
-        with open(pdf_path, "rb") as file:
-            reader = PdfReader(file)
-            text = "\n".join([page.extract_text() for page in reader.pages])
+    return extract_text_with_format_adjustment(pdf_path, doc_cache, engine or get_engine('pypdf2'))
 
-        text = re.sub(r'(Formato:)(\S)', r'\1 \2', text)
-        text = "\n".join([line for line in text.splitlines() if line.strip()])
+
+@functools.lru_cache(maxsize=64)
+def _label_pattern(labels):
+    """
+    Expressão regular com todos os rótulos (do mais longo ao mais curto) e, para cada
+    rótulo, a lista dos rótulos que são prefixos dele: numa mesma posição do texto, todos
+    os rótulos presentes são prefixos do mais longo encontrado.
+    """
+    pattern = re.compile('|'.join(re.escape(label) for label in labels))
+    prefixes = {label: [other for other in labels if label.startswith(other)] for label in labels}
+    return pattern, prefixes
+
+
+class LineIndex:
+    """
+    Índice de linhas de um documento: o texto é dividido em linhas uma única vez e
+    todos os rótulos configurados são localizados numa única varredura (uma expressão
+    regular com todos os rótulos, ver _label_pattern).
+    Rótulos não configurados são indexados sob demanda, com uma varredura própria.
+    """
+
+    def __init__(self, text, labels=()):
+        self.text = text
+        self.lines = text.split('\n')
+        self._line_starts = None
+        self._occurrences = {}
+        self._scan(labels)
+
+    def _scan(self, labels):
+        labels = tuple(sorted({label for label in labels if label and label not in self._occurrences},
+                              key=len, reverse=True))
+        if not labels:
+            return
+        pattern, prefixes = _label_pattern(labels)
+        line_starts = self._get_line_starts()
+        occurrences = {label: [] for label in labels}
+        match = pattern.search(self.text)
+        while match:
+            position = match.start()
+            line_number = bisect.bisect_right(line_starts, position) - 1
+            column = position - line_starts[line_number]
+            for label in prefixes[match.group()]:
+                found = occurrences[label]
+                if not found or found[-1][0] != line_number:
+                    found.append((line_number, column))
+            # Recomeça na posição seguinte, para achar também ocorrências sobrepostas
+            match = pattern.search(self.text, position + 1)
+        self._occurrences.update(occurrences)
+
+    def _get_line_starts(self):
+        if self._line_starts is None:
+            self._line_starts = [0]
+            for line in self.lines[:-1]:
+                self._line_starts.append(self._line_starts[-1] + len(line) + 1)
+        return self._line_starts
+
+    def occurrences(self, label):
+        """
+        Lista (nº da linha, posição da primeira ocorrência na linha) das linhas que contêm 'label'.
+        """
+        if label not in self._occurrences:
+            self._scan([label])
+        return self._occurrences[label]
+
+    def line_of(self, value):
+        """
+        Nº da primeira linha que contém 'value' (ou None).
+        """
+        position = self.text.find(value)
+        if position == -1:
+            return None
+        return bisect.bisect_right(self._get_line_starts(), position) - 1
+
+
+def _line_index(text, field_names, line_range=None):
+    """
+    Índice usado por extract_field_value(s): aceita um LineIndex já montado ou o texto.
+    Com 'line_range', indexa apenas o trecho de linhas indicado.
+    """
+    if line_range is not None:
+        lines = text.lines if isinstance(text, LineIndex) else text.split('\n')
+        if isinstance(line_range, int):
+            lines = [lines[line_range - 1]]
+        else:
+            lines = lines[line_range[0] - 1:line_range[1]]
+        return LineIndex('\n'.join(lines), field_names)
+    if isinstance(text, LineIndex):
         return text
-    except Exception as e:
-        logging.error(f"Erro ao extrair texto do PDF {pdf_path}: {e}")
-        return ""
+    return LineIndex(text, field_names)
 
 
 def extract_field_value(text, field_names, below=False, below_lines=1, first_n_chars=None, date_only=False,
@@ -108,31 +498,25 @@ def extract_field_value(text, field_names, below=False, below_lines=1, first_n_c
     """
     Extrai o valor de um campo específico no texto, com suporte para várias opções de filtro
     e manipulação de strings (como capturar linha abaixo, extrair somente números, data, etc.).
+    'text' pode ser o texto do documento ou um LineIndex já montado.
     """
-    lines = text.split('\n')
-
-    if line_range is not None:
-        if isinstance(line_range, int):
-            lines = [lines[line_range - 1]]
-        else:
-            lines = lines[line_range[0] - 1:line_range[1]]
+    index = _line_index(text, field_names, line_range)
+    lines = index.lines
 
     for field_name in field_names:
-        for i, line in enumerate(lines):
-            start_index = line.find(field_name)
-            if start_index != -1:
-                if below and i + below_lines < len(lines):
-                    field_value = lines[i + below_lines].strip()
-                    if skip_empty_lines:
-                        while not field_value and i + below_lines < len(lines):
-                            i += 1
-                            field_value = lines[i + below_lines].strip()
-
-                    if check_next_line_if_empty and not field_value and i + below_lines + 1 < len(lines):
-                        field_value = lines[i + below_lines + 1].strip()
-                else:
-                    field_value = line[start_index + len(field_name):].strip()
-                break
+        for i, start_index in index.occurrences(field_name):
+            if below and i + below_lines < len(lines):
+                field_value = lines[i + below_lines].strip()
+                if skip_empty_lines:
+                    while not field_value and i + below_lines < len(lines):
+                        i += 1
+                        field_value = lines[i + below_lines].strip()
+
+                if check_next_line_if_empty and not field_value and i + below_lines + 1 < len(lines):
+                    field_value = lines[i + below_lines + 1].strip()
+            else:
+                field_value = lines[i][start_index + len(field_name):].strip()
+            break
         else:
             continue
         break
@@ -191,54 +575,53 @@ def extract_field_values(text, field_names, line_range=None, stop_before=None, b
     """
     Extrai múltiplos valores de campos no texto, com suporte para diversos filtros.
     Retorna uma lista com todos os valores encontrados.
+    'text' pode ser o texto do documento ou um LineIndex já montado.
     """
     values = []
-    lines = text.split('\n')
-
-    if line_range:
-        lines = lines[line_range[0] - 1:line_range[1]]
+    index = _line_index(text, field_names, line_range or None)
+    lines = index.lines
 
     for field_name in field_names:
-        for i, line in enumerate(lines):
-            if field_name in line:
-                if below and i + below_lines < len(lines):
-                    value = lines[i + below_lines].strip()
+        for i, _ in index.occurrences(field_name):
+            line = lines[i]
+            if below and i + below_lines < len(lines):
+                value = lines[i + below_lines].strip()
+            else:
+                match = re.search(re.escape(field_name) + r'.*', line, re.IGNORECASE)
+                if match:
+                    value = match.group()[len(field_name):].strip()
                 else:
-                    match = re.search(re.escape(field_name) + r'.*', line, re.IGNORECASE)
-                    if match:
-                        value = match.group()[len(field_name):].strip()
-                    else:
-                        value = None
+                    value = None
 
-                if value:
-                    # Normaliza aspas
-                    value = re.sub(r'[“”″\'"‘’]', '"', value)
-                    if stop_before:
-                        value = value.split(stop_before)[0].strip()
+            if value:
+                # Normaliza aspas
+                value = normalize_quotes(value)
+                if stop_before:
+                    value = value.split(stop_before)[0].strip()
 
-                    if 'PECA' in field_name.upper() or 'PEÇA' in field_name.upper():
-                        value = re.sub(r'-[A-Z] ', '', value).strip()
-                        value = re.sub(r'- [A-Z] ', '', value).strip()
-                        value = value.split('FORMATO')[0].strip()
+                if 'PECA' in field_name.upper() or 'PEÇA' in field_name.upper():
+                    value = re.sub(r'-[A-Z] ', '', value).strip()
+                    value = re.sub(r'- [A-Z] ', '', value).strip()
+                    value = value.split('FORMATO')[0].strip()
 
-                    if 'FORMATO' in field_name.upper():
-                        parts = value.split('-')
-                        if len(parts) > 1:
-                            value = parts[1].strip()
+                if 'FORMATO' in field_name.upper():
+                    parts = value.split('-')
+                    if len(parts) > 1:
+                        value = parts[1].strip()
 
-                    if exclude_pattern:
-                        value = re.sub(exclude_pattern, '', value).strip()
+                if exclude_pattern:
+                    value = re.sub(exclude_pattern, '', value).strip()
 
-                    if after_dash:
-                        parts = value.split('-')
-                        if len(parts) > 1:
-                            value = parts[1].strip()
+                if after_dash:
+                    parts = value.split('-')
+                    if len(parts) > 1:
+                        value = parts[1].strip()
 
-                    # Evitar duplicidades para formato
-                    if 'FORMATO' in field_name.upper() and avoid_duplicates_for_formato and value in values:
-                        continue
+                # Evitar duplicidades para formato
+                if 'FORMATO' in field_name.upper() and avoid_duplicates_for_formato and value in values:
+                    continue
 
-                    values.append(value)
+                values.append(value)
     return values
 
 
@@ -308,34 +691,25 @@ def normalize_razao_social(razao_social):
 def check_format_in_at(at_text, formato_ap):
     """
     Verifica se o formato está presente no corpo de um documento AT.
+    'at_text' pode ser o texto ou um Document.
     """
     if not formato_ap:
         return False
 
-    formato_ap = re.sub(r'[“”″\'"‘’]', '"', formato_ap.strip())
-    at_text_normalized = re.sub(r'[“”″\'"‘’]', '"', at_text)
-    formato_ap = formato_ap.strip('"')
+    at_document = at_text if isinstance(at_text, Document) else Document(at_text)
+    formato_ap = normalize_quotes(formato_ap.strip()).strip('"')
 
     pattern = re.compile(re.escape(formato_ap), re.IGNORECASE)
-    lines = at_text_normalized.split('\n')
-    for i, line in enumerate(lines):
-        if pattern.search(line):
-            return True
-    return False
+    return any(pattern.search(line) for line in at_document.quotes_normalized.split('\n'))
 
 
-def search_format_in_pdf(pdf_path, search_text):
+def search_format_in_pdf(pdf_path, search_text, doc_cache=None, engine=None):
     """
     Procura diretamente o valor de um formato em um PDF, retornando True se encontrado.
     """
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = "\n".join([page.extract_text() for page in pdf.pages])
-
-        normalized_text = re.sub(r'[“”″\'"‘’]', '"', text)
-        normalized_search_text = re.sub(r'[“”″\'"‘’]', '"', search_text)
-
-        if normalized_search_text in normalized_text:
+        document = _engine_document(pdf_path, engine or get_engine('pdfplumber'), doc_cache)
+        if normalize_quotes(search_text) in document.quotes_normalized:
             return True
     except Exception as e:
         logging.error(f"Erro ao procurar formato no PDF {pdf_path}: {e}")
@@ -343,18 +717,13 @@ def search_format_in_pdf(pdf_path, search_text):
     return False
 
 
-def search_peca_in_pdf(pdf_path, peca):
+def search_peca_in_pdf(pdf_path, peca, doc_cache=None, engine=None):
     """
     Procura diretamente o valor de uma peça em um PDF, retornando True se encontrado.
     """
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = "\n".join([page.extract_text() for page in pdf.pages])
-
-        normalized_text = re.sub(r'[“”″\'"‘’]', '"', text)
-        normalized_search_text = re.sub(r'[“”″\'"‘’]', '"', peca)
-
-        if normalized_search_text in normalized_text:
+        document = _engine_document(pdf_path, engine or get_engine('pdfplumber'), doc_cache)
+        if normalize_quotes(peca) in document.quotes_normalized:
             return True
     except Exception as e:
         logging.error(f"Erro ao procurar a peça no PDF {pdf_path}: {e}")
@@ -374,12 +743,34 @@ def extract_cnpj(text):
     return None
 
 
+# Rótulos procurados por extract_fields em cada tipo de documento, localizados numa
+# única varredura pelo LineIndex (rótulos fora desta lista também funcionam, com uma
+# varredura extra)
+FIELD_LABELS = {
+    'OS': [
+        'OS Nº', 'OS N°', 'OS N', 'DATA DE INICIO:', 'DATA DE INÍCIO', 'DATA DE INÍCIO:',
+        'TITULO DA OS:', 'TÍTULO DA OS', 'TÍTULO DA OS:', 'ORGAO', 'ÓRGÃO',
+        'Nº DO PROCESSO DE SELEÇÃO INTERNA:', 'TIPO DA CAMPANHA',
+    ],
+    'AP': [
+        'OS N°', 'OS Nº', 'OSNº', 'DATA EMISSAO', 'DATA EMISSÃO', 'DATAEMISSÃO', 'DATA  EMISSÃO:',
+        'CAMPANHA:', 'PRODUTO:', 'AUT.CLIENTE:', 'AT DE PRODUCAO:', 'AT DE PRODUÇÃO:', 'AT DE PRODUCAO',
+        'AT DE PRODUÇÃO', 'ATDEPRODUÇÃO', "AT'SDEPRODUÇÃO", "AT'S DE PRODUÇÃO", 'Cnpj: ', 'CNPJ:',
+        'PEÇA', 'PECA', 'FORMATO',
+    ],
+    'AT': ['AT ', 'TITULO: ', 'TÍTULO:', 'Título:', 'FORMATO:', 'Formato', 'Data:', 'DATA:'],
+    'SICAF': ['Razao Social:', 'Razão Social:', 'CNPJ: ', 'CNPJ:', 'Municipio: ', 'Munícipio:'],
+}
+
+
 def extract_fields(document_text, document_type):
     """
     Extrai campos importantes de acordo com o tipo de documento (OS, AP, AT ou SICAF).
+    O texto é indexado uma única vez (LineIndex) e todos os campos são lidos do índice.
     """
     fields = {}
-    lines = document_text.split('\n')
+    index = LineIndex(document_text, FIELD_LABELS.get(document_type, ()))
+    lines = index.lines
     try:
         if document_type == 'OS':
             os_type = determine_os_type(document_text)
@@ -388,14 +779,14 @@ def extract_fields(document_text, document_type):
             if os_type == 'OS1':
                 # Extração para OS1
                 fields.update({
-                    'OS N°': extract_field_value(document_text, ['OS Nº', 'OS N°'], only_numbers=True),
-                    'DATA DE INICIO': extract_field_value(document_text, ['DATA DE INICIO:', 'DATA DE INÍCIO'],
+                    'OS N°': extract_field_value(index, ['OS Nº', 'OS N°'], only_numbers=True),
+                    'DATA DE INICIO': extract_field_value(index, ['DATA DE INICIO:', 'DATA DE INÍCIO'],
                                                           below=True, date_only=True),
-                    'TITULO DA OS': extract_field_value(document_text, ['TITULO DA OS:', 'TÍTULO DA OS'],
+                    'TITULO DA OS': extract_field_value(index, ['TITULO DA OS:', 'TÍTULO DA OS'],
                                                         below=True, check_next_line_if_empty=True),
-                    'ORGAO': extract_field_value(document_text, ['ORGAO', 'ÓRGÃO'], below=True,
+                    'ORGAO': extract_field_value(index, ['ORGAO', 'ÓRGÃO'], below=True,
                                                  exclude_pattern=r'\d{2}/\d{2}/\d{4}', after_dash=True),
-                    'TIPO DA CAMPANHA': extract_field_value(document_text,
+                    'TIPO DA CAMPANHA': extract_field_value(index,
                                                             ['Nº DO PROCESSO DE SELEÇÃO INTERNA:'],
                                                             below=True,
                                                             stop_before=' N° ',
@@ -404,30 +795,30 @@ def extract_fields(document_text, document_type):
             else:
                 # Extração para OS2
                 fields.update({
-                    'OS N°': extract_field_value(document_text, ['OS N', 'OS N°'], below=True, only_numbers=True),
-                    'DATA DE INICIO': extract_field_value(document_text, ['DATA DE INÍCIO:'], below=True,
+                    'OS N°': extract_field_value(index, ['OS N', 'OS N°'], below=True, only_numbers=True),
+                    'DATA DE INICIO': extract_field_value(index, ['DATA DE INÍCIO:'], below=True,
                                                           date_only=True),
-                    'TITULO DA OS': extract_field_value(document_text, ['TÍTULO DA OS:'], below=True,
+                    'TITULO DA OS': extract_field_value(index, ['TÍTULO DA OS:'], below=True,
                                                         check_next_line_if_empty=True),
-                    'ORGAO': extract_field_value(document_text, ['ÓRGÃO'], below=True,
+                    'ORGAO': extract_field_value(index, ['ÓRGÃO'], below=True,
                                                  exclude_pattern=r'\d{2}/\d{2}/\d{4}', after_dash=True),
-                    'TIPO DA CAMPANHA': extract_field_value(document_text, ['TIPO DA CAMPANHA'], below=True,
+                    'TIPO DA CAMPANHA': extract_field_value(index, ['TIPO DA CAMPANHA'], below=True,
                                                             exclude_numbers=True)
                 })
 
         elif document_type == 'AP':
             # Extração para o AP
             fields.update({
-                'OS N°': extract_field_value(document_text, ['OS N°', 'OS Nº', 'OSNº'],
+                'OS N°': extract_field_value(index, ['OS N°', 'OS Nº', 'OSNº'],
                                              stop_before='VALOR', only_numbers=True),
-                'DATA EMISSAO': extract_field_value(document_text,
+                'DATA EMISSAO': extract_field_value(index,
                                                     ['DATA EMISSAO', 'DATA EMISSÃO', 'DATAEMISSÃO', 'DATA  EMISSÃO:'],
                                                     date_only=True),
-                'CAMPANHA': extract_field_value(document_text, ['CAMPANHA:'],
+                'CAMPANHA': extract_field_value(index, ['CAMPANHA:'],
                                                 stop_before=['AUT.', 'MEIO:']),
-                'PRODUTO': extract_field_value(document_text, ['PRODUTO:'], stop_before=' '),
-                'AUT.CLIENTE': extract_field_value(document_text, ['AUT.CLIENTE:'], check_next_line_if_empty=True),
-                'AT DE PRODUCAO': extract_field_value(document_text,
+                'PRODUTO': extract_field_value(index, ['PRODUTO:'], stop_before=' '),
+                'AUT.CLIENTE': extract_field_value(index, ['AUT.CLIENTE:'], check_next_line_if_empty=True),
+                'AT DE PRODUCAO': extract_field_value(index,
                                                       ['AT DE PRODUCAO:', 'AT DE PRODUÇÃO:', 'AT DE PRODUCAO',
                                                        'AT DE PRODUÇÃO', 'ATDEPRODUÇÃO', "AT'SDEPRODUÇÃO",
                                                        "AT'S DE PRODUÇÃO"],
@@ -437,7 +828,7 @@ def extract_fields(document_text, document_type):
             })
 
             # Ajuste de CNPJ, ignorando 16.088.593
-            cnpj_value = extract_field_value(document_text, ['Cnpj: ', 'CNPJ:'])
+            cnpj_value = extract_field_value(index, ['Cnpj: ', 'CNPJ:'])
             if cnpj_value and "16.088.593" in cnpj_value:
                 cnpj_pattern = re.compile(r'\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}')
                 for line in lines:
@@ -448,11 +839,7 @@ def extract_fields(document_text, document_type):
             fields['CNPJ'] = cnpj_value
 
             # Busca índice da linha do CNPJ para extrair Razão Social e Município
-            cnpj_line_index = None
-            for i, line in enumerate(lines):
-                if cnpj_value and cnpj_value in line:
-                    cnpj_line_index = i
-                    break
+            cnpj_line_index = index.line_of(cnpj_value) if cnpj_value else None
 
             if cnpj_line_index is not None:
                 # Razão Social (uma linha acima não vazia)
@@ -476,27 +863,27 @@ def extract_fields(document_text, document_type):
                     fields['Município'] = ""
 
             # Extração dos campos de PEÇAS
-            pecas = extract_field_values(document_text, ['PEÇA', 'PECA'], stop_before='FORMATO', after_dash=True)
+            pecas = extract_field_values(index, ['PEÇA', 'PECA'], stop_before='FORMATO', after_dash=True)
             for i, peca in enumerate(pecas):
                 fields[f'PECA{i + 1}'] = peca
 
             # Extração dos campos de FORMATO
-            formatos = extract_field_values(document_text, ['FORMATO'])
+            formatos = extract_field_values(index, ['FORMATO'])
             for i, formato in enumerate(formatos):
                 fields[f'FORMATO{i + 1}'] = formato.strip().strip(':').replace(' ', '')
 
         elif document_type == 'AT':
             # Extração para AT
             fields.update({
-                'AT': extract_field_value(document_text, ['AT '], stop_before='DATA'),
-                'TITULO': extract_field_value(document_text, ['TITULO: ', 'TÍTULO:', 'Título:'],
+                'AT': extract_field_value(index, ['AT '], stop_before='DATA'),
+                'TITULO': extract_field_value(index, ['TITULO: ', 'TÍTULO:', 'Título:'],
                                               stop_before=['Cores', 'CORES'])
             })
-            formatos = extract_field_values(document_text, ['FORMATO:', 'Formato'])
+            formatos = extract_field_values(index, ['FORMATO:', 'Formato'])
             for i, formato in enumerate(formatos):
                 fields[f'FORMATO{i + 1}'] = formato
             fields.update({
-                'Data da AT': extract_field_value(document_text, ['Data:', 'DATA:'], date_only=True)
+                'Data da AT': extract_field_value(index, ['Data:', 'DATA:'], date_only=True)
             })
 
         elif document_type == 'SICAF':
@@ -505,9 +892,9 @@ def extract_fields(document_text, document_type):
             fields['SICAF_TYPE'] = sicaf_type
             if sicaf_type == 'SICAF1':
                 fields.update({
-                    'Razão social': extract_field_value(document_text, ['Razao Social:', 'Razão Social:']),
-                    'CNPJ': extract_field_value(document_text, ['CNPJ: ', 'CNPJ:'], stop_before='Data'),
-                    'Município': extract_field_value(document_text, ['Municipio: ', 'Munícipio:'],
+                    'Razão social': extract_field_value(index, ['Razao Social:', 'Razão Social:']),
+                    'CNPJ': extract_field_value(index, ['CNPJ: ', 'CNPJ:'], stop_before='Data'),
+                    'Município': extract_field_value(index, ['Municipio: ', 'Munícipio:'],
                                                      stop_before=' N°')
                 })
             else:
@@ -519,6 +906,110 @@ def extract_fields(document_text, document_type):
     return fields
 
 
+def extract_document_fields(pdf_path, document_text, document_type, extractor, doc_cache=None):
+    """
+    Executa extract_fields para o PDF, reaproveitando o resultado do cache quando disponível.
+    'extractor' identifica o extrator que gerou 'document_text' (faz parte da chave do cache).
+    Retorna sempre uma cópia, para que o chamador possa alterá-la livremente.
+    """
+    def build():
+        with stage('fields'):
+            return extract_fields(document_text, document_type)
+
+    fields = _cached(doc_cache, pdf_path, f'fields_{document_type}_{extractor}', build,
+                     f"fields-v{FIELDS_VERSION}/{document_type}/{extractor}")
+    return dict(fields)
+
+
+# Valores esperados dos campos de cada tipo de documento (regex buscada no valor).
+# A extração adaptativa só aceita o texto de um motor se todos os campos obrigatórios
+# forem encontrados com valores plausíveis; campos terminados em '*' (PECA1, PECA2...)
+# são opcionais, mas os encontrados também são validados.
+_DATE_VALUE = r'\d{2}/\d{2}/\d{4}'
+_TEXT_VALUE = r'^(?!.*:$).*\w'  # Algum conteúdo que não seja outro rótulo (ex.: 'PÚBLICO ALVO:')
+_CNPJ_VALUE = r'\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}'
+FIELD_EXPECTATIONS = {
+    'OS': {
+        'OS N°': r'^\d+$', 'DATA DE INICIO': _DATE_VALUE, 'TITULO DA OS': _TEXT_VALUE,
+        'ORGAO': _TEXT_VALUE, 'TIPO DA CAMPANHA': _TEXT_VALUE,
+    },
+    'AP': {
+        'OS N°': r'^\d+$', 'DATA EMISSAO': _DATE_VALUE, 'CAMPANHA': _TEXT_VALUE, 'PRODUTO': _TEXT_VALUE,
+        'AUT.CLIENTE': _TEXT_VALUE, 'CNPJ': _CNPJ_VALUE, 'PECA*': r'\w.', 'FORMATO*': r'\w',
+    },
+    'AT': {'AT': r'^\d+$', 'TITULO': _TEXT_VALUE, 'FORMATO*': r'\w', 'Data da AT': _DATE_VALUE},
+    'SICAF': {'Razão social': _TEXT_VALUE, 'CNPJ': _CNPJ_VALUE, 'Município': _TEXT_VALUE},
+}
+
+
+def fields_look_valid(fields, document_type):
+    """
+    Indica se os campos extraídos têm os valores esperados para o tipo de documento
+    (ver FIELD_EXPECTATIONS).
+    """
+    for field, pattern in FIELD_EXPECTATIONS.get(document_type, {}).items():
+        if field.endswith('*'):
+            values = [value for key, value in fields.items() if key.startswith(field[:-1])]
+        else:
+            values = [fields.get(field)]
+        if not all(isinstance(value, str) and re.search(pattern, value.strip()) for value in values):
+            return False
+    return True
+
+
+def _document_text(pdf_path, document_type, doc_cache, engine):
+    """
+    Texto usado na extração dos campos do tipo de documento e identificação do extrator.
+    """
+    if document_type == 'OS':
+        return extract_header_text(pdf_path, 'OS1', doc_cache, engine), f"{engine.key}/head"
+    if document_type == 'SICAF':
+        return extract_header_text(pdf_path, 'SICAF1', doc_cache, engine), f"{engine.key}/head"
+    return extract_text_with_format_adjustment(pdf_path, doc_cache, engine), f"{engine.key}/adjusted"
+
+
+def extract_document(pdf_path, document_type, doc_cache=None):
+    """
+    Extrai texto e campos do documento (OS, AP, AT ou SICAF do tipo SICAF1) com os motores
+    de engine_chain(document_type): no modo adaptativo, o primeiro motor cujos campos
+    passam em fields_look_valid é o usado; se nenhum passar, vale o motor padrão do tipo.
+    O motor escolhido fica no cache do job (ver document_engine).
+    Retorna (texto, campos, motor).
+    """
+    def choose():
+        chain = engine_chain(document_type)
+        for engine in chain:
+            if len(chain) == 1:
+                return engine.name
+            try:
+                text, extractor = _document_text(pdf_path, document_type, doc_cache, engine)
+                fields = extract_document_fields(pdf_path, text, document_type, extractor, doc_cache)
+            except Exception as e:
+                logging.error(f"Erro ao extrair {document_type} {pdf_path} com {engine.name}: {e}")
+                continue
+            if fields_look_valid(fields, document_type):
+                if engine is not chain[0]:
+                    logging.info(f"Extração adaptativa: {document_type} {os.path.basename(pdf_path)} "
+                                 f"precisou de {engine.name}")
+                return engine.name
+        logging.info(f"Extração adaptativa: nenhum motor validou {document_type} {os.path.basename(pdf_path)}")
+        return engine_for(document_type).name
+
+    with stage(f'doc:{document_type}'):
+        engine = get_engine(_cached(doc_cache, pdf_path, f'engine_{document_type}', choose))
+        text, extractor = _document_text(pdf_path, document_type, doc_cache, engine)
+        fields = extract_document_fields(pdf_path, text, document_type, extractor, doc_cache)
+    return text, fields, engine
+
+
+def document_engine(pdf_path, document_type, doc_cache=None):
+    """
+    Motor escolhido por extract_document para o PDF (ou o motor padrão do tipo).
+    """
+    name = doc_cache.peek(pdf_path, f'engine_{document_type}') if doc_cache is not None else None
+    return get_engine(name) if name else engine_for(document_type)
+
+
 def check_razao_social_in_ap(ap_text, razao_social):
     """
     Verifica se a Razão Social do SICAF está presente no AP, especificamente nas linhas 21 ou 22.
@@ -548,15 +1039,17 @@ def check_municipio_in_ap(ap_text, municipio):
 def check_peca_in_at(at_text, peca):
     """
     Verifica se a peça (string) está presente no texto de um documento AT.
+    'at_text' pode ser o texto ou um Document.
     """
     if not peca:
         return False
 
-    peca_normalized = re.sub(r'[“”″\'"‘’]', '"', peca.strip())
-    at_text_normalized = re.sub(r'[“”″\'"‘’]', '"', at_text)
-
-    peca_normalized = re.sub(r'\s+', ' ', peca_normalized)
-    at_text_normalized = re.sub(r'\s+', ' ', at_text_normalized)
+    peca_normalized = _WHITESPACE_RUN.sub(' ', normalize_quotes(peca.strip()))
+    if isinstance(at_text, Document):
+        at_text_normalized = at_text.whitespace_collapsed
+    else:
+        # Texto avulso: normaliza direto, sem criar um Document que seria descartado a cada chamada
+        at_text_normalized = _WHITESPACE_RUN.sub(' ', normalize_quotes(at_text))
 
     if peca_normalized in at_text_normalized:
         return True
@@ -568,6 +1061,129 @@ def check_peca_in_at(at_text, peca):
     return True
 
 
+# Status de cada check (texto exibido no relatório)
+OK = 'OK'
+NON_CONFORMITY = 'Non-conformity'
+ERROR = 'Error'
+
+# Campos do formulário de verificação (cada check pertence a um deles, exceto o de peças)
+CHECK_FIELDS = [
+    'OS N°',
+    'DATAS',
+    'TITULO DA OS/CAMPANHA',
+    'ORGAO/PRODUTO',
+    'TIPO DA CAMPANHA/AUT.CLIENTE',
+    'AT /AT DE PRODUCAO',
+    'AT FORMATO/FORMATO',
+    'DATA EMISSAO/Data da AT',
+    'Razão social',
+    'CNPJ',
+    'Município',
+]
+
+
+# Documento necessário para cada campo de verificação (o AP participa de todos os checks
+# e é sempre extraído; os checks de peças dependem dos ATs)
+CHECK_DOCUMENTS = {
+    'OS N°': 'OS',
+    'DATAS': 'OS',
+    'TITULO DA OS/CAMPANHA': 'OS',
+    'ORGAO/PRODUTO': 'OS',
+    'TIPO DA CAMPANHA/AUT.CLIENTE': 'OS',
+    'AT /AT DE PRODUCAO': 'AT',
+    'AT FORMATO/FORMATO': 'AT',
+    'DATA EMISSAO/Data da AT': 'AT',
+    'Razão social': 'SICAF',
+    'CNPJ': 'SICAF',
+    'Município': 'SICAF',
+}
+
+
+class ExtractionPlan:
+    """
+    Documentos a extrair conforme os campos selecionados no formulário:
+    - Sem seleção, todos os documentos (e todos os checks).
+    - O AP é sempre extraído; OS, ATs e SICAF apenas se algum campo selecionado depender deles.
+    Sem ATs no plano, os checks de peças (2.2) também não são executados.
+    """
+
+    def __init__(self, fields_to_verify=None):
+        fields = fields_to_verify or CHECK_FIELDS
+        self.documents = {'AP'} | {CHECK_DOCUMENTS[field] for field in fields if field in CHECK_DOCUMENTS}
+
+    def needs(self, document_type):
+        return document_type in self.documents
+
+    def __repr__(self):
+        return f"ExtractionPlan({sorted(self.documents)})"
+
+
+class CheckResult:
+    """
+    Resultado de um check: id ('1.1', '2.1.3'...), campo do formulário ao qual pertence
+    (None para o check de peças), rótulo exibido, status (OK, NON_CONFORMITY ou ERROR) e detalhe.
+    """
+    __slots__ = ('check_id', 'field', 'label', 'status', 'detail')
+
+    def __init__(self, check_id, field, label, status, detail=''):
+        self.check_id = check_id
+        self.field = field
+        self.label = label
+        self.status = status
+        self.detail = detail
+
+    @property
+    def text(self):
+        """
+        Texto do check no relatório, ex.: 'CHECK 1.1: OK - OS N° 123'.
+        """
+        text = f"CHECK {self.check_id}: {self.status}"
+        if self.detail:
+            text += f" - {self.detail}"
+        return text
+
+    @property
+    def css_class(self):
+        if self.status == OK:
+            return 'ok'
+        if self.status == NON_CONFORMITY:
+            return 'non-conformity'
+        return ''
+
+    def __repr__(self):
+        return f"CheckResult({self.check_id!r}, {self.field!r}, {self.status!r})"
+
+
+class CheckReport:
+    """
+    Resultado de check_fields: campos extraídos de cada documento, a lista de checks
+    e o motor de extração usado em cada documento.
+    """
+
+    def __init__(self, os_fields, ap_fields, at_fields_list, sicaf_fields):
+        self.os_fields = os_fields
+        self.ap_fields = ap_fields
+        self.at_fields_list = at_fields_list
+        self.sicaf_fields = sicaf_fields
+        self.checks = []
+        # Motor de extração usado em cada documento (ex.: {'OS': 'pymupdf'})
+        self.engines = {}
+
+    def add(self, check_id, field, label, status, detail=''):
+        self.checks.append(CheckResult(check_id, field, label, status, detail))
+
+    def field_statuses(self):
+        """
+        Status de cada campo do formulário: 'OK' se o campo tem checks e todos estão OK,
+        senão 'NC'.
+        """
+        statuses = {}
+        for field in CHECK_FIELDS:
+            checks = [check for check in self.checks if check.field == field]
+            statuses[field] = 'OK' if checks and all(check.status == OK for check in checks) else 'NC'
+        return statuses
+
+
 def determine_overall_status(field_statuses, required_pieces, found_pieces, fields_to_verify=None):
     """
     Determina o status geral do processo (OK ou NC) com base nos campos checados e nas peças encontradas.
@@ -597,10 +1213,32 @@ def determine_overall_status(field_statuses, required_pieces, found_pieces, fiel
     return overall_status, status_class
 
 
+def _fields_html(title, fields):
+    """
+    Bloco HTML com os campos extraídos de um documento.
+    """
+    html = '<div class="document-section">'
+    html += f'<h3>{escape(title)}</h3>'
+    html += '<ul>'
+    for key, value in fields.items():
+        if key == 'FILE_NAME':
+            continue
+        if isinstance(value, list):
+            value_str = ', '.join([escape(str(v)) for v in value])
+            html += f'<li><strong>{escape(key)}:</strong> {value_str}</li>'
+        else:
+            html += f'<li><strong>{escape(key)}:</strong> {escape(str(value))}</li>'
+    html += '</ul>'
+    html += '</div>'
+    return html
+
+
 def generate_html_report(report, subfolder_name, overall_status, status_class, fields_to_verify=None):
     """
-    Gera o relatório HTML final com base em um relatório de texto,
+    Gera o relatório HTML final com base no CheckReport (campos extraídos e checks),
     nome da subpasta, status geral do processo e classe CSS de status.
+    Com 'fields_to_verify', só são exibidos os checks dos campos selecionados
+    (os checks de peças, sem campo no formulário, são sempre exibidos).
     """
     html_report = f"""
     <div class="report {status_class}">
@@ -608,124 +1246,35 @@ def generate_html_report(report, subfolder_name, overall_status, status_class, f
         <div class="document-sections-container">
     """
 
-    lines = report.split('\n')
-    index = 0
-    while index < len(lines):
-        line = lines[index].strip()
-
-        # ---------------- OS ----------------
-        if line.startswith('- OS:'):
-            os_data_str = line[len('- OS:'):].strip()
-            try:
-                os_data = ast.literal_eval(os_data_str)
-                html_report += '<div class="document-section">'
-                html_report += '<h3>OS</h3>'
-                html_report += '<ul>'
-                for key, value in os_data.items():
-                    if isinstance(value, list):
-                        value_str = ', '.join([escape(str(v)) for v in value])
-                        html_report += f'<li><strong>{escape(key)}:</strong> {value_str}</li>'
-                    else:
-                        html_report += f'<li><strong>{escape(key)}:</strong> {escape(str(value))}</li>'
-                html_report += '</ul>'
-                html_report += '</div>'
-            except Exception as e:
-                html_report += f'<p>Erro ao processar dados da OS: {e}</p>'
-
-        # ---------------- AP ----------------
-        elif line.startswith('- AP:'):
-            ap_data_str = line[len('- AP:'):].strip()
-            try:
-                ap_data = ast.literal_eval(ap_data_str)
-                html_report += '<div class="document-section">'
-                html_report += '<h3>AP</h3>'
-                html_report += '<ul>'
-                for key, value in ap_data.items():
-                    if isinstance(value, list):
-                        value_str = ', '.join([escape(str(v)) for v in value])
-                        html_report += f'<li><strong>{escape(key)}:</strong> {value_str}</li>'
-                    else:
-                        html_report += f'<li><strong>{escape(key)}:</strong> {escape(str(value))}</li>'
-                html_report += '</ul>'
-                html_report += '</div>'
-            except Exception as e:
-                html_report += f'<p>Erro ao processar dados da AP: {e}</p>'
-
-        # ---------------- AT ----------------
-        elif line.startswith('- AT ('):
-            at_match = re.match(r'- AT \((.*?)\): (.*)', line)
-            if at_match:
-                at_file_name = at_match.group(1)
-                at_data_str = at_match.group(2).strip()
-                try:
-                    at_data = ast.literal_eval(at_data_str)
-                    html_report += '<div class="document-section">'
-                    html_report += f'<h3>AT ({escape(at_file_name)})</h3>'
-                    html_report += '<ul>'
-                    for key, value in at_data.items():
-                        if key != 'FILE_NAME':
-                            if isinstance(value, list):
-                                value_str = ', '.join([escape(str(v)) for v in value])
-                                html_report += f'<li><strong>{escape(key)}:</strong> {value_str}</li>'
-                            else:
-                                html_report += f'<li><strong>{escape(key)}:</strong> {escape(str(value))}</li>'
-                    html_report += '</ul>'
-                    html_report += '</div>'
-                except Exception as e:
-                    html_report += f'<p>Erro ao processar dados do AT: {e}</p>'
-            else:
-                html_report += f"<p>{escape(line)}</p>"
-
-        elif line.startswith('- AT: Nenhum arquivo AT encontrado.'):
-            html_report += f"<p>{escape(line)}</p>"
-
-        # ---------------- SICAF ----------------
-        elif line.startswith('- SICAF:'):
-            sicaf_data_str = line[len('- SICAF:'):].strip()
-            try:
-                sicaf_data = ast.literal_eval(sicaf_data_str)
-                html_report += '<div class="document-section">'
-                html_report += '<h3>SICAF</h3>'
-                html_report += '<ul>'
-                for key, value in sicaf_data.items():
-                    if isinstance(value, list):
-                        value_str = ', '.join([escape(str(v)) for v in value])
-                        html_report += f'<li><strong>{escape(key)}:</strong> {value_str}</li>'
-                    else:
-                        html_report += f'<li><strong>{escape(key)}:</strong> {escape(str(value))}</li>'
-                html_report += '</ul>'
-                html_report += '</div>'
-            except Exception as e:
-                html_report += f'<p>Erro ao processar dados do SICAF: {e}</p>'
-        else:
-            pass
-
-        index += 1
+    # Documentos fora do plano de extração (None) não são exibidos
+    if report.os_fields is not None:
+        html_report += _fields_html('OS', report.os_fields)
+    html_report += _fields_html('AP', report.ap_fields)
+    if report.at_fields_list:
+        for index, at_fields in enumerate(report.at_fields_list):
+            at_file_name = at_fields.get('FILE_NAME', f"- AT {index + 1}")
+            html_report += _fields_html(f'AT ({at_file_name})', at_fields)
+    elif report.at_fields_list is not None:
+        html_report += "<p>- AT: Nenhum arquivo AT encontrado.</p>"
+    if report.sicaf_fields is not None:
+        html_report += _fields_html('SICAF', report.sicaf_fields)
 
     html_report += '</div>'  # Fecha .document-sections-container
 
-    # Processa as linhas de CHECK
-    for line in lines:
-        line = line.strip()
-        if 'CHECK' in line:
-            idx = line.find('CHECK')
-            field = escape(line[:idx].strip())
-            if fields_to_verify and field not in fields_to_verify:
-                continue
-            value = escape(line[idx:].strip())
+    if report.engines:
+        engines_str = ', '.join(f"{escape(document)}: {escape(engine)}"
+                                for document, engine in report.engines.items())
+        html_report += f'<p class="extraction-engines">Extração: {engines_str}</p>'
 
-            # Determina classe CSS baseada no resultado
-            if 'OK' in value:
-                result_class = 'ok'
-            elif 'Non-conformity' in value:
-                result_class = 'non-conformity'
-            else:
-                result_class = ''
+    # Linhas de CHECK
+    for check in report.checks:
+        if fields_to_verify and check.field is not None and check.field not in fields_to_verify:
+            continue
 
-            html_report += f"""
+        html_report += f"""
             <div class="check-row">
-                <div class="field">{field}</div>
-                <div class="value {result_class}">{value}</div>
+                <div class="field">{escape(check.label)}</div>
+                <div class="value {check.css_class}">{escape(check.text)}</div>
             </div>
             """
 
@@ -757,18 +1306,15 @@ def save_ap_text(ap_text):
         file.write(ap_text)
 
 
-def search_text_in_pdf(pdf_path, search_text):
+def search_text_in_pdf(pdf_path, search_text, doc_cache=None, engine=None):
     """
     Procura o texto no PDF e retorna o resultado concatenado das ocorrências (exemplo simples).
     Se o texto existir sem espaços, retorna a própria string procurada.
     """
     concatenated_result = ""
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = "\n".join([page.extract_text() for page in pdf.pages])
-        normalized_text = re.sub(r'\s+', '', text.lower())
-        normalized_search_text = re.sub(r'\s+', '', search_text.lower())
-        if normalized_search_text in normalized_text:
+        document = _engine_document(pdf_path, engine or get_engine('pdfplumber'), doc_cache)
+        if remove_whitespace(search_text.lower()) in document.no_spaces_lower:
             concatenated_result = search_text
     except Exception as e:
         logging.error(f"Erro ao procurar texto no PDF {pdf_path}: {e}")
@@ -776,270 +1322,268 @@ def search_text_in_pdf(pdf_path, search_text):
 
 
 def check_fields(os_fields, ap_fields, at_fields_list, sicaf_fields,
-                 sicaf_pdf_path, at_files, missing_at_numbers, found_pieces):
+                 sicaf_pdf_path, at_files, missing_at_numbers, found_pieces, doc_cache=None, at_index=None,
+                 plan=None):
     """
     Função principal de verificação e comparação de campos extraídos de OS, AP, AT e SICAF.
-    Gera um relatório (em texto) com base nos checks realizados.
+    Retorna um CheckReport com os campos extraídos e o resultado de cada check.
+    'at_index' (ATTextIndex, opcional) responde as buscas de peças e formatos nos ATs indexados.
+    'plan' (ExtractionPlan, opcional) indica quais grupos de checks executar; os documentos
+    fora do plano não são extraídos e chegam como None.
     """
-    report = [
-        "Transcrição das informações extraídas:",
-        f"- OS: {os_fields}",
-        f"- AP: {ap_fields}"
-    ]
+    if plan is None:
+        plan = ExtractionPlan()
 
-    if not os_fields or not ap_fields or not sicaf_fields:
+    if (not ap_fields or (plan.needs('OS') and not os_fields)
+            or (plan.needs('SICAF') and not sicaf_fields)):
         error_message = "Erro ao extrair campos dos documentos."
         logging.error(error_message)
-        return "", error_message
-
-    if at_fields_list:
-        for at_fields in at_fields_list:
-            at_file_name = at_fields.get('FILE_NAME', f"- AT {at_fields_list.index(at_fields) + 1}")
-            report.append(f"- AT ({at_file_name}): {at_fields}")
-    else:
-        report.append("- AT: Nenhum arquivo AT encontrado.")
+        return None, error_message
 
-    report.append(f"- SICAF: {sicaf_fields}")
+    report = CheckReport(os_fields, ap_fields, at_fields_list, sicaf_fields)
 
     # -------------------------
     # CHECK 1 - Verificações comuns (OS x AP)
     # -------------------------
-    try:
-        # 1.1 OS N° vs AP OS N°
-        if os_fields.get('OS N°') == ap_fields.get('OS N°'):
-            report.append(f"OS N°                                   CHECK 1.1: OK - OS N° {os_fields.get('OS N°')}")
-        else:
-            report.append(f"OS N°                                   CHECK 1.1: Non-conformity - OS N° {ap_fields.get('OS N°')}")
-
-        # 1.2 Data de início (OS) vs Data de emissão (AP)
-        os_data_inicio = os_fields.get('DATA DE INICIO')
-        ap_data_emissao = ap_fields.get('DATA EMISSAO')
-        if os_data_inicio and ap_data_emissao:
-            os_data_inicio_dt = datetime.strptime(os_data_inicio, '%d/%m/%Y')
-            ap_data_emissao_dt = datetime.strptime(ap_data_emissao, '%d/%m/%Y')
-            if ap_data_emissao_dt > os_data_inicio_dt:
-                report.append("DATAS                                   CHECK 1.2: OK")
+    if plan.needs('OS'):
+        try:
+            # 1.1 OS N° vs AP OS N°
+            if os_fields.get('OS N°') == ap_fields.get('OS N°'):
+                report.add('1.1', 'OS N°', 'OS N°', OK, f"OS N° {os_fields.get('OS N°')}")
             else:
-                report.append("DATAS                                   CHECK 1.2: Non-conformity")
-        else:
-            report.append("DATAS                                   CHECK 1.2: Non-conformity")
-    except Exception as e:
-        report.append(f"DATAS                                   CHECK 1.2: Error {e}")
-
-    # 1.3 TÍTULO DA OS vs CAMPANHA
-    if os_fields.get('TITULO DA OS') == ap_fields.get('CAMPANHA'):
-        report.append("TITULO DA OS/CAMPANHA                   CHECK 1.3: OK")
-    else:
-        report.append("TITULO DA OS/CAMPANHA                   CHECK 1.3: Non-conformity")
+                report.add('1.1', 'OS N°', 'OS N°', NON_CONFORMITY, f"OS N° {ap_fields.get('OS N°')}")
+
+            # 1.2 Data de início (OS) vs Data de emissão (AP)
+            os_data_inicio = os_fields.get('DATA DE INICIO')
+            ap_data_emissao = ap_fields.get('DATA EMISSAO')
+            if os_data_inicio and ap_data_emissao:
+                os_data_inicio_dt = datetime.strptime(os_data_inicio, '%d/%m/%Y')
+                ap_data_emissao_dt = datetime.strptime(ap_data_emissao, '%d/%m/%Y')
+                if ap_data_emissao_dt > os_data_inicio_dt:
+                    report.add('1.2', 'DATAS', 'DATAS', OK)
+                else:
+                    report.add('1.2', 'DATAS', 'DATAS', NON_CONFORMITY)
+            else:
+                report.add('1.2', 'DATAS', 'DATAS', NON_CONFORMITY)
+        except Exception as e:
+            report.add('1.2', 'DATAS', 'DATAS', ERROR, str(e))
 
-    # 1.4 ORGAO vs PRODUTO
-    orgao = os_fields.get('ORGAO', '')
-    produto = ap_fields.get('PRODUTO', '')
-    if orgao and produto and orgao == produto:
-        report.append("ORGAO/PRODUTO                           CHECK 1.4: OK")
-    else:
-        report.append("CHECK 1.4: Non-conformity")
+        # 1.3 TÍTULO DA OS vs CAMPANHA
+        if os_fields.get('TITULO DA OS') == ap_fields.get('CAMPANHA'):
+            report.add('1.3', 'TITULO DA OS/CAMPANHA', 'TITULO DA OS/CAMPANHA', OK)
+        else:
+            report.add('1.3', 'TITULO DA OS/CAMPANHA', 'TITULO DA OS/CAMPANHA', NON_CONFORMITY)
 
-    # 1.5 TIPO DA CAMPANHA vs AUT.CLIENTE
-    if os_fields.get('TIPO DA CAMPANHA') == ap_fields.get('AUT.CLIENTE'):
-        report.append("TIPO DA CAMPANHA/AUT.CLIENTE            CHECK 1.5: OK")
-    else:
-        report.append("TIPO DA CAMPANHA/AUT.CLIENTE            CHECK 1.5: Non-conformity")
-   # ------------------------- CHECK 2 - Verificação de ATs (AP vs AT) -------------------------
+        # 1.4 ORGAO vs PRODUTO
+        orgao = os_fields.get('ORGAO', '')
+        produto = ap_fields.get('PRODUTO', '')
+        if orgao and produto and orgao == produto:
+            report.add('1.4', 'ORGAO/PRODUTO', 'ORGAO/PRODUTO', OK)
+        else:
+            report.add('1.4', 'ORGAO/PRODUTO', 'ORGAO/PRODUTO', NON_CONFORMITY)
 
-    # 1) Identificar peças do AP
-    required_pieces = []
-    for key, value in ap_fields.items():
-        if key.startswith('PECA') and value:
-            required_pieces.append(value.strip())
-
-    # 2) Dicionário p/ dizer em quais ATs cada peça foi encontrada
-    found_in_at = {}
-    for p in required_pieces:
-        found_in_at[p] = set()
-
-    # 3) ATs declarados no AP
-    ap_value_list = ap_fields.get('AT DE PRODUCAO', [])
-    if ap_value_list is None:
-        ap_value_list = []
-    if isinstance(ap_value_list, str):
-        ap_value_list = [ap_value_list.strip()]
-    else:
-        ap_value_list = [str(item).strip() for item in ap_value_list]
+        # 1.5 TIPO DA CAMPANHA vs AUT.CLIENTE
+        if os_fields.get('TIPO DA CAMPANHA') == ap_fields.get('AUT.CLIENTE'):
+            report.add('1.5', 'TIPO DA CAMPANHA/AUT.CLIENTE', 'TIPO DA CAMPANHA/AUT.CLIENTE', OK)
+        else:
+            report.add('1.5', 'TIPO DA CAMPANHA/AUT.CLIENTE', 'TIPO DA CAMPANHA/AUT.CLIENTE', NON_CONFORMITY)
 
-    # 4) Vamos também montar os formatos do AP (para checar 1x por AT)
-    formatos_ap = [
-        ap_fields.get(f'FORMATO{j + 1}')
-        for j in range(len(ap_fields))
-        if ap_fields.get(f'FORMATO{j + 1}')
-    ]
-    formatos_ap_unicos = list(set(formatos_ap))
+    # -------------------------
+    # CHECK 2 - Verificação de ATs (AP vs AT)
+    # -------------------------
+    if plan.needs('AT'):
+
+        # 1) Identificar peças do AP
+        required_pieces = []
+        for key, value in ap_fields.items():
+            if key.startswith('PECA') and value:
+                required_pieces.append(value.strip())
+
+        # 2) Dicionário p/ dizer em quais ATs cada peça foi encontrada
+        found_in_at = {}
+        for p in required_pieces:
+            found_in_at[p] = set()
+        pieces_no_spaces = {peca: remove_whitespace(peca.upper()) for peca in required_pieces}
+
+        # 3) ATs declarados no AP
+        ap_value_list = ap_fields.get('AT DE PRODUCAO', [])
+        if ap_value_list is None:
+            ap_value_list = []
+        if isinstance(ap_value_list, str):
+            ap_value_list = [ap_value_list.strip()]
+        else:
+            ap_value_list = [str(item).strip() for item in ap_value_list]
 
-    # 5) Iterar cada arquivo AT
-    for i, at_file in enumerate(at_files):
-        at_file_name = os.path.basename(at_file)
-        match = re.search(r'AT\s*(\d+)', at_file_name)
-        if not match:
-            continue
-        at_number = match.group(1)
-
-        # Checa se esse AT está no AP
-        if at_number in ap_value_list:
-            # Exibe OK do /AT DE PRODUCAO
-            report.append(f"AT {at_number} - ({at_file_name}) /AT DE PRODUCAO CHECK 2.{i+1}.1: OK")
-
-            # Lê texto do PDF (sem espaços) p/ comparar peças
-            with pdfplumber.open(at_file) as pdf:
-                at_text_no_spaces = re.sub(
-                    r'\s+',
-                    '',
-                    "".join([page.extract_text() or "" for page in pdf.pages])
-                ).upper()
-
-            # (A) Marcar quais peças do AP aparecem neste AT
-            for peca in required_pieces:
-                peca_no_spaces = re.sub(r'\s+', '', peca.upper())
-                if peca_no_spaces in at_text_no_spaces:
-                    found_in_at[peca].add(at_number)
-
-            # (B) Verificar Formatos (1x por AT)
-            # Acha o dicionário at_fields correspondente
-            at_fields = None
-            for atf in at_fields_list:
-                if atf.get('FILE_NAME') == at_file_name:
-                    at_fields = atf
-                    break
-
-            if at_fields:
-                # Formatos do AT
-                formatos_at = [
-                    at_fields.get(f'FORMATO{j+1}')
-                    for j in range(len(at_fields))
-                    if at_fields.get(f'FORMATO{j+1}')
-                ]
-            else:
-                formatos_at = []
-
-            # Checar cada formato do AP
-            for formato_ap in formatos_ap_unicos:
-                matched = False
-                if formato_ap:
-                    # Se está no dicionário at_fields
-                    if formato_ap in formatos_at:
-                        matched = True
-                    else:
-                        # Ou checar diretamente no PDF
-                        if search_format_in_pdf(at_file, formato_ap):
-                            matched = True
+        # 4) Vamos também montar os formatos do AP (para checar 1x por AT)
+        formatos_ap = [
+            ap_fields.get(f'FORMATO{j + 1}')
+            for j in range(len(ap_fields))
+            if ap_fields.get(f'FORMATO{j + 1}')
+        ]
+        formatos_ap_unicos = list(dict.fromkeys(formatos_ap))
 
-                if matched:
-                    report.append(
-                        f"AT - ({at_file_name}) FORMATO/FORMATO "
-                        f"CHECK 2.{i+1}.3: OK - Formato {formato_ap}"
-                    )
+        # 5) Iterar cada arquivo AT
+        for i, at_file in enumerate(at_files):
+            at_file_name = os.path.basename(at_file)
+            match = re.search(r'AT\s*(\d+)', at_file_name)
+            if not match:
+                continue
+            at_number = match.group(1)
+
+            # Checa se esse AT está no AP
+            if at_number in ap_value_list:
+                # Exibe OK do /AT DE PRODUCAO
+                report.add(f'2.{i+1}.1', 'AT /AT DE PRODUCAO', f"AT {at_number} - ({at_file_name}) /AT DE PRODUCAO", OK)
+
+                # (A) Marcar quais peças do AP aparecem neste AT
+                if at_index is not None and at_file in at_index.pieces:
+                    for peca in required_pieces:
+                        if at_file in at_index.pieces.containing(pieces_no_spaces[peca]):
+                            found_in_at[peca].add(at_number)
                 else:
-                    report.append(
-                        f"AT - ({at_file_name}) FORMATO/FORMATO "
-                        f"CHECK 2.{i+1}.3: Non-conformity - Formato {formato_ap}"
-                    )
+                    # Texto do PDF (sem espaços) p/ comparar peças
+                    at_text_no_spaces = _engine_document(at_file, document_engine(at_file, 'AT', doc_cache),
+                                                         doc_cache).no_spaces_upper
+                    for peca in required_pieces:
+                        if pieces_no_spaces[peca] in at_text_no_spaces:
+                            found_in_at[peca].add(at_number)
+
+                # (B) Verificar Formatos (1x por AT)
+                # Acha o dicionário at_fields correspondente
+                at_fields = None
+                for atf in at_fields_list:
+                    if atf.get('FILE_NAME') == at_file_name:
+                        at_fields = atf
+                        break
 
-            # (C) Verificação data (1x por AT)
-            try:
-                ap_data_emissao_dt = datetime.strptime(
-                    ap_fields.get('DATA EMISSAO', '01/01/1900'),
-                    '%d/%m/%Y'
-                )
                 if at_fields:
-                    at_data_at_dt = datetime.strptime(
-                        at_fields.get('Data da AT', '01/01/1900'),
+                    # Formatos do AT
+                    formatos_at = [
+                        at_fields.get(f'FORMATO{j+1}')
+                        for j in range(len(at_fields))
+                        if at_fields.get(f'FORMATO{j+1}')
+                    ]
+                else:
+                    formatos_at = []
+
+                # Checar cada formato do AP
+                for formato_ap in formatos_ap_unicos:
+                    matched = False
+                    if formato_ap:
+                        # Se está no dicionário at_fields
+                        if formato_ap in formatos_at:
+                            matched = True
+                        else:
+                            # Ou checar diretamente no PDF
+                            if at_index is not None and at_file in at_index.formats:
+                                matched = at_file in at_index.formats.containing(normalize_quotes(formato_ap))
+                            elif search_format_in_pdf(at_file, formato_ap, doc_cache,
+                                                      document_engine(at_file, 'AT', doc_cache)):
+                                matched = True
+
+                    if matched:
+                        report.add(f'2.{i+1}.3', 'AT FORMATO/FORMATO', f"AT - ({at_file_name}) FORMATO/FORMATO",
+                                   OK, f"Formato {formato_ap}")
+                    else:
+                        report.add(f'2.{i+1}.3', 'AT FORMATO/FORMATO', f"AT - ({at_file_name}) FORMATO/FORMATO",
+                                   NON_CONFORMITY, f"Formato {formato_ap}")
+
+                # (C) Verificação data (1x por AT)
+                try:
+                    ap_data_emissao_dt = datetime.strptime(
+                        ap_fields.get('DATA EMISSAO', '01/01/1900'),
                         '%d/%m/%Y'
                     )
-                    if ap_data_emissao_dt >= at_data_at_dt:
-                        report.append(f"DATA EMISSAO/Data da AT                 CHECK 2.{i+1}.4: OK")
+                    if at_fields:
+                        at_data_at_dt = datetime.strptime(
+                            at_fields.get('Data da AT', '01/01/1900'),
+                            '%d/%m/%Y'
+                        )
+                        if ap_data_emissao_dt >= at_data_at_dt:
+                            report.add(f'2.{i+1}.4', 'DATA EMISSAO/Data da AT', 'DATA EMISSAO/Data da AT', OK)
+                        else:
+                            report.add(f'2.{i+1}.4', 'DATA EMISSAO/Data da AT', 'DATA EMISSAO/Data da AT', NON_CONFORMITY)
                     else:
-                        report.append(f"DATA EMISSAO/Data da AT                 CHECK 2.{i+1}.4: Non-conformity")
-                else:
-                    # Se at_fields é None
-                    report.append(
-                        f"DATA EMISSAO/Data da AT                 CHECK 2.{i+1}.4: Non-conformity - "
-                        f"at_fields não encontrado para '{at_file_name}', data não verificada."
-                    )
-            except Exception as e:
-                report.append(f"DATA EMISSAO/Data da AT                 CHECK 2.{i+1}.4: Error {e}")
+                        # Se at_fields é None
+                        report.add(
+                            f'2.{i+1}.4', 'DATA EMISSAO/Data da AT', 'DATA EMISSAO/Data da AT', NON_CONFORMITY,
+                            f"at_fields não encontrado para '{at_file_name}', data não verificada."
+                        )
+                except Exception as e:
+                    report.add(f'2.{i+1}.4', 'DATA EMISSAO/Data da AT', 'DATA EMISSAO/Data da AT', ERROR, str(e))
 
-        else:
-            # Se o AT não consta na lista do AP
-            continue
+            else:
+                # Se o AT não consta na lista do AP
+                continue
 
-    # 6) Ao final, gerar OK ou NC para cada peça
-    for peca in required_pieces:
-        if found_in_at[peca]:
-            # Apareceu em algum AT
-            ats_encontrados = ', '.join(found_in_at[peca])
-            report.append(
-                f"CHECK 2.2: OK - A peça '{peca}' foi encontrada nos ATs: {ats_encontrados}"
-            )
-            found_pieces.append(peca.upper())
-        else:
-            report.append(
-                f"CHECK 2.2: Non-conformity - A peça '{peca}' não foi encontrada em nenhum AT"
-            )
+        # 6) Ao final, gerar OK ou NC para cada peça
+        for peca in required_pieces:
+            if found_in_at[peca]:
+                # Apareceu em algum AT
+                ats_encontrados = ', '.join(sorted(found_in_at[peca]))
+                report.add('2.2', None, '', OK, f"A peça '{peca}' foi encontrada nos ATs: {ats_encontrados}")
+                found_pieces.append(peca.upper())
+            else:
+                report.add('2.2', None, '', NON_CONFORMITY, f"A peça '{peca}' não foi encontrada em nenhum AT")
 
     # -------------------------
     # CHECK 3 - SICAF verificações
     # -------------------------
-    if sicaf_fields.get('SICAF_TYPE') == 'SICAF1':
-        # SICAF1
-        razao_social_sicaf = normalize_razao_social(sicaf_fields.get('Razão social', ''))
-        razao_social_ap = normalize_razao_social(ap_fields.get('Razão social', ''))
-        if razao_social_sicaf == razao_social_ap:
-            report.append("Razão social                            CHECK 3.1: OK")
-        else:
-            report.append("Razão social                            CHECK 3.1: Non-conformity")
-
-        if sicaf_fields.get('CNPJ') == ap_fields.get('CNPJ'):
-            report.append("CNPJ                                    CHECK 3.2: OK")
-        else:
-            report.append("CNPJ                                    CHECK 3.2: Non-conformity")
+    if plan.needs('SICAF'):
+        if sicaf_fields.get('SICAF_TYPE') == 'SICAF1':
+            # SICAF1
+            razao_social_sicaf = normalize_razao_social(sicaf_fields.get('Razão social', ''))
+            razao_social_ap = normalize_razao_social(ap_fields.get('Razão social', ''))
+            if razao_social_sicaf == razao_social_ap:
+                report.add('3.1', 'Razão social', 'Razão social', OK)
+            else:
+                report.add('3.1', 'Razão social', 'Razão social', NON_CONFORMITY)
 
-        if sicaf_fields.get('Município') == ap_fields.get('Município'):
-            report.append("Município                               CHECK 3.3: OK")
-        else:
-            report.append("Município                               CHECK 3.3: Non-conformity")
+            if sicaf_fields.get('CNPJ') == ap_fields.get('CNPJ'):
+                report.add('3.2', 'CNPJ', 'CNPJ', OK)
+            else:
+                report.add('3.2', 'CNPJ', 'CNPJ', NON_CONFORMITY)
 
-    else:
-        # SICAF2 - Pesquisa direta no PDF
-        razao_social_ap = ap_fields.get('Razão social')
-        if razao_social_ap:
-            razao_social_ap_no_spaces = razao_social_ap.replace(" ", "").upper()
-            try:
-                sicaf_text = extract_text_with_pdfminer_layout(sicaf_pdf_path)
-                sicaf_text_no_spaces = sicaf_text.replace(" ", "").upper()
+            if sicaf_fields.get('Município') == ap_fields.get('Município'):
+                report.add('3.3', 'Município', 'Município', OK)
+            else:
+                report.add('3.3', 'Município', 'Município', NON_CONFORMITY)
 
-                if razao_social_ap_no_spaces in sicaf_text_no_spaces:
-                    report.append("Razão social                            CHECK 3.1: OK - Razão Social do AP encontrada no SICAF (sem espaços).")
-                else:
-                    report.append("Razão social                            CHECK 3.1: Non-conformity - Razão Social do AP não encontrada no SICAF.")
-            except Exception as e:
-                logging.error(f"Erro ao procurar razão social no SICAF 2: {e}")
-                report.append("Razão social                            CHECK 3.1: Error - Não foi possível verificar a Razão Social no SICAF.")
         else:
-            report.append("Razão social                            CHECK 3.1: Non-conformity - Razão Social do AP não foi encontrada.")
+            # SICAF2 - Pesquisa direta no PDF
+            razao_social_ap = ap_fields.get('Razão social')
+            if razao_social_ap:
+                razao_social_ap_no_spaces = razao_social_ap.replace(" ", "").upper()
+                try:
+                    sicaf_text = extract_text_with_pdfminer_layout(sicaf_pdf_path, doc_cache, engine_for('SICAF2'))
+                    sicaf_text_no_spaces = sicaf_text.replace(" ", "").upper()
 
-        cnpj_ap = ap_fields.get('CNPJ')
-        if cnpj_ap and search_text_in_pdf(sicaf_pdf_path, cnpj_ap):
-            report.append("CNPJ                                    CHECK 3.2: OK - CNPJ do AP encontrado no SICAF.")
-        else:
-            report.append("CNPJ                                    CHECK 3.2: Non-conformity - CNPJ do AP não encontrado no SICAF.")
+                    if razao_social_ap_no_spaces in sicaf_text_no_spaces:
+                        report.add('3.1', 'Razão social', 'Razão social', OK,
+                                   "Razão Social do AP encontrada no SICAF (sem espaços).")
+                    else:
+                        report.add('3.1', 'Razão social', 'Razão social', NON_CONFORMITY,
+                                   "Razão Social do AP não encontrada no SICAF.")
+                except Exception as e:
+                    logging.error(f"Erro ao procurar razão social no SICAF 2: {e}")
+                    report.add('3.1', 'Razão social', 'Razão social', ERROR,
+                               "Não foi possível verificar a Razão Social no SICAF.")
+            else:
+                report.add('3.1', 'Razão social', 'Razão social', NON_CONFORMITY, "Razão Social do AP não foi encontrada.")
 
-        municipio_ap = ap_fields.get('Município')
-        if municipio_ap and search_text_in_pdf(sicaf_pdf_path, municipio_ap):
-            report.append("Município                               CHECK 3.3: OK - Município do AP encontrado no SICAF.")
-        else:
-            report.append("Município                               CHECK 3.3: Non-conformity - Município do AP não encontrado no SICAF.")
+            cnpj_ap = ap_fields.get('CNPJ')
+            if cnpj_ap and search_text_in_pdf(sicaf_pdf_path, cnpj_ap, doc_cache, engine_for('SICAF2')):
+                report.add('3.2', 'CNPJ', 'CNPJ', OK, "CNPJ do AP encontrado no SICAF.")
+            else:
+                report.add('3.2', 'CNPJ', 'CNPJ', NON_CONFORMITY, "CNPJ do AP não encontrado no SICAF.")
+
+            municipio_ap = ap_fields.get('Município')
+            if municipio_ap and search_text_in_pdf(sicaf_pdf_path, municipio_ap, doc_cache, engine_for('SICAF2')):
+                report.add('3.3', 'Município', 'Município', OK, "Município do AP encontrado no SICAF.")
+            else:
+                report.add('3.3', 'Município', 'Município', NON_CONFORMITY, "Município do AP não encontrado no SICAF.")
 
-    report_text = "\n".join(report)
-    return report_text, None
+    return report, None
 
 
 def save_text_to_file(text, file_name, folder_path):
@@ -1055,12 +1599,132 @@ def save_text_to_file(text, file_name, folder_path):
     logging.info(f"Texto salvo em {file_path}")
 
 
-def verify_documents(file_paths, subfolder_name, temp_pdf_dir, fields_to_verify=None, move_os_at_files=True):
+def at_numbers_from_ap(ap_fields):
+    """
+    Números dos ATs declarados no campo 'AT DE PRODUCAO' do AP.
+    """
+    at_de_producao = ap_fields.get('AT DE PRODUCAO')
+    if isinstance(at_de_producao, list):
+        return [num.strip() for num in at_de_producao]
+    elif at_de_producao:
+        return [at_de_producao.strip()]
+    return []
+
+
+def at_number_from_file_name(at_file):
+    """
+    Número do AT no nome do arquivo (ex.: 'AT 36397.pdf' -> '36397').
+    Retorna None se o nome não tiver número de AT ou tiver mais de um (nome ambíguo).
+    """
+    numbers = set(re.findall(r'AT\s*(\d+)', os.path.basename(at_file)))
+    if len(numbers) == 1:
+        return numbers.pop()
+    return None
+
+
+def select_at_files(at_files, at_numbers_in_ap):
+    """
+    Pré-filtro dos ATs: descarta, sem abrir o PDF, os arquivos cujo nome indica um AT
+    que não consta no AP. Arquivos com nome ambíguo são mantidos (extração completa).
+    """
+    selected = []
+    for at_file in at_files:
+        at_number = at_number_from_file_name(at_file)
+        if at_number is None or at_number in at_numbers_in_ap:
+            selected.append(at_file)
+        else:
+            logging.info(f"AT {os.path.basename(at_file)} ignorado: não consta no AP.")
+    return selected
+
+
+class ATTextIndex:
+    """
+    Índices de n-gramas sobre os textos dos ATs (chave: caminho do arquivo), com as
+    mesmas visões usadas em check_fields:
+    - pieces: texto sem espaços, em maiúsculas (CHECK 2.2).
+    - formats: texto com aspas normalizadas (CHECK 2.x.3).
+    """
+
+    def __init__(self, documents):
+        self.pieces = NgramIndex({at_file: document.no_spaces_upper for at_file, document in documents.items()})
+        self.formats = NgramIndex({at_file: document.quotes_normalized for at_file, document in documents.items()})
+
+
+class CampaignContext:
+    """
+    Estado compartilhado de uma pasta "campanha": a OS e os ATs da campanha são
+    extraídos uma única vez (texto, campos e textos normalizados usados nas checagens)
+    e cada subpasta verifica apenas seu AP e SICAF contra esse estado.
+    As visões são guardadas num dicionário simples, que pode ser enviado aos
+    processos do pool e usado para semear o cache de cada processo; as buscas
+    de peças e formatos nos ATs usam o índice 'at_index', montado uma única vez.
+    """
+
+    def __init__(self, os_file, at_files):
+        self.os_file = os_file
+        self.at_files = list(at_files)
+        self.entries = {}
+        self.at_index = None
+
+    def prepare(self, doc_cache, ap_files=(), plan=None):
+        """
+        Extrai a OS e os ATs com 'doc_cache' e guarda as visões calculadas.
+        Se 'ap_files' for informado, só são extraídos os ATs referenciados em algum
+        desses APs (ver select_at_files). Com 'plan' (ExtractionPlan), a OS e os ATs
+        só são extraídos se estiverem no plano.
+        Erros de extração não interrompem o preparo: a subpasta refaz a extração
+        em verify_documents e reporta o erro normalmente.
+        """
+        if plan is None:
+            plan = ExtractionPlan()
+
+        if self.os_file and plan.needs('OS'):
+            try:
+                extract_document(self.os_file, 'OS', doc_cache)
+            except Exception as e:
+                logging.error(f"Erro ao extrair a OS da campanha {self.os_file}: {e}")
+
+        at_files = self.at_files if plan.needs('AT') else []
+        if ap_files and at_files:
+            at_numbers = set()
+            for ap_file in ap_files:
+                try:
+                    ap_fields = extract_document(ap_file, 'AP', doc_cache)[1]
+                    at_numbers.update(at_numbers_from_ap(ap_fields))
+                except Exception as e:
+                    logging.error(f"Erro ao extrair o AP {ap_file}: {e}")
+            at_files = select_at_files(at_files, at_numbers)
+
+        at_documents = {}
+        for at_file in at_files:
+            try:
+                at_engine = extract_document(at_file, 'AT', doc_cache)[2]
+                at_documents[at_file] = _engine_document(at_file, at_engine, doc_cache)
+            except Exception as e:
+                logging.error(f"Erro ao extrair o AT da campanha {at_file}: {e}")
+        self.at_index = ATTextIndex(at_documents)
+
+        paths = [self.os_file] if self.os_file else []
+        self.entries = doc_cache.export(paths + at_files)
+        return self
+
+    def apply(self, doc_cache):
+        """
+        Semeia o cache da subpasta com as visões da OS e dos ATs da campanha.
+        """
+        doc_cache.seed(self.entries)
+
+
+def verify_documents(file_paths, subfolder_name, temp_pdf_dir, fields_to_verify=None, move_os_at_files=True,
+                     doc_cache=None, relatorios_folder=None, campaign=None):
     """
     Função principal que faz a verificação dos documentos:
-    - Extrai texto e campos de OS, AP, AT e SICAF.
+    - Extrai texto e campos de OS, AP, AT e SICAF (cada PDF é lido uma única vez,
+      via 'doc_cache', compartilhado entre as subpastas de um mesmo job).
+    - Em pastas "campanha", 'campaign' (CampaignContext) traz a OS e os ATs já extraídos.
     - Gera relatório de não conformidades ou OK.
-    - Move arquivos para as pastas OK ou Non-conformity, caso necessário.
+    - Move arquivos para as pastas OK ou Non-conformity (dentro de 'relatorios_folder'
+      ou da pasta 'Relatorios' do app), caso necessário.
     - Retorna o relatório HTML final e o status geral.
     """
     os_file = file_paths.get('OS')
@@ -1068,97 +1732,115 @@ def verify_documents(file_paths, subfolder_name, temp_pdf_dir, fields_to_verify=
     at_files = file_paths.get('AT', [])
     sicaf_file = file_paths.get('SICAF')
 
-    if not all([os_file, ap_file, sicaf_file]):
-        error_message = f"Todos os arquivos (OS, AP, SICAF) devem estar presentes na pasta {subfolder_name}."
+    # Só extrai os documentos necessários para os campos selecionados
+    plan = ExtractionPlan(fields_to_verify)
+    required_files = [
+        (document_type, file)
+        for document_type, file in (('OS', os_file), ('AP', ap_file), ('SICAF', sicaf_file))
+        if plan.needs(document_type)
+    ]
+    if not all(file for document_type, file in required_files):
+        names = ', '.join(document_type for document_type, file in required_files)
+        error_message = f"Todos os arquivos ({names}) devem estar presentes na pasta {subfolder_name}."
         logging.error(error_message)
         return "", None, error_message
 
     folder_path = os.path.dirname(__file__)
+    if doc_cache is None:
+        doc_cache = DocumentCache()
+    if campaign is not None:
+        campaign.apply(doc_cache)
+
+    # Motor de extração usado em cada documento (exibido no relatório)
+    engines = {}
 
     # Extrai texto OS
-    os_text = extract_text_with_format_adjustment(os_file)
-    determine_os_type(os_text)  # Força detecção do tipo de OS
-    os_fields = extract_fields(os_text, 'OS')
-    save_text_to_file(os_text, f"os_text_{subfolder_name}.txt", temp_pdf_dir)
+    os_fields = None
+    if plan.needs('OS'):
+        # Só as primeiras páginas, se o cabeçalho da OS1 estiver completo nelas
+        os_text, os_fields, os_engine = extract_document(os_file, 'OS', doc_cache)
+        determine_os_type(os_text)  # Força detecção do tipo de OS
+        engines['OS'] = os_engine.name
+        save_text_to_file(os_text, f"os_text_{subfolder_name}.txt", temp_pdf_dir)
 
     # Extrai texto AP
-    ap_text = extract_text_with_format_adjustment_py(ap_file)
-    ap_fields = extract_fields(ap_text, 'AP')
+    ap_text, ap_fields, ap_engine = extract_document(ap_file, 'AP', doc_cache)
+    engines['AP'] = ap_engine.name
     save_text_to_file(ap_text, f"ap_text_{subfolder_name}.txt", temp_pdf_dir)
 
-    # Processa os ATs
-    at_fields_list = []
-    at_de_producao = ap_fields.get('AT DE PRODUCAO')
-    if isinstance(at_de_producao, list):
-        at_numbers_in_ap = [num.strip() for num in at_de_producao]
-    elif at_de_producao:
-        at_numbers_in_ap = [at_de_producao.strip()]
-    else:
-        at_numbers_in_ap = []
-
-    at_numbers_found = []
-
-    for at_file in at_files:
-        at_text = extract_text_with_format_adjustment(at_file)
-        at_fields = extract_fields(at_text, 'AT')
-        at_fields['FILE_NAME'] = os.path.basename(at_file)
-        at_number = (at_fields.get('AT') or "").strip()
-
-        if at_number in at_numbers_in_ap:
-            at_fields_list.append(at_fields)
-            at_numbers_found.append(at_number)
-            save_text_to_file(at_text, f"at_text_{os.path.basename(at_file)}.txt", temp_pdf_dir)
-        else:
-            # Se o número do AT não está no AP, não processa
-            pass
+    # Processa os ATs (apenas os referenciados no AP, ver select_at_files)
+    at_fields_list = None
+    missing_at_numbers = set()
+    if plan.needs('AT'):
+        at_fields_list = []
+        at_numbers_in_ap = at_numbers_from_ap(ap_fields)
+        at_numbers_found = []
+
+        for at_file in select_at_files(at_files, at_numbers_in_ap):
+            at_text, at_fields, at_engine = extract_document(at_file, 'AT', doc_cache)
+            at_fields['FILE_NAME'] = os.path.basename(at_file)
+            at_number = (at_fields.get('AT') or "").strip()
+
+            if at_number in at_numbers_in_ap:
+                at_fields_list.append(at_fields)
+                at_numbers_found.append(at_number)
+                engines[f"AT ({at_fields['FILE_NAME']})"] = at_engine.name
+                save_text_to_file(at_text, f"at_text_{os.path.basename(at_file)}.txt", temp_pdf_dir)
+            else:
+                # Se o número do AT não está no AP, não processa
+                pass
 
-    missing_at_numbers = set(at_numbers_in_ap) - set(at_numbers_found)
+        missing_at_numbers = set(at_numbers_in_ap) - set(at_numbers_found)
 
     # Extrai texto SICAF
-    sicaf_text = extract_text_with_format_adjustment(sicaf_file)
-    sicaf_type = determine_sicaf_type(sicaf_text)
-    if sicaf_type == 'SICAF2':
-        sicaf_text = extract_text_with_pdfminer_layout(sicaf_file)
-    save_text_to_file(sicaf_text, f"sicaf_text_{subfolder_name}.txt", temp_pdf_dir)
-    sicaf_fields = extract_fields(sicaf_text, 'SICAF')
+    sicaf_fields = None
+    if plan.needs('SICAF'):
+        # Tipo pela primeira página; depois, um único extrator para todos os checks do SICAF:
+        # SICAF1 só as primeiras páginas (cabeçalho), SICAF2 o PDFMiner sem espaços
+        with stage('doc:SICAF'):
+            if sniff_sicaf_type(sicaf_file, doc_cache) == 'SICAF1':
+                sicaf_text, sicaf_fields, sicaf_engine = extract_document(sicaf_file, 'SICAF', doc_cache)
+            else:
+                sicaf_engine = engine_for('SICAF2')
+                sicaf_text = extract_text_with_pdfminer_layout(sicaf_file, doc_cache, sicaf_engine)
+                sicaf_fields = extract_document_fields(sicaf_file, sicaf_text, 'SICAF',
+                                                       f"{sicaf_engine.key}/layout", doc_cache)
+        engines['SICAF'] = sicaf_engine.name
+        save_text_to_file(sicaf_text, f"sicaf_text_{subfolder_name}.txt", temp_pdf_dir)
 
     found_pieces = []
-    report, error_message = check_fields(
-        os_fields, ap_fields, at_fields_list,
-        sicaf_fields, sicaf_file,
-        at_files, missing_at_numbers,
-        found_pieces
-    )
+    with stage('checks'):
+        report, error_message = check_fields(
+            os_fields, ap_fields, at_fields_list,
+            sicaf_fields, sicaf_file,
+            at_files, missing_at_numbers,
+            found_pieces, doc_cache,
+            at_index=campaign.at_index if campaign is not None else None,
+            plan=plan
+        )
     if error_message:
         return "", None, error_message
+    report.engines.update(engines)
 
-    required_pieces = [
-        value.strip().upper()
-        for key, value in ap_fields.items()
-        if key.startswith('PECA')
-    ]
+    # Sem ATs no plano, as peças não são verificadas
+    required_pieces = []
+    if plan.needs('AT'):
+        required_pieces = [
+            value.strip().upper()
+            for key, value in ap_fields.items()
+            if key.startswith('PECA')
+        ]
 
     # Monta dicionário dos status
-    field_statuses = {
-        'OS N°': 'OK' if 'CHECK 1.1' in report and 'OK' in report else 'NC',
-        'DATAS': 'OK' if 'CHECK 1.2' in report and 'OK' in report else 'NC',
-        'TITULO DA OS/CAMPANHA': 'OK' if 'CHECK 1.3' in report and 'OK' in report else 'NC',
-        'ORGAO/PRODUTO': 'OK' if 'CHECK 1.4' in report and 'OK' in report else 'NC',
-        'TIPO DA CAMPANHA/AUT.CLIENTE': 'OK' if 'CHECK 1.5' in report and 'OK' in report else 'NC',
-        'AT /AT DE PRODUCAO': 'OK' if any(f'CHECK 2.{i}.1' in report and 'OK' in report for i in range(1, 10)) else 'NC',
-        'AT FORMATO/FORMATO': 'OK' if any(f'CHECK 2.{i}.3' in report and 'OK' in report for i in range(1, 10)) else 'NC',
-        'DATA EMISSAO/Data da AT': 'OK' if any(f'CHECK 2.{i}.4' in report and 'OK' in report for i in range(1, 10)) else 'NC',
-        'Razão social': 'OK' if 'CHECK 3.1' in report and 'OK' in report else 'NC',
-        'CNPJ': 'OK' if 'CHECK 3.2' in report and 'OK' in report else 'NC',
-        'Município': 'OK' if 'CHECK 3.3' in report and 'OK' in report else 'NC'
-    }
+    field_statuses = report.field_statuses()
 
     overall_status, status_class = determine_overall_status(
         field_statuses, required_pieces, found_pieces, fields_to_verify
     )
 
     # Pasta "Relatorios" onde "OK" e "Non-conformity" serão criadas
-    relatorios_folder = os.path.join(folder_path, "Relatorios")
+    if relatorios_folder is None:
+        relatorios_folder = os.path.join(folder_path, "Relatorios")
     os.makedirs(relatorios_folder, exist_ok=True)
 
     if overall_status == 'OK':
@@ -1170,13 +1852,15 @@ def verify_documents(file_paths, subfolder_name, temp_pdf_dir, fields_to_verify=
 
     # Move os arquivos para a pasta de destino
     try:
-        shutil.move(ap_file, os.path.join(status_folder, os.path.basename(ap_file)))
-        shutil.move(sicaf_file, os.path.join(status_folder, os.path.basename(sicaf_file)))
+        with stage('move'):
+            shutil.move(ap_file, os.path.join(status_folder, os.path.basename(ap_file)))
+            if sicaf_file:
+                shutil.move(sicaf_file, os.path.join(status_folder, os.path.basename(sicaf_file)))
 
-        if overall_status == 'Non-conformity' and move_os_at_files:
-            shutil.move(os_file, os.path.join(status_folder, os.path.basename(os_file)))
-            for at_file in at_files:
-                shutil.move(at_file, os.path.join(status_folder, os.path.basename(at_file)))
+            if overall_status == 'Non-conformity' and move_os_at_files:
+                shutil.move(os_file, os.path.join(status_folder, os.path.basename(os_file)))
+                for at_file in at_files:
+                    shutil.move(at_file, os.path.join(status_folder, os.path.basename(at_file)))
 
         logging.info(f"Arquivos movidos para a pasta: {status_folder}")
     except Exception as e:
@@ -1186,18 +1870,24 @@ def verify_documents(file_paths, subfolder_name, temp_pdf_dir, fields_to_verify=
     return html_report, overall_status, None
 
 
-def move_relatorios_folder(destination_path):
+def move_relatorios_folder(destination_path, relatorios_folder=None):
     """
-    Move a pasta 'Relatorios' para o 'destination_path', renomeando com data e hora.
+    Move a pasta 'Relatorios' (do app ou a informada) para o 'destination_path', renomeando com data e hora.
     """
     try:
-        folder_path = os.path.dirname(__file__)
-        relatorios_folder = os.path.join(folder_path, "Relatorios")
+        if relatorios_folder is None:
+            folder_path = os.path.dirname(__file__)
+            relatorios_folder = os.path.join(folder_path, "Relatorios")
         if os.path.exists(relatorios_folder):
             now = datetime.now()
             timestamp = now.strftime("%Y%m%d_%H%M%S")
             new_folder_name = f"Relatorios_{timestamp}"
             destination_folder = os.path.join(destination_path, new_folder_name)
+            # Jobs concluídos no mesmo segundo não podem cair na mesma pasta
+            suffix = 1
+            while os.path.exists(destination_folder):
+                suffix += 1
+                destination_folder = os.path.join(destination_path, f"{new_folder_name}_{suffix}")
             if not os.path.exists(destination_path):
                 os.makedirs(destination_path)
             shutil.move(relatorios_folder, destination_folder)
@@ -1207,15 +1897,3 @@ def move_relatorios_folder(destination_path):
     except Exception as e:
         logging.error(f"Erro ao mover a pasta 'Relatorios': {e}")
 
-
-def delete_temp_folder():
-    """
-    Aguarda 45 segundos e remove a pasta temporária 'temp_pdf' caso exista.
-    """
-    time.sleep(45)
-    temp_folder = os.path.join(os.path.dirname(__file__), 'temp_pdf')
-    try:
-        shutil.rmtree(temp_folder)
-        logging.info(f"Pasta temporária {temp_folder} apagada com sucesso.")
-    except Exception as e:
-        logging.error(f"Erro ao tentar apagar a pasta temporária {temp_folder}: {e}")
@@ -0,0 +1,137 @@
+# timing.py
+
+import io
+import os
+import json
+import time
+import pstats
+import cProfile
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+
+# Nome de cada etapa medida, como exibido no "Resumo do Processamento"
+STAGE_LABELS = {
+    'upload': 'Gravação dos arquivos enviados',
+    'extraction': 'Extração de texto dos PDFs',
+    'fields': 'Extração de campos (extract_fields)',
+    'checks': 'Verificações (check_fields)',
+    'move': 'Movimentação para Relatorios',
+    'relatorios': 'Envio da pasta Relatorios ao destino',
+    'subfolder': 'Verificação completa de cada subpasta',
+    'doc:OS': 'Documentos OS',
+    'doc:AP': 'Documentos AP',
+    'doc:AT': 'Documentos AT',
+    'doc:SICAF': 'Documentos SICAF',
+}
+
+# Quantidade de funções exibidas no relatório de perfilamento
+PROFILE_TOP_FUNCTIONS = int(os.environ.get('CHECKINHO_PROFILE_TOP', '25'))
+
+# Cronômetro ativo de cada thread (ver StageTimer.activate)
+_local = threading.local()
+
+
+class StageTimer:
+    """
+    Soma o tempo (em segundos) gasto em cada etapa do processamento e guarda a duração de
+    cada ocorrência (usada nos histogramas de metrics). As etapas 'doc:<tipo>' medem cada documento inteiro (extração de texto e de campos)
+    e por isso se sobrepõem às etapas 'extraction' e 'fields'.
+    """
+
+    def __init__(self):
+        self.totals = {}
+        self.counts = {}
+        self.samples = {}
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+            self.counts[name] = self.counts.get(name, 0) + 1
+            self.samples.setdefault(name, []).append(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Mede o bloco 'with' como uma ocorrência da etapa 'name'; uma etapa aninhada em outra
+        de mesmo nome (ex.: um documento medido também dentro de extract_document) conta uma vez.
+        """
+        if name in self._running:
+            yield
+            return
+        self._running.add(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._running.discard(name)
+            self.add(name, time.perf_counter() - start)
+
+    @contextmanager
+    def activate(self):
+        """
+        Torna este o cronômetro usado por stage() na thread atual durante o bloco 'with'.
+        """
+        previous = getattr(_local, 'timer', None)
+        _local.timer = self
+        try:
+            yield self
+        finally:
+            _local.timer = previous
+
+    def merge(self, snapshot):
+        """
+        Soma os tempos de outro cronômetro (ver snapshot), ex.: de uma subpasta ou de um processo do pool.
+        """
+        with self._lock:
+            for name, seconds in snapshot['totals'].items():
+                self.totals[name] = self.totals.get(name, 0.0) + seconds
+                self.counts[name] = self.counts.get(name, 0) + snapshot['counts'].get(name, 0)
+                self.samples.setdefault(name, []).extend(snapshot['samples'].get(name, []))
+
+    def snapshot(self):
+        """
+        Cópia dos tempos em dicionários simples (podem ser enviados entre processos ou gravados em JSON).
+        """
+        with self._lock:
+            return {
+                'totals': {name: round(seconds, 4) for name, seconds in self.totals.items()},
+                'counts': dict(self.counts),
+                'samples': {name: [round(seconds, 4) for seconds in samples]
+                            for name, samples in self.samples.items()},
+            }
+
+
+def stage(name):
+    """
+    Mede o bloco 'with' no cronômetro ativo da thread; sem cronômetro ativo, não mede nada.
+    """
+    timer = getattr(_local, 'timer', None)
+    return timer.stage(name) if timer is not None else nullcontext()
+
+
+def log_timings(scope, snapshot):
+    """
+    Registra os tempos em uma linha de log estruturada (JSON), ex.:
+    Tempos: {"scope": "subpasta 100481", "extraction": 0.812, ...}
+    """
+    logging.info("Tempos: " + json.dumps({'scope': scope, **snapshot['totals']}, ensure_ascii=False))
+
+
+def run_profiled(stats_path, function, *args, **kwargs):
+    """
+    Executa function(*args, **kwargs) sob o cProfile e grava as estatísticas em 'stats_path'
+    (formato pstats, ex.: para abrir com snakeviz). Retorna o resultado da função e o texto
+    com as funções de maior tempo acumulado.
+    """
+    profiler = cProfile.Profile()
+    try:
+        result = profiler.runcall(function, *args, **kwargs)
+    finally:
+        profiler.dump_stats(stats_path)
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+    return result, output.getvalue()
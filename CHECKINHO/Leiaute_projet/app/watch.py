@@ -0,0 +1,378 @@
+# watch.py
+#
+# Modo de vigilância: acompanha uma pasta de entrada (ex.: a pasta compartilhada onde chegam os PIs)
+# e, a cada varredura, verifica apenas as subpastas novas ou cujo conjunto OS/AP/AT/SICAF mudou.
+# As subpastas inalteradas mantêm o veredito anterior, guardado no manifesto (tabela
+# watch_manifest do app.db da pasta atual) junto com o tamanho, mtime e SHA-256 de cada arquivo.
+#
+# A pasta de entrada faz o papel da pasta raiz do envio pelo site: ela mesma e suas pastas de PI e
+# pastas "campanha" são classificadas por collect_verification_tasks (a pasta de entrada pode ser
+# uma pasta "campanha", com a OS e as ATs compartilhadas pelas subpastas). Os arquivos a verificar são
+# vinculados ou copiados para uma área de trabalho (Workspace), sem alterar a pasta de entrada.
+#
+# Uso:
+#   python app/watch.py PASTA [--intervalo 60] [--estabilizacao 30] [--workers 4] [--campos "OS N°,DATAS"]
+#                             [--destino PASTA] [--json estado.json] [--csv estado.csv]
+#                             [--relatorio relatorio.html] [--uma-vez] [--verbose]
+
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import argparse
+import multiprocessing
+from html import escape
+
+from cli import MAX_EXIT_CODE, ConsoleProgress, _selected_fields, write_csv, write_html_report
+from db import get_db_connection
+from extraction_cache import extraction_cache
+from pipeline import (VERIFICATION_WORKERS, build_summary_report, collect_verification_tasks, prepare_campaigns,
+                      run_verification_tasks, task_files)
+from services import FIELDS_VERSION, DocumentCache, allowed_file, file_sha256, move_relatorios_folder
+from timing import StageTimer
+from workspace import BATCH_WORKSPACES_DIR, Workspace
+
+# Intervalo (s) entre as varreduras da pasta de entrada
+WATCH_INTERVAL_SECONDS = int(os.environ.get('CHECKINHO_WATCH_INTERVAL', '60'))
+
+# Arquivos modificados há menos que isso (s) ainda podem estar sendo copiados: a subpasta espera a próxima varredura
+WATCH_SETTLE_SECONDS = int(os.environ.get('CHECKINHO_WATCH_SETTLE', '30'))
+
+
+class WatchManifest:
+    """
+    Manifesto das subpastas já verificadas de uma pasta de entrada (tabela 'watch_manifest'):
+    arquivos de cada subpasta ({caminho relativo: [tamanho, mtime_ns, sha256]}), a impressão
+    digital do conjunto OS/AP/AT/SICAF e o último veredito (status, erro e relatório HTML).
+    """
+
+    def __init__(self, inbox):
+        self.inbox = os.path.abspath(inbox)
+
+    def load(self):
+        """
+        Retorna {subpasta relativa: entrada} com todas as entradas desta pasta de entrada.
+        """
+        conn = get_db_connection()
+        try:
+            rows = conn.execute('SELECT * FROM watch_manifest WHERE inbox = ?', (self.inbox,)).fetchall()
+        finally:
+            conn.close()
+        entries = {}
+        for row in rows:
+            entry = dict(row)
+            entry['files'] = json.loads(entry['files'])
+            entries[entry['folder']] = entry
+        return entries
+
+    def save(self, entries):
+        conn = get_db_connection()
+        try:
+            for entry in entries:
+                conn.execute(
+                    'INSERT OR REPLACE INTO watch_manifest (inbox, folder, subfolder_name, fingerprint, files, '
+                    'status, error, report, verified_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (self.inbox, entry['folder'], entry['subfolder_name'], entry['fingerprint'],
+                     json.dumps(entry['files'], ensure_ascii=False), entry['status'], entry['error'],
+                     entry['report'], entry['verified_at'])
+                )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def remove(self, folders):
+        conn = get_db_connection()
+        try:
+            for folder in folders:
+                conn.execute('DELETE FROM watch_manifest WHERE inbox = ? AND folder = ?', (self.inbox, folder))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+class InboxWatcher:
+    """
+    Varre a pasta de entrada e verifica só as subpastas novas ou alteradas (ver scan).
+    Arquivos com tamanho e mtime iguais aos do manifesto não são lidos de novo: o SHA-256
+    anterior é reaproveitado. A impressão digital de cada subpasta inclui os campos
+    verificados, de modo que mudar --campos também leva a uma nova verificação.
+    """
+
+    def __init__(self, inbox, selected_fields=None, workers=VERIFICATION_WORKERS, destination_path=None,
+                 settle_seconds=WATCH_SETTLE_SECONDS):
+        self.inbox = os.path.abspath(inbox)
+        self.selected_fields = selected_fields
+        self.workers = workers
+        self.destination_path = destination_path
+        self.settle_seconds = settle_seconds
+        self.manifest = WatchManifest(self.inbox)
+
+    def _fingerprint(self, files):
+        content = {
+            'fields': sorted(self.selected_fields) if self.selected_fields else None,
+            'fields_version': FIELDS_VERSION,
+            'files': sorted([document_type, path, info[2]] for document_type, path, info in files),
+        }
+        return hashlib.sha256(json.dumps(content, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def scan(self):
+        """
+        Faz uma varredura: classifica as subpastas, compara com o manifesto e verifica as alteradas.
+        Retorna as entradas do manifesto atualizadas e as listas de subpastas verificadas,
+        inalteradas, aguardando estabilização e removidas, além das subpastas ignoradas (sem AP).
+        """
+        entries = self.manifest.load()
+        known_files = {}
+        for entry in entries.values():
+            known_files.update(entry['files'])
+
+        collected = collect_verification_tasks(self.inbox, allowed_file, include_root=True)
+        now = time.time()
+        changed = []
+        refreshed = []
+        unchanged = []
+        pending = []
+        seen = set()
+        for task in collected['tasks']:
+            folder = os.path.relpath(task['folder'], self.inbox)
+            seen.add(folder)
+            files = []
+            settling = False
+            for document_type, path in task_files(task):
+                stat = os.stat(path)
+                relative_path = os.path.relpath(path, self.inbox)
+                if now - stat.st_mtime < self.settle_seconds:
+                    settling = True
+                    break
+                known = known_files.get(relative_path)
+                if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+                    sha256 = known[2]
+                else:
+                    sha256 = file_sha256(path)
+                    known_files[relative_path] = [stat.st_size, stat.st_mtime_ns, sha256]
+                files.append((document_type, relative_path, [stat.st_size, stat.st_mtime_ns, sha256]))
+            if settling:
+                pending.append(folder)
+                continue
+
+            fingerprint = self._fingerprint(files)
+            files_info = {relative_path: info for document_type, relative_path, info in files}
+            entry = entries.get(folder)
+            if entry is not None and entry['fingerprint'] == fingerprint:
+                unchanged.append(folder)
+                if entry['files'] != files_info:
+                    # Mesmo conteúdo com outro mtime (ex.: arquivo copiado de novo): só atualiza o manifesto
+                    entry['files'] = files_info
+                    refreshed.append(entry)
+            else:
+                changed.append((folder, task, fingerprint, files_info))
+
+        removed = [folder for folder in entries if folder not in seen and folder not in pending]
+        if removed:
+            self.manifest.remove(removed)
+            for folder in removed:
+                del entries[folder]
+        if refreshed:
+            self.manifest.save(refreshed)
+
+        verified = []
+        doc_cache = DocumentCache(store=extraction_cache)
+        if changed:
+            verified = self._verify(changed, doc_cache)
+            self.manifest.save(verified)
+            entries.update((entry['folder'], entry) for entry in verified)
+
+        logging.info(
+            f"Varredura de {self.inbox}: {len(verified)} verificadas, {len(unchanged)} inalteradas, "
+            f"{len(pending)} aguardando, {len(removed)} removidas."
+        )
+        return {
+            'entries': entries,
+            'verified': [entry['folder'] for entry in verified],
+            'unchanged': unchanged,
+            'pending': pending,
+            'removed': removed,
+            'ignored_subfolders': collected['ignored_subfolders'],
+            'cache_hits': doc_cache.persistent_hits,
+            'cache_misses': doc_cache.persistent_misses,
+        }
+
+    def _verify(self, changed, doc_cache):
+        """
+        Verifica as subpastas alteradas numa área de trabalho com cópias dos seus arquivos
+        (verify_documents move os arquivos) e retorna as novas entradas do manifesto.
+        """
+        workspace = Workspace(uuid.uuid4().hex, base_dir=BATCH_WORKSPACES_DIR).create()
+        root_name = os.path.basename(self.inbox)
+        try:
+            staged = set()
+            for folder, task, fingerprint, files_info in changed:
+                for relative_path in files_info:
+                    if relative_path not in staged:
+                        workspace.add_file(os.path.join(self.inbox, relative_path),
+                                           os.path.join(root_name, relative_path))
+                        staged.add(relative_path)
+
+            staged_root = os.path.join(workspace.input_dir, root_name)
+            tasks = collect_verification_tasks(workspace.input_dir, allowed_file)['tasks']
+            progress = ConsoleProgress()
+            progress.start_tasks([task['subfolder_name'] for task in tasks])
+
+            timer = StageTimer()
+            with timer.activate():
+                prepare_campaigns(tasks, doc_cache, self.selected_fields)
+            outcomes = run_verification_tasks(tasks, workspace.input_dir, self.selected_fields, doc_cache,
+                                              self.workers, progress, workspace.relatorios_dir)
+            if self.destination_path is not None:
+                move_relatorios_folder(self.destination_path, workspace.relatorios_dir)
+        finally:
+            shutil.rmtree(workspace.root, ignore_errors=True)
+
+        changed_by_folder = {folder: (fingerprint, files_info) for folder, task, fingerprint, files_info in changed}
+        verified = []
+        for task, (result, status, error_message) in zip(tasks, outcomes):
+            folder = os.path.relpath(task['folder'], staged_root)
+            fingerprint, files_info = changed_by_folder[folder]
+            if error_message and not task['campanha']:
+                # Mesmo bloco de erro do relatório do site (ver run_batch)
+                result = f"<h2>Erro no conjunto {escape(task['subfolder_name'])}</h2><p>{escape(error_message)}</p>"
+            verified.append({
+                'folder': folder,
+                'subfolder_name': task['subfolder_name'],
+                'fingerprint': fingerprint,
+                'files': files_info,
+                'status': 'erro' if error_message else status,
+                'error': error_message,
+                'report': result,
+                'verified_at': time.time(),
+            })
+        return verified
+
+    def run(self, interval=WATCH_INTERVAL_SECONDS, on_scan=None):
+        """
+        Varre a pasta de entrada a cada 'interval' segundos até ser interrompido (Ctrl+C).
+        Erros de uma varredura (ex.: pasta de rede indisponível) são registrados e a vigilância continua.
+        """
+        while True:
+            try:
+                scan = self.scan()
+                if on_scan is not None:
+                    on_scan(scan)
+            except Exception as e:
+                logging.error(f"Erro na varredura de {self.inbox}: {e}")
+            time.sleep(interval)
+
+
+def build_state(inbox, scan):
+    """
+    Estado de todas as subpastas do manifesto (gravado em JSON), no formato do resumo do cli.
+    """
+    entries = [scan['entries'][folder] for folder in sorted(scan['entries'])]
+    verified = set(scan['verified'])
+    return {
+        'source': inbox,
+        'root_folder': os.path.basename(inbox),
+        'ok': sum(1 for entry in entries if entry['status'] == 'OK'),
+        'nc': sum(1 for entry in entries if entry['status'] == 'NC'),
+        'errors': sum(1 for entry in entries if entry['status'] == 'erro'),
+        'verified': len(scan['verified']),
+        'unchanged': len(scan['unchanged']),
+        'pending': scan['pending'],
+        'removed': scan['removed'],
+        'ignored_subfolders': scan['ignored_subfolders'],
+        'subfolders': [{
+            'subfolder': entry['subfolder_name'],
+            'folder': entry['folder'],
+            'status': entry['status'],
+            'error': entry['error'],
+            'verified_now': entry['folder'] in verified,
+            'verified_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['verified_at'])),
+            'seconds': None,
+        } for entry in entries],
+    }
+
+
+def build_report(state, scan):
+    """
+    Relatório HTML de todas as subpastas (vereditos atuais e anteriores) com o resumo.
+    """
+    entries = [scan['entries'][folder] for folder in sorted(scan['entries'])]
+    summary = {
+        'total_subfolders_sent': len(entries) + len(scan['ignored_subfolders']),
+        'total_subfolders_processed': state['ok'] + state['nc'],
+        'ignored_subfolders': scan['ignored_subfolders'],
+        'root_folder_name': state['root_folder'],
+        'ok_processes': [entry['subfolder_name'] for entry in entries if entry['status'] == 'OK'],
+        'nc_processes': [entry['subfolder_name'] for entry in entries if entry['status'] == 'NC'],
+        'cache_hits': scan['cache_hits'],
+        'cache_misses': scan['cache_misses'],
+    }
+    return ''.join(entry['report'] or '' for entry in entries) + build_summary_report(summary)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vigia uma pasta de entrada e verifica só as subpastas novas ou alteradas.")
+    parser.add_argument('pasta', help="Pasta de entrada (pastas de PI e pastas \"campanha\").")
+    parser.add_argument('--intervalo', type=int, default=WATCH_INTERVAL_SECONDS,
+                        help="Segundos entre as varreduras (padrão: CHECKINHO_WATCH_INTERVAL).")
+    parser.add_argument('--estabilizacao', type=int, default=WATCH_SETTLE_SECONDS,
+                        help="Segundos sem modificação antes de verificar uma subpasta (padrão: CHECKINHO_WATCH_SETTLE).")
+    parser.add_argument('--workers', type=int, default=VERIFICATION_WORKERS,
+                        help="Processos usados para verificar as subpastas (padrão: CHECKINHO_WORKERS).")
+    parser.add_argument('--campos', type=_selected_fields, default=None,
+                        help="Campos a verificar, separados por vírgula (padrão: todos).")
+    parser.add_argument('--destino', default=os.environ.get('OUTPUT_PATH', os.getcwd()),
+                        help="Pasta para onde a pasta Relatorios é movida (padrão: OUTPUT_PATH ou a pasta atual).")
+    parser.add_argument('--json', dest='json_path', help="Grava o estado de todas as subpastas em JSON a cada varredura.")
+    parser.add_argument('--csv', dest='csv_path', help="Grava o status de todas as subpastas em CSV a cada varredura.")
+    parser.add_argument('--relatorio', dest='report_path',
+                        help="Grava o relatório HTML de todas as subpastas a cada varredura.")
+    parser.add_argument('--uma-vez', dest='once', action='store_true',
+                        help="Faz uma única varredura e sai (código de saída: subpastas NC ou com erro).")
+    parser.add_argument('--verbose', action='store_true', help="Exibe o log detalhado da verificação.")
+    args = parser.parse_args(argv)
+
+    # services configura o log em INFO ao ser importado
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    inbox = os.path.abspath(args.pasta)
+    if not os.path.isdir(inbox):
+        print(f"Pasta não encontrada: {inbox}", file=sys.stderr)
+        return MAX_EXIT_CODE + 1
+
+    watcher = InboxWatcher(inbox, args.campos, args.workers, args.destino, args.estabilizacao)
+
+    def write_outputs(scan):
+        state = build_state(inbox, scan)
+        print(f"{time.strftime('%H:%M:%S')} {state['verified']} verificadas, {state['unchanged']} inalteradas, "
+              f"{len(state['pending'])} aguardando, {len(state['removed'])} removidas | "
+              f"OK: {state['ok']} | NC: {state['nc']} | erros: {state['errors']}", file=sys.stderr, flush=True)
+        if args.json_path:
+            with open(args.json_path, 'w', encoding='utf-8') as file:
+                json.dump(state, file, ensure_ascii=False, indent=2)
+        if args.csv_path:
+            write_csv(args.csv_path, state)
+        if args.report_path:
+            write_html_report(args.report_path, build_report(state, scan))
+        return state
+
+    if args.once:
+        state = write_outputs(watcher.scan())
+        return min(state['nc'] + state['errors'], MAX_EXIT_CODE)
+
+    print(f"Vigiando {inbox} a cada {args.intervalo} s (Ctrl+C para sair).", file=sys.stderr)
+    try:
+        watcher.run(args.intervalo, on_scan=write_outputs)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    # Necessário para o pool de processos (--workers) no executável empacotado
+    multiprocessing.freeze_support()
+    sys.exit(main())
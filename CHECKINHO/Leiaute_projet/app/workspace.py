@@ -0,0 +1,222 @@
+# workspace.py
+
+import os
+import time
+import shutil
+import logging
+import threading
+
+# Pasta onde ficam as áreas de trabalho dos jobs (uma subpasta por job)
+WORKSPACES_DIR = os.environ.get('WORKSPACES_DIR', os.path.join(os.path.dirname(__file__), 'temp_pdf'))
+
+# Pasta das áreas de trabalho da linha de comando (cli.py, watch.py), fora da varredura do faxineiro:
+# cada execução apaga a própria área ao terminar, e um lote longo não pode perder os arquivos no meio
+BATCH_WORKSPACES_DIR = os.environ.get('BATCH_WORKSPACES_DIR', os.path.join(os.path.dirname(__file__), 'temp_lotes'))
+
+# Tempo (s) que a área de trabalho é mantida após o fim do job / sem acesso
+WORKSPACE_TTL_SECONDS = int(os.environ.get('WORKSPACE_TTL_SECONDS', '900'))
+
+# Intervalo (s) entre as varreduras do faxineiro de áreas de trabalho
+WORKSPACE_SWEEP_SECONDS = int(os.environ.get('WORKSPACE_SWEEP_SECONDS', '60'))
+
+
+def directory_size(path):
+    """
+    Soma o tamanho (bytes) de todos os arquivos dentro de 'path'.
+    """
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for file_name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, file_name))
+            except OSError:
+                pass
+    return total
+
+
+def link_or_copy(source_path, target_path):
+    """
+    Coloca o arquivo em 'target_path' sem alterar o original: usa um hard link quando possível
+    (mesmo disco) e uma cópia nos demais casos. Retorna o tamanho em bytes.
+    """
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    try:
+        os.link(source_path, target_path)
+    except OSError:
+        shutil.copy2(source_path, target_path)
+    return os.path.getsize(target_path)
+
+
+class Workspace:
+    """
+    Área de trabalho isolada de um job:
+    - input: arquivos enviados pelo usuário (e textos extraídos salvos durante a verificação).
+    - Relatorios: pastas OK/Non-conformity do job, antes de serem movidas para o destino final.
+    - originais: cópia (hard links) dos arquivos a verificar, para retomar um job interrompido.
+    Assim, jobs simultâneos não apagam nem misturam os arquivos uns dos outros.
+    """
+
+    def __init__(self, job_id, base_dir=WORKSPACES_DIR):
+        self.job_id = job_id
+        self.root = os.path.join(base_dir, job_id)
+        self.input_dir = os.path.join(self.root, 'input')
+        self.relatorios_dir = os.path.join(self.root, 'Relatorios')
+        self.originals_dir = os.path.join(self.root, 'originais')
+
+    def create(self):
+        os.makedirs(self.input_dir, exist_ok=True)
+        return self
+
+    def add_file(self, source_path, relative_path):
+        """
+        Coloca um arquivo local em input/'relative_path' (ver link_or_copy). Retorna o tamanho em bytes.
+        """
+        return link_or_copy(source_path, os.path.join(self.input_dir, relative_path))
+
+
+class WorkspaceJanitor:
+    """
+    Faxineiro único (thread de longa duração) das áreas de trabalho.
+    Acompanha o estado de cada job e o último acesso à sua área de trabalho, e só
+    apaga a pasta depois que o job terminou e o TTL expirou; pastas que não pertencem
+    a nenhum job conhecido (ex.: sobras de uma execução anterior do servidor) são
+    apagadas quando ficam sem modificação por mais que o TTL.
+    """
+
+    def __init__(self, base_dir=WORKSPACES_DIR, ttl=WORKSPACE_TTL_SECONDS, interval=WORKSPACE_SWEEP_SECONDS):
+        self.base_dir = base_dir
+        self.ttl = ttl
+        self.interval = interval
+        self.reclaimed_bytes = 0
+        self.reclaimed_workspaces = 0
+        self._workspaces = {}
+        self._expire_callbacks = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, workspace):
+        """
+        Passa a acompanhar a área de trabalho de um job em andamento.
+        """
+        with self._lock:
+            self._workspaces[workspace.job_id] = {
+                'workspace': workspace,
+                'state': 'active',
+                'last_access': time.time(),
+            }
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='checkinho-janitor', daemon=True)
+                self._thread.start()
+
+    def on_expire(self, callback):
+        """
+        Registra callback(job_id), chamado quando a área de trabalho de um job concluído expira
+        (ex.: para a fila de jobs esquecer o job).
+        """
+        with self._lock:
+            self._expire_callbacks.append(callback)
+
+    def touch(self, job_id):
+        with self._lock:
+            entry = self._workspaces.get(job_id)
+            if entry:
+                entry['last_access'] = time.time()
+
+    def release(self, job_id):
+        """
+        Marca o job como concluído; a área de trabalho será apagada após o TTL.
+        """
+        with self._lock:
+            entry = self._workspaces.get(job_id)
+            if entry:
+                entry['state'] = 'done'
+                entry['last_access'] = time.time()
+
+    def sweep(self, now=None):
+        """
+        Apaga as áreas de trabalho de jobs concluídos cujo TTL expirou e as pastas órfãs antigas.
+        """
+        now = now or time.time()
+        expired = []
+        expired_jobs = []
+        with self._lock:
+            for job_id, entry in list(self._workspaces.items()):
+                if entry['state'] == 'done' and now - entry['last_access'] >= self.ttl:
+                    expired.append(entry['workspace'].root)
+                    expired_jobs.append(job_id)
+                    del self._workspaces[job_id]
+            known = {entry['workspace'].root for entry in self._workspaces.values()}
+            callbacks = list(self._expire_callbacks)
+
+        for job_id in expired_jobs:
+            for callback in callbacks:
+                try:
+                    callback(job_id)
+                except Exception as e:
+                    logging.error(f"Erro ao expirar o job {job_id}: {e}")
+
+        if os.path.isdir(self.base_dir):
+            for name in os.listdir(self.base_dir):
+                path = os.path.join(self.base_dir, name)
+                if path in known or path in expired or not os.path.isdir(path):
+                    continue
+                try:
+                    if now - os.path.getmtime(path) >= self.ttl:
+                        expired.append(path)
+                except OSError:
+                    pass
+
+        for path in expired:
+            size = directory_size(path)
+            try:
+                shutil.rmtree(path)
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logging.error(f"Erro ao apagar a área de trabalho {path}: {e}")
+                continue
+            with self._lock:
+                self.reclaimed_bytes += size
+                self.reclaimed_workspaces += 1
+            logging.info(f"Área de trabalho {path} apagada ({size} bytes liberados).")
+        return len(expired)
+
+    def count(self, state):
+        """
+        Quantidade de áreas de trabalho acompanhadas no estado 'state' ('active' ou 'done').
+        """
+        with self._lock:
+            return sum(1 for entry in self._workspaces.values() if entry['state'] == state)
+
+    def disk_usage(self):
+        """
+        Bytes ocupados por todas as áreas de trabalho (inclusive as órfãs).
+        """
+        return directory_size(self.base_dir) if os.path.isdir(self.base_dir) else 0
+
+    def stats(self):
+        """
+        Métricas das áreas de trabalho: quantidade por estado, uso de disco e espaço já liberado.
+        """
+        with self._lock:
+            reclaimed_bytes = self.reclaimed_bytes
+            reclaimed_workspaces = self.reclaimed_workspaces
+        return {
+            'active_workspaces': self.count('active'),
+            'done_workspaces': self.count('done'),
+            'disk_usage_bytes': self.disk_usage(),
+            'reclaimed_bytes': reclaimed_bytes,
+            'reclaimed_workspaces': reclaimed_workspaces,
+        }
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                if self.sweep():
+                    logging.info(f"Áreas de trabalho: {self.stats()}")
+            except Exception as e:
+                logging.error(f"Erro na varredura das áreas de trabalho: {e}")
+
+
+workspace_janitor = WorkspaceJanitor()
@@ -0,0 +1,154 @@
+# engine_parity.py
+#
+# Compara os motores de extração de texto (pdfplumber, PyPDF2, PDFMiner, PyMuPDF)
+# nos PDFs de exemplo: tempo de extração e se extract_fields gera os mesmos campos
+# que o motor padrão configurado para cada tipo de documento.
+#
+# Uso:
+#   python bench/engine_parity.py ["../Arquivos - Teste"] [--engines pdfplumber,pymupdf] [--json saida.json]
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(THIS_DIR), 'app'))
+
+from engines import ENGINES, DOCUMENT_ENGINES, get_engine  # noqa: E402
+from services import (  # noqa: E402
+    extract_fields,
+    determine_sicaf_type,
+    extract_text_with_format_adjustment,
+    extract_text_with_pdfminer_layout,
+)
+
+DEFAULT_SAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(THIS_DIR)), 'Arquivos - Teste')
+
+
+def classify_document(file_name):
+    """
+    Classifica o PDF pelo nome, na mesma ordem usada em upload_files para pastas de PI.
+    """
+    name = file_name.upper()
+    for document_type in ('OS', 'AP', 'SICAF', 'AT'):
+        if document_type in name:
+            return document_type
+    return None
+
+
+def collect_documents(samples_dir):
+    """
+    Lista (caminho, tipo) dos PDFs de exemplo, ignorando arquivos repetidos (mesmo SHA-256).
+    """
+    documents = []
+    seen = set()
+    for root, dirs, files in os.walk(samples_dir):
+        dirs.sort()
+        for file_name in sorted(files):
+            if not file_name.lower().endswith('.pdf'):
+                continue
+            document_type = classify_document(file_name)
+            if document_type is None:
+                continue
+            path = os.path.join(root, file_name)
+            with open(path, 'rb') as file:
+                digest = hashlib.sha256(file.read()).hexdigest()
+            if digest in seen:
+                continue
+            seen.add(digest)
+            documents.append((path, document_type))
+    return documents
+
+
+def extract_with(path, document_type, engine):
+    """
+    Extrai o texto do documento com o motor informado, com o mesmo pós-processamento
+    usado em verify_documents para o tipo de documento.
+    """
+    if document_type == 'SICAF2':
+        return extract_text_with_pdfminer_layout(path, engine=engine)
+    return extract_text_with_format_adjustment(path, engine=engine)
+
+
+def run(samples_dir, engine_names):
+    results = []
+    for path, document_type in collect_documents(samples_dir):
+        if document_type == 'SICAF':
+            reference_text = extract_with(path, 'SICAF', get_engine(DOCUMENT_ENGINES['SICAF']))
+            if determine_sicaf_type(reference_text) == 'SICAF2':
+                document_type = 'SICAF2'
+        fields_type = 'SICAF' if document_type == 'SICAF2' else document_type
+
+        reference_engine = get_engine(DOCUMENT_ENGINES[document_type])
+        reference_fields = extract_fields(extract_with(path, document_type, reference_engine), fields_type)
+
+        for engine_name in engine_names:
+            engine = get_engine(engine_name)
+            start = time.perf_counter()
+            text = extract_with(path, document_type, engine)
+            elapsed = time.perf_counter() - start
+            fields = extract_fields(text, fields_type)
+            differences = sorted(
+                key for key in set(fields) | set(reference_fields)
+                if fields.get(key) != reference_fields.get(key)
+            )
+            results.append({
+                'file': os.path.relpath(path, samples_dir),
+                'type': document_type,
+                'engine': engine_name,
+                'reference': reference_engine.name,
+                'seconds': round(elapsed, 4),
+                'identical': not differences,
+                'differences': differences,
+            })
+    return results
+
+
+def print_report(results, engine_names):
+    print(f"{'TIPO':<7} {'MOTOR':<11} {'TEMPO (s)':>9}  IGUAL  ARQUIVO")
+    for result in results:
+        identical = 'sim' if result['identical'] else 'NÃO'
+        print(f"{result['type']:<7} {result['engine']:<11} {result['seconds']:>9.4f}  {identical:<5}  {result['file']}")
+        if result['differences']:
+            print(f"{'':<36}campos diferentes: {', '.join(result['differences'])}")
+
+    print()
+    print(f"{'MOTOR':<11} {'TEMPO TOTAL (s)':>15}  IGUAIS")
+    for engine_name in engine_names:
+        rows = [r for r in results if r['engine'] == engine_name]
+        total = sum(r['seconds'] for r in rows)
+        identical = sum(1 for r in rows if r['identical'])
+        print(f"{engine_name:<11} {total:>15.4f}  {identical}/{len(rows)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paridade e velocidade dos motores de extração de texto.")
+    parser.add_argument('samples_dir', nargs='?', default=DEFAULT_SAMPLES_DIR,
+                        help="Pasta com os PDFs de exemplo (padrão: 'Arquivos - Teste').")
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                        help="Motores a comparar, separados por vírgula.")
+    parser.add_argument('--json', dest='json_path', help="Grava os resultados em JSON neste arquivo.")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    engine_names = [name.strip() for name in args.engines.split(',') if name.strip()]
+    for name in engine_names:
+        get_engine(name)
+
+    results = run(args.samples_dir, engine_names)
+    print_report(results, engine_names)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+    # Código de saída 1 se algum motor divergir do padrão
+    return 0 if all(r['identical'] for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
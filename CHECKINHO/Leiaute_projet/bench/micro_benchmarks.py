@@ -0,0 +1,350 @@
+# micro_benchmarks.py
+#
+# Micro-benchmarks das funções mais executadas na extração de campos e na montagem do
+# relatório: extract_field_value, extract_field_values, extract_fields (por tipo de
+# documento), normalize_razao_social, check_peca_in_at e generate_html_report.
+#
+# Os casos usam os textos reais capturados em bench/textos (os_text_*, ap_text_*, at_text_*
+# e sicaf_text_*, com os mesmos extratores e nomes dos arquivos gravados por verify_documents)
+# e textos sintéticos ampliados (synthetic_docs). O resultado de cada caso é comparado com o
+# gabarito gravado (bench/gabarito_micro.json): uma otimização dessas funções precisa ser
+# mais rápida e dar exatamente o mesmo resultado.
+#
+# Uso:
+#   python bench/micro_benchmarks.py [--filtro extract_fields] [--tempo 0.05] [--json saida.json]
+#                                    [--comparar anterior.json] [--detalhes]
+#   python bench/micro_benchmarks.py --capturar ["../Arquivos - Teste"]   (regrava bench/textos)
+#   python bench/micro_benchmarks.py --atualizar-gabarito                 (regrava o gabarito)
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import logging
+import argparse
+from functools import partial
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(THIS_DIR), 'app'))
+
+from engine_parity import DEFAULT_SAMPLES_DIR, collect_documents  # noqa: E402
+from synthetic_docs import Generator, filler_lines  # noqa: E402
+from engines import engine_for  # noqa: E402
+from services import (  # noqa: E402
+    CHECK_FIELDS,
+    NON_CONFORMITY,
+    OK,
+    CheckReport,
+    check_peca_in_at,
+    extract_document,
+    extract_field_value,
+    extract_field_values,
+    extract_fields,
+    extract_text_with_pdfminer_layout,
+    generate_html_report,
+    normalize_razao_social,
+    sniff_sicaf_type,
+)
+
+TEXTS_DIR = os.path.join(THIS_DIR, 'textos')
+GOLDEN_PATH = os.path.join(THIS_DIR, 'gabarito_micro.json')
+
+# Prefixo dos arquivos de texto de cada tipo de documento (como em verify_documents)
+TEXT_PREFIXES = {'os_text_': 'OS', 'ap_text_': 'AP', 'at_text_': 'AT', 'sicaf_text_': 'SICAF'}
+
+# Textos sintéticos: fator de ampliação (linhas de preenchimento = 50 x fator)
+SYNTHETIC_SCALES = (1, 5, 25)
+
+# Chamadas avulsas de extract_field_value / extract_field_values, com as mesmas opções
+# usadas em extract_fields
+FIELD_VALUE_CALLS = {
+    'OS': [
+        (['OS Nº', 'OS N°'], {'only_numbers': True}),
+        (['DATA DE INICIO:', 'DATA DE INÍCIO'], {'below': True, 'date_only': True}),
+        (['TITULO DA OS:', 'TÍTULO DA OS'], {'below': True, 'check_next_line_if_empty': True}),
+        (['ORGAO', 'ÓRGÃO'], {'below': True, 'exclude_pattern': r'\d{2}/\d{2}/\d{4}', 'after_dash': True}),
+    ],
+    'AP': [
+        (['OS N°', 'OS Nº', 'OSNº'], {'stop_before': 'VALOR', 'only_numbers': True}),
+        (['DATA EMISSAO', 'DATA EMISSÃO', 'DATAEMISSÃO'], {'date_only': True}),
+        (['CAMPANHA:'], {'stop_before': ['AUT.', 'MEIO:']}),
+        (["AT'SDEPRODUÇÃO", "AT'S DE PRODUÇÃO", 'AT DE PRODUÇÃO:'],
+         {'stop_before': '-', 'exclude_pattern': ':', 'split_by': 'E'}),
+        (['Cnpj: ', 'CNPJ:'], {}),
+    ],
+    'AT': [
+        (['AT '], {'stop_before': 'DATA'}),
+        (['TITULO: ', 'TÍTULO:', 'Título:'], {'stop_before': ['Cores', 'CORES']}),
+        (['Data:', 'DATA:'], {'date_only': True}),
+    ],
+    'SICAF': [
+        (['Razao Social:', 'Razão Social:'], {}),
+        (['CNPJ: ', 'CNPJ:'], {'stop_before': 'Data'}),
+        (['Municipio: ', 'Munícipio:'], {'stop_before': ' N°'}),
+    ],
+}
+FIELD_VALUES_CALLS = {
+    'AP': [
+        (['PEÇA', 'PECA'], {'stop_before': 'FORMATO', 'after_dash': True}),
+        (['FORMATO'], {}),
+    ],
+    'AT': [
+        (['FORMATO:', 'Formato'], {}),
+    ],
+}
+
+# Variações de escrita de razão social (além das encontradas nos textos)
+RAZAO_SOCIAL_VARIANTS = [
+    'TV BAHIA LTDA', 'Tv Bahia Ltda.', 'RÁDIO SOCIEDADE DA BAHIA S/A', 'RADIO SOCIEDADE DA BAHIA S.A.',
+    'RADIO SOCIEDADE DABAHIA SA', 'TELEVISÃO ITAPOAN S.A.', 'Televisao Itapoan S A',
+    'SISTEMA NORDESTE DE COMUNICAÇÃO',
+    'EMPRESA  DE   COMUNICAÇÃO - ME', '', 'JOSÉ & FILHOS COMUNICAÇÕES EIRELI',
+]
+
+
+def capture_texts(samples_dir, texts_dir=TEXTS_DIR):
+    """
+    Extrai os textos dos PDFs de exemplo com os mesmos extratores de verify_documents e os
+    grava em 'texts_dir' com os mesmos nomes (os_text_<subpasta>.txt, at_text_<arquivo>.txt...).
+    """
+    os.makedirs(texts_dir, exist_ok=True)
+    for path, document_type in collect_documents(samples_dir):
+        if document_type == 'SICAF' and sniff_sicaf_type(path) == 'SICAF2':
+            text = extract_text_with_pdfminer_layout(path, engine=engine_for('SICAF2'))
+        else:
+            text, fields, engine = extract_document(path, document_type)
+        if document_type == 'AT':
+            file_name = f"at_text_{os.path.basename(path)}.txt"
+        else:
+            file_name = f"{document_type.lower()}_text_{os.path.basename(os.path.dirname(path))}.txt"
+        with open(os.path.join(texts_dir, file_name), 'w', encoding='utf-8') as file:
+            file.write(text)
+        print(f"{document_type:<6} {file_name}")
+
+
+def load_texts(texts_dir=TEXTS_DIR):
+    """
+    Lista (nome, tipo, texto) dos textos capturados e dos textos sintéticos ampliados.
+    """
+    texts = []
+    for file_name in sorted(os.listdir(texts_dir)) if os.path.isdir(texts_dir) else []:
+        for prefix, document_type in TEXT_PREFIXES.items():
+            if file_name.startswith(prefix) and file_name.endswith('.txt'):
+                with open(os.path.join(texts_dir, file_name), encoding='utf-8') as file:
+                    texts.append((file_name[:-len('.txt')], document_type, file.read()))
+                break
+
+    for scale in SYNTHETIC_SCALES:
+        generated = Generator(seed=scale, pieces=10, ats=3).texts()
+        rng = random.Random(scale)
+        padding = '\n'.join(filler_lines(rng, 50 * scale))
+        for document_type in ('OS', 'AP', 'AT', 'SICAF'):
+            documents = generated[document_type] if document_type == 'AT' else [generated[document_type]]
+            for index, text in enumerate(documents):
+                suffix = f"_{index + 1}" if document_type == 'AT' else ''
+                name = f"{document_type.lower()}_sintetico_x{scale}{suffix}"
+                texts.append((name, document_type, text + '\n' + padding))
+    return texts
+
+
+def build_report(os_fields, ap_fields, at_fields_list, sicaf_fields):
+    """
+    CheckReport com os campos extraídos, um check por campo do formulário e um check de
+    peça (2.2) por peça do AP. Os status são fixos: só a geração do HTML é medida.
+    """
+    report = CheckReport(os_fields, ap_fields, at_fields_list, sicaf_fields)
+    for number, field in enumerate(CHECK_FIELDS, 1):
+        status = NON_CONFORMITY if number % 3 == 0 else OK
+        report.add(str(number), field, field, status, str(ap_fields.get(field) or ''))
+    for key, value in ap_fields.items():
+        if key.startswith('PECA'):
+            report.add('2.2', None, '', OK, f"A peça '{value}' foi encontrada nos ATs")
+    report.engines = {'OS': 'pdfplumber', 'AP': 'pypdf2', 'SICAF': 'pdfplumber'}
+    return report
+
+
+def report_html(report, subfolder_name):
+    return generate_html_report(report, subfolder_name, 'NC', 'status-nc')
+
+
+def build_cases(texts):
+    """
+    Lista (nome, função, chamada sem argumentos) dos casos medidos.
+    """
+    cases = []
+    fields_by_name = {}
+    for name, document_type, text in texts:
+        for labels, options in FIELD_VALUE_CALLS.get(document_type, []):
+            cases.append((f"extract_field_value/{name}/{labels[0].strip()}", 'extract_field_value',
+                          partial(extract_field_value, text, labels, **options)))
+        for labels, options in FIELD_VALUES_CALLS.get(document_type, []):
+            cases.append((f"extract_field_values/{name}/{labels[0].strip()}", 'extract_field_values',
+                          partial(extract_field_values, text, labels, **options)))
+        cases.append((f"extract_fields/{name}", 'extract_fields', partial(extract_fields, text, document_type)))
+        fields_by_name[name] = (document_type, extract_fields(text, document_type))
+
+    # Razões sociais de APs e SICAFs, mais variações de escrita
+    razoes_sociais = sorted({
+        fields.get('Razão social') for document_type, fields in fields_by_name.values()
+        if fields.get('Razão social')
+    } | set(RAZAO_SOCIAL_VARIANTS))
+    cases.append(('normalize_razao_social/todas', 'normalize_razao_social',
+                  lambda: [normalize_razao_social(value) for value in razoes_sociais]))
+
+    # Peças de todos os APs procuradas em cada AT (encontradas ou não)
+    pieces = sorted({
+        value for document_type, fields in fields_by_name.values() if document_type == 'AP'
+        for key, value in fields.items() if key.startswith('PECA') and value
+    })
+    for name, document_type, text in texts:
+        if document_type == 'AT':
+            cases.append((f"check_peca_in_at/{name}", 'check_peca_in_at',
+                          partial(lambda at_text: [check_peca_in_at(at_text, piece) for piece in pieces], text)))
+
+    # Relatório de cada AP, com a OS, os ATs e o SICAF de mesmo nome (quando capturados)
+    at_fields_by_number = {}
+    for name, (document_type, fields) in fields_by_name.items():
+        if document_type == 'AT' and fields.get('AT'):
+            at_fields_by_number.setdefault(fields['AT'], dict(fields, FILE_NAME=name))
+    for name, (document_type, ap_fields) in fields_by_name.items():
+        if document_type != 'AP':
+            continue
+        suffix = name[len('ap_'):]
+        at_numbers = ap_fields.get('AT DE PRODUCAO') or []
+        if isinstance(at_numbers, str):
+            at_numbers = [at_numbers]
+        report = build_report(
+            fields_by_name.get(f'os_{suffix}', (None, None))[1],
+            ap_fields,
+            [at_fields_by_number[number] for number in at_numbers if number in at_fields_by_number],
+            fields_by_name.get(f'sicaf_{suffix}', (None, None))[1],
+        )
+        cases.append((f"generate_html_report/{name}", 'generate_html_report', partial(report_html, report, name)))
+    return cases
+
+
+def comparable(function_name, result):
+    """
+    Resultado no formato gravado no gabarito (HTML: SHA-256 e tamanho).
+    """
+    if function_name == 'generate_html_report':
+        return {'sha256': hashlib.sha256(result.encode('utf-8')).hexdigest(), 'tamanho': len(result)}
+    return json.loads(json.dumps(result, ensure_ascii=False))
+
+
+def measure(call, min_time):
+    """
+    Executa 'call' repetidamente por pelo menos 'min_time' segundos (e 3 vezes).
+    Retorna o resultado, o menor e o tempo médio por chamada e o número de chamadas.
+    """
+    result = call()
+    calls, elapsed, best = 0, 0.0, float('inf')
+    while elapsed < min_time or calls < 3:
+        start = time.perf_counter()
+        call()
+        seconds = time.perf_counter() - start
+        best = min(best, seconds)
+        elapsed += seconds
+        calls += 1
+    return result, best, elapsed / calls, calls
+
+
+def run(cases, golden, min_time):
+    results = []
+    for name, function_name, call in cases:
+        result, best, mean, calls = measure(call, min_time)
+        value = comparable(function_name, result)
+        if name not in golden:
+            status = 'sem gabarito'
+        elif golden[name] == value:
+            status = 'igual'
+        else:
+            status = 'DIFERENTE'
+        results.append({
+            'case': name,
+            'function': function_name,
+            'calls': calls,
+            'best_us': round(best * 1e6, 2),
+            'mean_us': round(mean * 1e6, 2),
+            'golden': status,
+            'value': value,
+        })
+    return results
+
+
+def print_report(results, previous=None, details=False):
+    previous = {r['case']: r for r in (previous or [])}
+    if details:
+        print(f"{'MÉDIA (µs)':>11} {'MELHOR (µs)':>11}  {'GABARITO':<12} CASO")
+        for result in results:
+            print(f"{result['mean_us']:>11.1f} {result['best_us']:>11.1f}  {result['golden']:<12} {result['case']}")
+        print()
+
+    print(f"{'FUNÇÃO':<24} {'CASOS':>5} {'SOMA DAS MÉDIAS (µs)':>20} {'ANTERIOR':>10} {'GANHO':>7}  GABARITO")
+    for function_name in dict.fromkeys(r['function'] for r in results):
+        rows = [r for r in results if r['function'] == function_name]
+        total = sum(r['mean_us'] for r in rows)
+        compared = [previous[r['case']]['mean_us'] for r in rows if r['case'] in previous]
+        before = f"{sum(compared):>10.1f}" if len(compared) == len(rows) else f"{'-':>10}"
+        speedup = f"{sum(compared) / total:>6.2f}x" if len(compared) == len(rows) and total else f"{'-':>7}"
+        different = sum(1 for r in rows if r['golden'] == 'DIFERENTE')
+        missing = sum(1 for r in rows if r['golden'] == 'sem gabarito')
+        golden = 'igual' if not different and not missing else f"{different} diferentes, {missing} sem gabarito"
+        print(f"{function_name:<24} {len(rows):>5} {total:>20.1f} {before} {speedup}  {golden}")
+
+    for result in results:
+        if result['golden'] == 'DIFERENTE':
+            print(f"DIFERENTE do gabarito: {result['case']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de extração de campos e relatório, com gabarito.")
+    parser.add_argument('--capturar', nargs='?', const=DEFAULT_SAMPLES_DIR, metavar='PASTA',
+                        help="Regrava bench/textos a partir dos PDFs de exemplo (padrão: 'Arquivos - Teste').")
+    parser.add_argument('--atualizar-gabarito', action='store_true',
+                        help="Grava os resultados atuais como gabarito (após conferir que estão corretos).")
+    parser.add_argument('--filtro', default='', help="Executa apenas os casos cujo nome contém este trecho.")
+    parser.add_argument('--tempo', type=float, default=0.05, help="Tempo mínimo de medição de cada caso (s).")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior (--json) para comparar os tempos.")
+    parser.add_argument('--detalhes', action='store_true', help="Mostra o tempo de cada caso.")
+    parser.add_argument('--json', dest='json_path', help="Grava os resultados em JSON neste arquivo.")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    if args.capturar:
+        capture_texts(args.capturar)
+        return 0
+
+    golden = {}
+    if os.path.exists(GOLDEN_PATH):
+        with open(GOLDEN_PATH, encoding='utf-8') as file:
+            golden = json.load(file)
+
+    cases = [case for case in build_cases(load_texts()) if args.filtro in case[0]]
+    results = run(cases, golden, args.tempo)
+
+    previous = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as file:
+            previous = json.load(file)
+    print_report(results, previous, args.detalhes)
+
+    if args.atualizar_gabarito:
+        golden.update({r['case']: r['value'] for r in results})
+        with open(GOLDEN_PATH, 'w', encoding='utf-8') as file:
+            json.dump(golden, file, ensure_ascii=False, indent=1, sort_keys=True)
+        print(f"Gabarito atualizado: {len(results)} casos em {GOLDEN_PATH}")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as file:
+            json.dump([{key: value for key, value in r.items() if key != 'value'} for r in results],
+                      file, ensure_ascii=False, indent=2)
+
+    # Código de saída 1 se algum resultado divergir do gabarito
+    return 1 if any(r['golden'] == 'DIFERENTE' for r in results) and not args.atualizar_gabarito else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,484 @@
+# synthetic_docs.py
+#
+# Gera PDFs sintéticos de OS (OS1/OS2), AP, AT e SICAF (SICAF1/SICAF2) com o mesmo
+# leiaute de texto dos documentos reais e os organiza nas pastas que upload_files espera:
+# - pastas de PI (LOTE/PI n): OS, AP, ATs e SICAF na própria pasta;
+# - pastas "campanha": OS e ATs na pasta, AP e SICAF em cada subpasta.
+# O arquivo gabarito.json lista cada subpasta com o status esperado (OK ou NC) e,
+# quando há, o defeito inserido de propósito.
+#
+# Uso:
+#   python bench/synthetic_docs.py saida [--pis 10] [--campanhas 1] [--subpastas 10] [--pecas 2]
+#                                        [--ats 1] [--paginas 1] [--formatos '30",60"'] [--nc 0.1] [--seed 1]
+
+import os
+import sys
+import json
+import random
+import argparse
+from datetime import date, timedelta
+
+import pymupdf
+
+# Textos usados nos documentos
+TITLES = [
+    'GOVERNO PRESENTE, FUTURO PRA GENTE 2024', 'REGIONAIS BAHIA 2024.2', 'CARNAVAL 2024',
+    'SÃO JOÃO DA BAHIA 2024', 'VACINAÇÃO CONTRA A GRIPE', 'VERÃO NA BAHIA', 'BAHIA QUE FAZ',
+    'SEGURANÇA NAS ESTRADAS', 'VOLTA ÀS AULAS 2024', 'BAHIA SEM FOME',
+]
+PIECES = [
+    'INSTITUCIONAL 1', 'INSTITUCIONAL 2', 'REGIONAIS BA 02 05', 'REGIONAIS BA 04 05', 'JINGLE VERÃO',
+    'SPOT PRESENTE 2', 'CLIPE INST 2024 01 05', 'FILME SAUDE 30', 'CARTELA SERVICOS', 'TESTEMUNHAL ESCOLA',
+]
+SUPPLIERS = [
+    ('TV BAHIA LTDA', 'REDE BAHIA'), ('RÁDIO SOCIEDADE DA BAHIA S/A', 'SOCIEDADE AM'),
+    ('TELEVISÃO ITAPOAN S.A.', 'TV ITAPOAN'), ('RÁDIO EXCELSIOR DA BAHIA LTDA', 'EXCELSIOR FM'),
+    ('TV SUBAÉ LTDA', 'TV SUBAÉ'), ('RÁDIO POVO DE FEIRA LTDA', 'POVO FM'),
+    ('TV SUDOESTE LTDA', 'TV SUDOESTE'), ('SISTEMA NORDESTE DE COMUNICAÇÃO LTDA', 'NORDESTE FM'),
+]
+MUNICIPIOS = ['SALVADOR', 'FEIRA DE SANTANA', 'VITÓRIA DA CONQUISTA', 'ILHÉUS', 'JUAZEIRO', 'BARREIRAS']
+MEIOS = [('TELEVISAO', 'TV', 'FILME'), ('RADIO', 'RD', 'JINGLE')]
+
+# Palavras do texto de preenchimento (em minúsculas, para não coincidir com nenhum rótulo)
+FILLER_WORDS = [
+    'veiculação', 'inserções', 'programação', 'horário', 'comercial', 'praça', 'intervalo', 'emissora',
+    'audiência', 'valor', 'bruto', 'líquido', 'desconto', 'negociado', 'faixa', 'semana', 'rede',
+    'regional', 'local', 'grade', 'conforme', 'plano', 'de', 'mídia', 'aprovado', 'pelo', 'cliente',
+]
+
+# Defeitos que tornam uma subpasta não conforme (e o check que os acusa)
+DEFECTS = {
+    'os': 'OS N° do AP diferente da OS (1.1)',
+    'data': 'DATA EMISSÃO do AP anterior ao início da OS (1.2)',
+    'peca': 'peça do AP ausente dos ATs (2.2)',
+    'cnpj': 'CNPJ do SICAF diferente do AP (3.2)',
+    'municipio': 'Município do SICAF diferente do AP (3.3)',
+}
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+FONT_SIZE = 8
+LINE_HEIGHT = 11
+MARGIN = 36
+
+
+def _br_date(value):
+    return value.strftime('%d/%m/%Y')
+
+
+def _cnpj(rng):
+    """
+    CNPJ aleatório (com dígitos verificadores válidos) no formato XX.XXX.XXX/XXXX-XX.
+    """
+    digits = [rng.randint(0, 9) for _ in range(8)] + [0, 0, 0, 1]
+    for weights in ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]):
+        remainder = sum(d * w for d, w in zip(digits, weights)) % 11
+        digits.append(0 if remainder < 2 else 11 - remainder)
+    text = ''.join(map(str, digits))
+    return f'{text[:2]}.{text[2:5]}.{text[5:8]}/{text[8:12]}-{text[12:]}'
+
+
+def filler_lines(rng, count):
+    """
+    Linhas de texto de preenchimento (sem nenhum rótulo procurado por extract_fields).
+    """
+    return [' '.join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(8, 14))) for _ in range(count)]
+
+
+def _save(document, path, salt=None):
+    # Sem /ID aleatório, o mesmo conteúdo gera sempre os mesmos bytes; 'salt' vai nos
+    # metadados e muda os bytes (e o SHA-256) do PDF sem mudar o texto
+    if salt:
+        document.set_metadata({'keywords': salt})
+    document.save(path, no_new_id=True)
+    document.close()
+
+
+def write_pdf(path, lines, pages=1, rng=None, salt=None):
+    """
+    Grava as linhas em um PDF (uma linha de texto por linha do PDF, com quebra de página
+    automática) e completa o documento com páginas de texto de preenchimento até 'pages'.
+    """
+    rng = rng or random.Random(0)
+    per_page = (PAGE_HEIGHT - 2 * MARGIN) // LINE_HEIGHT
+    chunks = [lines[i:i + per_page] for i in range(0, len(lines), per_page)] or [[]]
+    while len(chunks) < pages:
+        chunks.append(filler_lines(rng, per_page))
+
+    document = pymupdf.open()
+    for chunk in chunks:
+        page = document.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        for i, line in enumerate(chunk):
+            page.insert_text((MARGIN, MARGIN + (i + 1) * LINE_HEIGHT), line, fontsize=FONT_SIZE, fontname='helv')
+    _save(document, path, salt)
+
+
+def write_grid_pdf(path, header, rows, pages=1, rng=None, salt=None):
+    """
+    Grava uma grade (cabeçalho e linhas em colunas), como o SICAF exportado para Excel (SICAF2).
+    """
+    rng = rng or random.Random(0)
+    width, height = PAGE_HEIGHT, PAGE_WIDTH  # Paisagem
+    column_width = (width - 2 * MARGIN) / len(header)
+    document = pymupdf.open()
+    page = document.new_page(width=width, height=height)
+    page.insert_text((MARGIN, MARGIN), 'Exportar Dados Para Excel - Grade', fontsize=FONT_SIZE + 2, fontname='helv')
+    for row_number, row in enumerate([header] + rows):
+        y = MARGIN + (row_number + 2) * LINE_HEIGHT
+        for column, value in enumerate(row):
+            page.insert_text((MARGIN + column * column_width, y), value, fontsize=FONT_SIZE - 2, fontname='helv')
+    for _ in range(pages - 1):
+        page = document.new_page(width=width, height=height)
+        for i, line in enumerate(filler_lines(rng, 20)):
+            page.insert_text((MARGIN, MARGIN + (i + 1) * LINE_HEIGHT), line, fontsize=FONT_SIZE, fontname='helv')
+    _save(document, path, salt)
+
+
+def os_lines(order, rng):
+    """
+    Texto da OS: OS1 (e-mail de Leiaute com a OS) ou OS2 (OS do sistema da SECOM).
+    """
+    start = _br_date(order['start'])
+    if order['type'] == 'OS1':
+        return [
+            f"{start}, 10:{rng.randint(10, 59)} E-mail de Leiaute Comunicação - Ordem de Serviço",
+            'Atendimento Leiaute <atendimento@leiaute.com.br>',
+            'Ordem de Serviço',
+            '1 mensagem',
+            f"ESTADO DA BAHIA OS Nº {order['number']} / {order['year']}",
+            'SECRETARIA DE COMUNICAÇÃO',
+            'SOCIAL - SECOM ORDEM DE SERVIÇO',
+            'PUBLICIDADE - OS',
+            'DATA DE INÍCIO: ÓRGÃO:',
+            f"{start} SECRETARIA DE COMUNICAÇÃO SOCIAL - SECOM",
+            'TÍTULO DA OS:',
+            order['title'],
+            'DESCRIÇÃO DA OS:',
+            *filler_lines(rng, 4),
+            'TIPO DA CAMPANHA:',
+            'Nº DO PROCESSO DE SELEÇÃO INTERNA:',
+            order['kind'],
+            'PÚBLICO ALVO:',
+            *filler_lines(rng, 3),
+        ]
+    return [
+        'GOVERNO DO ESTADO DA BAHIA',
+        'SECRETARIA DE COMUNICAÇÃO SOCIAL',
+        'ORDEM DE SERVIÇO DE PUBLICIDADE',
+        'OS Nº',
+        f"{order['number']}/{order['year']}",
+        'DATA DE INÍCIO: ÓRGÃO:',
+        f"{start} SECRETARIA DE COMUNICAÇÃO SOCIAL - SECOM",
+        'TÍTULO DA OS:',
+        order['title'],
+        'TIPO DA CAMPANHA: Nº DO PROCESSO DE SELEÇÃO INTERNA:',
+        f"{order['kind']} {rng.randint(10 ** 19, 10 ** 20 - 1):020d}",
+        'DESCRIÇÃO DA OS:',
+        *filler_lines(rng, 6),
+    ]
+
+
+def at_lines(order, at, rng):
+    """
+    Texto de um AT (Autorização de Trabalho) com as peças que ele produz; como nos ATs
+    reais, o campo Formato traz todos os formatos da OS (cada AT é conferido com todos
+    os formatos do AP).
+    """
+    formats = list(dict.fromkeys(piece_format for piece, piece_format in order['pieces']))
+    return [
+        'Leiaute Comunicação e Propaganda Ltda',
+        'Autorização de Trabalho',
+        'Rua Cel. Almerindo Rehem, 126 / 1º Andar',
+        '41820-768 SALVADOR-BA',
+        'FONE (71) 2106-6900 FAX (71) 2106-6970',
+        f"CNPJ: 16.088.593/0001-20 AT {at['number']}",
+        'Inscr. Municipal: 05651600172',
+        'E-Mail: faturamento@leiaute.com.br',
+        f"www.leiaute.com.br DATA: {_br_date(at['date'])}",
+        'Cliente:SECOM - BA CNPJ: 13.722.180/0001-67',
+        f"Campanha:{order['title']} PIT: SCS-{rng.randint(1, 999):04d}/{order['year'] % 100}",
+        f"Produto:SECOM Meio: {order['medium']}",
+        f"Espécie:{order['species']} Formato: {' E '.join(formats)}",
+        f"Título:{'/ '.join(piece for piece, piece_format in at['pieces'])} Cores:",
+        'Acabamento:-',
+        'Pz.Entrega: Validade: 60DD',
+        f"C.Custo: {order['kind']}",
+        'ESPECIFICAÇÕES',
+        *filler_lines(rng, 5),
+        'TITULOS:',
+        *[f"{piece_format}: {piece}" for piece, piece_format in at['pieces']],
+        f"OS Nº {order['number']}/{order['year']}",
+        'C U S T O S F I X O S',
+        *filler_lines(rng, 4),
+    ]
+
+
+def ap_lines(order, authorization, rng):
+    """
+    Texto de um AP (Autorização de Publicação): cabeçalho, peças, fornecedor (município,
+    veículo, razão social e CNPJ, nessa ordem) e, no rodapé, os ATs e a OS.
+    """
+    supplier = authorization['supplier']
+    at_numbers = [str(number) for number in authorization['at_numbers']]
+    at_label = "AT'S DE PRODUÇÃO" if len(at_numbers) > 1 else 'AT DE PRODUÇÃO'
+    lines = [
+        'Leiaute Comunicação e Propaganda Ltda',
+        'Rua Cel. Almerindo Rehem, 126 / 1º Andar',
+        '41820-768 SALVADOR - BA',
+        'FONE (71) 2106-6900',
+        'CNPJ: 16.088.593/0001-20',
+        'E-mail: faturamento@leiaute.com.br AUTORIZAÇÃO DE PUBLICAÇÃO',
+        f"DATA EMISSÃO: {_br_date(authorization['date'])} AP {authorization['number']}",
+        f"N°PI: {authorization['pi']}",
+        f"CLIENTE: SECOM - BA VEÍCULO: {supplier['fantasia']} MEIO: {order['medium']}",
+        f"PRODUTO: SECOM CAMPANHA: {order['title']} AUT.CLIENTE: {order['kind']}",
+        f"PERÍODO: {authorization['date'].month:02d}/{authorization['date'].year}",
+    ]
+    for letter, (piece, piece_format) in zip('BCDEFGHIJKLMNOPQRSTUVWXYZ', authorization['pieces']):
+        lines.append(f"PEÇA - {letter} {piece} FORMATO {piece_format}")
+    lines += filler_lines(rng, 6)
+    lines += [
+        f"{supplier['municipio']} - BA/BA",
+        supplier['fantasia'],
+        supplier['razao_social'],
+        f"Cnpj: {supplier['cnpj']}",
+    ]
+    lines += filler_lines(rng, 8)
+    lines += [
+        f"{at_label}: {' E '.join(at_numbers)} - LEIAUTE",
+        f"OS Nº {authorization['os_number']}/{order['year']}",
+    ]
+    return lines
+
+
+def sicaf1_lines(sicaf, rng):
+    """
+    Texto do SICAF1 (relatório do fornecedor).
+    """
+    return [
+        'Relatório - Fornecedor de Produção e/ou Mídia',
+        f"Emitido em: {_br_date(sicaf['date'])}",
+        'Dados do Fornecedor',
+        f"Razão Social: {sicaf['razao_social']}",
+        f"Nome Fantasia: {sicaf['fantasia']}",
+        f"CNPJ: {sicaf['cnpj']} Data da Validação: {_br_date(sicaf['date'])}",
+        f"Endereço: RUA {rng.choice(FILLER_WORDS).upper()}, {rng.randint(1, 999)}",
+        f"Munícipio: {sicaf['municipio']} N°:{rng.randint(1, 999)}",
+        f"UF: BA CEP: {rng.randint(40000, 48999)}-{rng.randint(0, 999):03d}",
+        *filler_lines(rng, 6),
+    ]
+
+
+def sicaf2_grid(sicaf, rng):
+    """
+    Cabeçalho e linha da grade do SICAF2.
+    """
+    header = ['ID', 'CNPJ', 'Nome Fantasia', 'Razão Social', 'Município', 'UF', 'Situação']
+    row = [str(rng.randint(1000, 9999)), sicaf['cnpj'], sicaf['fantasia'], sicaf['razao_social'],
+           sicaf['municipio'], 'BA', 'CREDENCIADO']
+    return header, [row]
+
+
+class Generator:
+    """
+    Monta OS, ATs, APs e SICAFs coerentes entre si (mesmos números, títulos, datas, peças e
+    fornecedores), inserindo defeitos com probabilidade 'nc_rate'.
+    Com a mesma semente, o texto gerado é sempre o mesmo; 'salt' (gravado nos metadados)
+    permite gerar PDFs com o mesmo texto e SHA-256 diferentes.
+    """
+
+    def __init__(self, seed=1, pieces=2, ats=1, pages=1, formats=('30"', '60"'), nc_rate=0.0,
+                 os_types=('OS1', 'OS2'), sicaf_types=('SICAF1', 'SICAF2'), salt=None):
+        self.rng = random.Random(seed)
+        self.pieces = pieces
+        self.ats = ats
+        self.pages = pages
+        self.formats = list(formats)
+        self.nc_rate = nc_rate
+        self.os_types = list(os_types)
+        self.sicaf_types = list(sicaf_types)
+        self.salt = salt
+        self._numbers = {'os': 100, 'at': 35000, 'ap': 103000, 'pi': 99000}
+        self.expected = []
+
+    def _next(self, kind):
+        self._numbers[kind] += self.rng.randint(1, 9)
+        return self._numbers[kind]
+
+    def _order(self):
+        rng = self.rng
+        medium, medium_code, species = rng.choice(MEIOS)
+        start = date(2024, 1, 1) + timedelta(days=rng.randint(0, 240))
+        order = {
+            'type': rng.choice(self.os_types), 'number': self._next('os'), 'year': start.year,
+            'start': start, 'title': rng.choice(TITLES), 'kind': 'INSTITUCIONAL',
+            'medium': medium, 'medium_code': medium_code, 'species': species,
+            'pieces': [(piece, rng.choice(self.formats))
+                       for piece in rng.sample(PIECES, min(self.pieces, len(PIECES)))],
+        }
+        # Cada AT produz parte das peças da OS
+        ats = []
+        for i in range(max(1, min(self.ats, len(order['pieces'])))):
+            ats.append({
+                'number': self._next('at'),
+                'date': start + timedelta(days=rng.randint(1, 20)),
+                'pieces': order['pieces'][i::max(1, min(self.ats, len(order['pieces'])))],
+            })
+        order['ats'] = ats
+        return order
+
+    def _authorization(self, order):
+        """
+        AP e SICAF de uma subpasta, com um defeito (ou nenhum).
+        """
+        rng = self.rng
+        razao_social, fantasia = rng.choice(SUPPLIERS)
+        supplier = {'razao_social': razao_social, 'fantasia': fantasia, 'cnpj': _cnpj(rng),
+                    'municipio': rng.choice(MUNICIPIOS)}
+        authorization = {
+            'number': self._next('ap'), 'pi': self._next('pi'), 'supplier': supplier,
+            'date': max(at['date'] for at in order['ats']) + timedelta(days=rng.randint(1, 15)),
+            'pieces': list(order['pieces']), 'at_numbers': [at['number'] for at in order['ats']],
+            'os_number': order['number'],
+        }
+        sicaf = dict(supplier, type=rng.choice(self.sicaf_types), date=authorization['date'])
+
+        defect = rng.choice(sorted(DEFECTS)) if rng.random() < self.nc_rate else None
+        if defect == 'os':
+            authorization['os_number'] = order['number'] + 1
+        elif defect == 'data':
+            authorization['date'] = order['start'] - timedelta(days=rng.randint(1, 10))
+        elif defect == 'peca':
+            missing = [piece for piece in PIECES if piece not in dict(order['pieces'])]
+            authorization['pieces'].append((rng.choice(missing), rng.choice(self.formats)))
+        elif defect == 'cnpj':
+            sicaf['cnpj'] = _cnpj(rng)
+        elif defect == 'municipio':
+            sicaf['municipio'] = rng.choice([m for m in MUNICIPIOS if m != supplier['municipio']])
+        return authorization, sicaf, defect
+
+    def _write_order(self, folder, order):
+        write_pdf(os.path.join(folder, f"OS {order['number']}.pdf"), os_lines(order, self.rng),
+                  self.pages, self.rng, self.salt)
+        for at in order['ats']:
+            write_pdf(os.path.join(folder, f"AT {at['number']}.pdf"), at_lines(order, at, self.rng),
+                      self.pages, self.rng, self.salt)
+
+    def _write_authorization(self, folder, order, authorization, sicaf):
+        write_pdf(os.path.join(folder, f"AP {authorization['number']}.pdf"),
+                  ap_lines(order, authorization, self.rng), 1, self.rng, self.salt)
+        sicaf_path = os.path.join(folder, 'SICAF.pdf')
+        if sicaf['type'] == 'SICAF1':
+            write_pdf(sicaf_path, sicaf1_lines(sicaf, self.rng), self.pages, self.rng, self.salt)
+        else:
+            header, rows = sicaf2_grid(sicaf, self.rng)
+            write_grid_pdf(sicaf_path, header, rows, self.pages, self.rng, self.salt)
+
+    def _expect(self, folder_name, relative_path, layout, order, sicaf, defect):
+        self.expected.append({
+            'subfolder': folder_name,
+            'path': relative_path,
+            'layout': layout,
+            'os_type': order['type'],
+            'sicaf_type': sicaf['type'],
+            'pieces': len(order['pieces']),
+            'ats': len(order['ats']),
+            'expected': 'NC' if defect else 'OK',
+            'defect': DEFECTS[defect] if defect else None,
+        })
+
+    def texts(self):
+        """
+        Textos de uma pasta de PI sem gerar os PDFs (SICAF sempre SICAF1), como ficariam
+        extraídos: {'OS': texto, 'AP': texto, 'AT': [textos], 'SICAF': texto}.
+        """
+        order = self._order()
+        authorization, sicaf, defect = self._authorization(order)
+        return {
+            'OS': '\n'.join(os_lines(order, self.rng)),
+            'AP': '\n'.join(ap_lines(order, authorization, self.rng)),
+            'AT': ['\n'.join(at_lines(order, at, self.rng)) for at in order['ats']],
+            'SICAF': '\n'.join(sicaf1_lines(sicaf, self.rng)),
+        }
+
+    def pi_folder(self, root, lote='LOTE'):
+        """
+        Pasta de PI com todos os documentos (OS, ATs, AP e SICAF).
+        """
+        order = self._order()
+        authorization, sicaf, defect = self._authorization(order)
+        name = f"PI {authorization['pi']}"
+        folder = os.path.join(root, lote, name)
+        os.makedirs(folder, exist_ok=True)
+        self._write_order(folder, order)
+        self._write_authorization(folder, order, authorization, sicaf)
+        self._expect(name, os.path.join(lote, name), 'pi', order, sicaf, defect)
+
+    def campanha_folder(self, root, subfolders, index=1):
+        """
+        Pasta "campanha": uma OS e seus ATs, e uma subpasta (AP e SICAF) por veículo.
+        """
+        order = self._order()
+        campanha_name = f"Lote {index} - campanha"
+        campanha_dir = os.path.join(root, campanha_name)
+        os.makedirs(campanha_dir, exist_ok=True)
+        self._write_order(campanha_dir, order)
+        for _ in range(subfolders):
+            authorization, sicaf, defect = self._authorization(order)
+            name = f"PI {authorization['pi']}_OFF_AP {authorization['number']}_{order['medium_code']}"
+            folder = os.path.join(campanha_dir, name)
+            os.makedirs(folder, exist_ok=True)
+            self._write_authorization(folder, order, authorization, sicaf)
+            self._expect(name, os.path.join(campanha_name, name), 'campanha', order, sicaf, defect)
+
+
+def generate(output_dir, pis=10, campanhas=0, subfolders=10, **options):
+    """
+    Gera 'pis' pastas de PI (em LOTE/) e 'campanhas' pastas "campanha" com 'subfolders'
+    subpastas cada. Grava e retorna o gabarito (status esperado de cada subpasta).
+    'options' são repassadas ao Generator (seed, pieces, ats, pages, formats, nc_rate, salt...).
+    """
+    generator = Generator(**options)
+    os.makedirs(output_dir, exist_ok=True)
+    for _ in range(pis):
+        generator.pi_folder(output_dir)
+    for index in range(campanhas):
+        generator.campanha_folder(output_dir, subfolders, index + 1)
+
+    with open(os.path.join(output_dir, 'gabarito.json'), 'w', encoding='utf-8') as file:
+        json.dump(generator.expected, file, ensure_ascii=False, indent=2)
+    return generator.expected
+
+
+def _split_list(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera PDFs sintéticos (OS, AP, AT, SICAF) em pastas de upload.")
+    parser.add_argument('output_dir', help="Pasta onde os documentos são gerados.")
+    parser.add_argument('--pis', type=int, default=10, help="Quantidade de pastas de PI (em LOTE/).")
+    parser.add_argument('--campanhas', type=int, default=0, help="Quantidade de pastas \"campanha\".")
+    parser.add_argument('--subpastas', type=int, default=10, help="Subpastas (AP e SICAF) por campanha.")
+    parser.add_argument('--pecas', type=int, default=2, help="Peças por OS/AP.")
+    parser.add_argument('--ats', type=int, default=1, help="ATs por OS (as peças são divididas entre eles).")
+    parser.add_argument('--paginas', type=int, default=1, help="Páginas de OS, ATs e SICAF (completadas com texto).")
+    parser.add_argument('--formatos', default='30",60"', help="Formatos das peças, separados por vírgula.")
+    parser.add_argument('--os-tipos', default='OS1,OS2', help="Tipos de OS sorteados.")
+    parser.add_argument('--sicaf-tipos', default='SICAF1,SICAF2', help="Tipos de SICAF sorteados.")
+    parser.add_argument('--nc', type=float, default=0.0, help="Fração das subpastas com um defeito (0 a 1).")
+    parser.add_argument('--seed', type=int, default=1, help="Semente do gerador aleatório.")
+    args = parser.parse_args()
+
+    expected = generate(
+        args.output_dir, args.pis, args.campanhas, args.subpastas,
+        seed=args.seed, pieces=args.pecas, ats=args.ats, pages=args.paginas,
+        formats=_split_list(args.formatos), nc_rate=args.nc,
+        os_types=_split_list(args.os_tipos), sicaf_types=_split_list(args.sicaf_tipos),
+    )
+    nc = sum(1 for item in expected if item['expected'] == 'NC')
+    print(f"{len(expected)} subpastas geradas em {args.output_dir} ({nc} com defeito).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
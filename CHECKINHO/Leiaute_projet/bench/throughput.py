@@ -0,0 +1,176 @@
+# throughput.py
+#
+# Mede a vazão (subpastas verificadas por segundo) e a latência de cada subpasta
+# (p50/p95 do tempo de verify_documents) do pipeline de verificação (run_batch), com
+# documentos sintéticos (synthetic_docs), para cada combinação de tamanho de lote e
+# número de processos. Também confere o status de cada subpasta com o gabarito.
+#
+# Cada execução usa PDFs novos (mesmo conteúdo, bytes diferentes), para que o cache
+# persistente de extração não seja aproveitado entre execuções; com --cache os mesmos
+# PDFs são reenviados e, a partir da segunda execução, os textos vêm do cache.
+# O app.db usado fica numa pasta temporária, separada do app.db do aplicativo.
+#
+# Uso:
+#   python bench/throughput.py [--lotes 1,5,20] [--workers 1,2,4] [--leiaute pi|campanha]
+#                              [--repeticoes 1] [--pecas 2] [--ats 1] [--paginas 1] [--cache] [--json saida.json]
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(os.path.dirname(THIS_DIR), 'app')
+sys.path.insert(0, APP_DIR)
+
+from synthetic_docs import generate  # noqa: E402
+
+
+def percentile(values, percent):
+    """
+    Percentil pelo método do posto mais próximo (ex.: percentile(latências, 95)).
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def run_once(run_batch, work_dir, batch_size, workers, layout, salt, generator_options):
+    """
+    Gera um lote de 'batch_size' subpastas, executa run_batch (pipeline.run_batch) e retorna as medidas.
+    """
+    upload_dir = os.path.join(work_dir, 'upload')
+    relatorios_folder = os.path.join(work_dir, 'Relatorios')
+    shutil.rmtree(upload_dir, ignore_errors=True)
+    shutil.rmtree(relatorios_folder, ignore_errors=True)
+
+    if layout == 'campanha':
+        expected = generate(upload_dir, pis=0, campanhas=1, subfolders=batch_size, salt=salt, **generator_options)
+    else:
+        expected = generate(upload_dir, pis=batch_size, salt=salt, **generator_options)
+    os.remove(os.path.join(upload_dir, 'gabarito.json'))
+
+    start = time.perf_counter()
+    html_report, summary = run_batch(upload_dir, None, workers, relatorios_folder=relatorios_folder)
+    seconds = time.perf_counter() - start
+
+    statuses = {name: 'OK' for name in summary['ok_processes']}
+    statuses.update({name: 'NC' for name in summary['nc_processes']})
+    divergences = [item['subfolder'] for item in expected if statuses.get(item['subfolder']) != item['expected']]
+    return {
+        'seconds': seconds,
+        'processed': summary['total_subfolders_processed'],
+        'latencies': [timings.get('subfolder', 0.0) for name, timings in summary['subfolder_timings']],
+        'stages': summary['timings']['totals'],
+        'cache_hits': summary['cache_hits'],
+        'divergences': divergences,
+    }
+
+
+def run(batch_sizes, worker_counts, layout, repetitions, use_cache, generator_options):
+    work_dir = tempfile.mkdtemp(prefix='checkinho_bench_')
+    # O app.db (usuários, resultados e cache de extração) é criado na pasta atual ao importar o app
+    os.chdir(work_dir)
+    from pipeline import run_batch
+    # services configura o log em INFO ao ser importado
+    logging.getLogger().setLevel(logging.WARNING)
+    results = []
+    run_number = 0
+    try:
+        for batch_size in batch_sizes:
+            for workers in worker_counts:
+                runs = []
+                for _ in range(repetitions):
+                    run_number += 1
+                    salt = 'cache' if use_cache else f'execucao-{run_number}'
+                    runs.append(run_once(run_batch, work_dir, batch_size, workers, layout, salt, generator_options))
+
+                seconds = sum(r['seconds'] for r in runs)
+                processed = sum(r['processed'] for r in runs)
+                latencies = [latency for r in runs for latency in r['latencies']]
+                stages = {}
+                for r in runs:
+                    for name, total in r['stages'].items():
+                        stages[name] = round(stages.get(name, 0.0) + total, 4)
+                results.append({
+                    'batch_size': batch_size,
+                    'workers': workers,
+                    'runs': repetitions,
+                    'subfolders': processed,
+                    'seconds': round(seconds, 4),
+                    'subfolders_per_second': round(processed / seconds, 3) if seconds else None,
+                    'latency_p50': percentile(latencies, 50),
+                    'latency_p95': percentile(latencies, 95),
+                    'latency_max': max(latencies) if latencies else None,
+                    'stages': stages,
+                    'cache_hits': sum(r['cache_hits'] for r in runs),
+                    'divergences': sorted({name for r in runs for name in r['divergences']}),
+                })
+    finally:
+        os.chdir(THIS_DIR)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def print_report(results):
+    print(f"{'LOTE':>5} {'PROC.':>5} {'SUBPASTAS/S':>11} {'P50 (s)':>8} {'P95 (s)':>8} {'MÁX (s)':>8}  GABARITO")
+    for result in results:
+        matches = 'ok' if not result['divergences'] else f"{len(result['divergences'])} divergentes"
+        print(f"{result['batch_size']:>5} {result['workers']:>5} {result['subfolders_per_second']:>11.2f} "
+              f"{result['latency_p50']:>8.3f} {result['latency_p95']:>8.3f} {result['latency_max']:>8.3f}  {matches}")
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão e latência da verificação com documentos sintéticos.")
+    parser.add_argument('--lotes', default='1,5,20',
+                        help="Tamanhos de lote (subpastas por envio), separados por vírgula.")
+    parser.add_argument('--workers', default='1,2,4', help="Números de processos, separados por vírgula.")
+    parser.add_argument('--leiaute', choices=['pi', 'campanha'], default='pi',
+                        help="Pastas de PI (cada uma com OS e ATs) ou uma pasta \"campanha\" por lote.")
+    parser.add_argument('--repeticoes', type=int, default=1, help="Execuções de cada combinação.")
+    parser.add_argument('--pecas', type=int, default=2, help="Peças por OS/AP.")
+    parser.add_argument('--ats', type=int, default=1, help="ATs por OS.")
+    parser.add_argument('--paginas', type=int, default=1, help="Páginas de OS, ATs e SICAF.")
+    parser.add_argument('--nc', type=float, default=0.1, help="Fração das subpastas com um defeito.")
+    parser.add_argument('--seed', type=int, default=1, help="Semente do gerador de documentos.")
+    parser.add_argument('--cache', action='store_true',
+                        help="Reenvia os mesmos PDFs em todas as execuções (cache persistente aproveitado).")
+    parser.add_argument('--json', dest='json_path', help="Grava os resultados em JSON neste arquivo.")
+    args = parser.parse_args()
+
+    json_path = os.path.abspath(args.json_path) if args.json_path else None
+    generator_options = {'seed': args.seed, 'pieces': args.pecas, 'ats': args.ats, 'pages': args.paginas,
+                         'nc_rate': args.nc}
+
+    results = run(_int_list(args.lotes), _int_list(args.workers), args.leiaute, args.repeticoes, args.cache,
+                  generator_options)
+    print_report(results)
+
+    if json_path:
+        from engines import EXTRACTION_MODE
+        output = {
+            'config': {
+                'layout': args.leiaute, 'repetitions': args.repeticoes, 'cache': args.cache,
+                'extraction_mode': EXTRACTION_MODE, 'cpu_count': os.cpu_count(), **generator_options,
+            },
+            'results': results,
+        }
+        with open(json_path, 'w', encoding='utf-8') as file:
+            json.dump(output, file, ensure_ascii=False, indent=2)
+
+    # Código de saída 1 se algum status divergir do gabarito
+    return 0 if all(not r['divergences'] for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# test_watch.py
+#
+# Modo de vigilância (app/watch.py) sobre pastas geradas por bench/synthetic_docs.py:
+# a pasta de entrada é classificada como a pasta raiz do envio pelo site, inclusive quando
+# ela mesma é uma pasta "campanha".
+#
+# Uso (na pasta Leiaute_projet):
+#   python -m pytest tests
+
+import os
+import importlib
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def modules(tmp_path_factory):
+    """
+    Importa watch e synthetic_docs numa pasta temporária: db.py cria o app.db (manifesto e
+    cache de extração) na pasta atual, e as áreas de trabalho ficam em BATCH_WORKSPACES_DIR.
+    """
+    work_dir = tmp_path_factory.mktemp('vigilancia')
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(work_dir)
+        patch.setenv('BATCH_WORKSPACES_DIR', str(work_dir / 'lotes'))
+        patch.syspath_prepend(os.path.join(PROJECT_DIR, 'bench'))
+        patch.syspath_prepend(os.path.join(PROJECT_DIR, 'app'))
+        watch = importlib.import_module('watch')
+        synthetic_docs = importlib.import_module('synthetic_docs')
+        yield watch, synthetic_docs
+
+
+def _statuses(scan):
+    return {entry['subfolder_name']: entry['status'] for entry in scan['entries'].values()}
+
+
+def _expected(gabarito):
+    return {item['subfolder']: item['expected'] for item in gabarito}
+
+
+def test_campaign_root_inbox(modules, tmp_path):
+    watch, synthetic_docs = modules
+    gabarito = synthetic_docs.generate(str(tmp_path), pis=0, campanhas=1, subfolders=4, seed=3, nc_rate=0.5)
+    inbox = tmp_path / 'Lote 1 - campanha'
+    watcher = watch.InboxWatcher(str(inbox), workers=1, settle_seconds=0)
+
+    scan = watcher.scan()
+    assert not [entry['error'] for entry in scan['entries'].values() if entry['error']]
+    assert _statuses(scan) == _expected(gabarito)
+    assert len(scan['verified']) == len(gabarito)
+
+    scan = watcher.scan()
+    assert scan['verified'] == []
+    assert len(scan['unchanged']) == len(gabarito)
+
+    # A OS da campanha é compartilhada: alterá-la leva a uma nova verificação de todas as subpastas
+    os_path = next(path for path in inbox.iterdir() if path.is_file() and 'OS' in path.name.upper())
+    with open(os_path, 'ab') as file:
+        file.write(b'\n')
+    scan = watcher.scan()
+    assert sorted(scan['verified']) == sorted(item['subfolder'] for item in gabarito)
+    assert _statuses(scan) == _expected(gabarito)
+
+
+def test_plain_inbox(modules, tmp_path):
+    watch, synthetic_docs = modules
+    inbox = tmp_path / 'entrada'
+    gabarito = synthetic_docs.generate(str(inbox), pis=3, campanhas=1, subfolders=2, seed=5, nc_rate=0.5)
+    watcher = watch.InboxWatcher(str(inbox), workers=1, settle_seconds=0)
+
+    scan = watcher.scan()
+    assert not [entry['error'] for entry in scan['entries'].values() if entry['error']]
+    assert _statuses(scan) == _expected(gabarito)
+    assert sorted(scan['entries']) == sorted(item['path'] for item in gabarito)
+
+    scan = watcher.scan()
+    assert scan['verified'] == []
+    assert len(scan['unchanged']) == len(gabarito)